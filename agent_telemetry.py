@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+AdTopia Agent Telemetry
+Per-call latency, token and cost instrumentation for agent providers
+
+Tracks every OpenAI, Gamma, MCP-server and Supabase call made by the agentic
+scripts so batch runs show where the time (and the money) actually goes.
+
+Core Flow:
+1. Wrap a provider call in `telemetry.track(provider, endpoint)`
+2. Attach token usage to the call (cost is priced from TOKEN_PRICING)
+3. Aggregate in memory: latency histogram, tokens, cost, error rate
+4. Dump JSON + Prometheus text on demand or on a background interval
+
+Author: AdTopia AI
+Version: 1.0
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Histogram upper bounds in milliseconds (Prometheus "le" buckets, +Inf implied)
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000
+)
+
+# USD per 1K tokens: (prompt, completion)
+TOKEN_PRICING = {
+    'gpt-4o': (0.0025, 0.01),
+    'gpt-4-turbo': (0.01, 0.03),
+    'gpt-4o-mini': (0.00015, 0.0006),
+}
+
+
+class CallRecord:
+    """Mutable handle for one in-flight provider call"""
+
+    __slots__ = ('provider', 'endpoint', 'error', 'prompt_tokens', 'completion_tokens', 'cost_usd')
+
+    def __init__(self, provider: str, endpoint: str):
+        self.provider = provider
+        self.endpoint = endpoint
+        self.error = False
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+
+    def add_usage(self, usage: Any, model: Optional[str] = None):
+        """Record token usage from an OpenAI response (object or JSON dict)"""
+        if usage is None:
+            return
+        if isinstance(usage, dict):
+            prompt = usage.get('prompt_tokens', 0) or 0
+            completion = usage.get('completion_tokens', 0) or 0
+        else:
+            prompt = getattr(usage, 'prompt_tokens', 0) or 0
+            completion = getattr(usage, 'completion_tokens', 0) or 0
+
+        self.prompt_tokens += prompt
+        self.completion_tokens += completion
+
+        pricing = TOKEN_PRICING.get(model or '')
+        if pricing:
+            self.cost_usd += prompt / 1000 * pricing[0] + completion / 1000 * pricing[1]
+
+
+class _EndpointStats:
+    """Aggregated counters for one provider/endpoint pair"""
+
+    __slots__ = ('calls', 'errors', 'latency_sum_ms', 'latency_max_ms', 'buckets',
+                 'prompt_tokens', 'completion_tokens', 'cost_usd')
+
+    def __init__(self, bucket_count: int):
+        self.calls = 0
+        self.errors = 0
+        self.latency_sum_ms = 0.0
+        self.latency_max_ms = 0.0
+        self.buckets = [0] * (bucket_count + 1)  # last slot is +Inf
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+
+
+class AgentTelemetry:
+    """In-memory per-provider, per-endpoint call aggregation"""
+
+    def __init__(self, buckets_ms: Tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self.started_at = datetime.now().isoformat()
+        self._stats: Dict[Tuple[str, str], _EndpointStats] = {}
+        self._lock = threading.Lock()
+        self._dump_thread: Optional[threading.Thread] = None
+        self._dump_stop = threading.Event()
+
+    def record(self, provider: str, endpoint: str, latency_ms: float, error: bool = False,
+               prompt_tokens: int = 0, completion_tokens: int = 0, cost_usd: float = 0.0):
+        """Fold one finished call into the aggregates"""
+        bucket = bisect_left(self.buckets_ms, latency_ms)
+        key = (provider, endpoint)
+
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _EndpointStats(len(self.buckets_ms))
+            stats.calls += 1
+            stats.errors += 1 if error else 0
+            stats.latency_sum_ms += latency_ms
+            if latency_ms > stats.latency_max_ms:
+                stats.latency_max_ms = latency_ms
+            stats.buckets[bucket] += 1
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.cost_usd += cost_usd
+
+    @contextmanager
+    def track(self, provider: str, endpoint: str) -> Iterator[CallRecord]:
+        """Time a provider call; exceptions are counted as errors and re-raised"""
+        call = CallRecord(provider, endpoint)
+        start = time.perf_counter()
+        try:
+            yield call
+        except BaseException:
+            call.error = True
+            raise
+        finally:
+            self.record(
+                provider,
+                endpoint,
+                (time.perf_counter() - start) * 1000,
+                error=call.error,
+                prompt_tokens=call.prompt_tokens,
+                completion_tokens=call.completion_tokens,
+                cost_usd=call.cost_usd
+            )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serializable copy of the current aggregates"""
+        with self._lock:
+            items = [(key, self._copy_stats(stats)) for key, stats in self._stats.items()]
+
+        providers: Dict[str, Dict[str, Any]] = {}
+        for (provider, endpoint), stats in sorted(items, key=lambda item: item[0]):
+            calls = stats.calls
+            providers.setdefault(provider, {})[endpoint] = {
+                'calls': calls,
+                'errors': stats.errors,
+                'error_rate': stats.errors / calls if calls else 0.0,
+                'latency_avg_ms': stats.latency_sum_ms / calls if calls else 0.0,
+                'latency_max_ms': stats.latency_max_ms,
+                'latency_p50_ms': self._quantile(stats, 0.50),
+                'latency_p95_ms': self._quantile(stats, 0.95),
+                'latency_p99_ms': self._quantile(stats, 0.99),
+                'latency_histogram_ms': dict(zip(
+                    [str(b) for b in self.buckets_ms] + ['+Inf'], stats.buckets
+                )),
+                'prompt_tokens': stats.prompt_tokens,
+                'completion_tokens': stats.completion_tokens,
+                'cost_usd': round(stats.cost_usd, 6)
+            }
+
+        return {
+            'started_at': self.started_at,
+            'generated_at': datetime.now().isoformat(),
+            'providers': providers
+        }
+
+    def to_json(self) -> str:
+        """Render the aggregates as indented JSON"""
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Render the aggregates in Prometheus text exposition format"""
+        with self._lock:
+            items = sorted(
+                ((key, self._copy_stats(stats)) for key, stats in self._stats.items()),
+                key=lambda item: item[0]
+            )
+
+        lines = [
+            '# HELP adtopia_agent_call_latency_ms Provider call latency in milliseconds',
+            '# TYPE adtopia_agent_call_latency_ms histogram'
+        ]
+        for (provider, endpoint), stats in items:
+            labels = f'provider="{provider}",endpoint="{endpoint}"'
+            cumulative = 0
+            for bound, count in zip(list(self.buckets_ms) + ['+Inf'], stats.buckets):
+                cumulative += count
+                lines.append(f'adtopia_agent_call_latency_ms_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'adtopia_agent_call_latency_ms_sum{{{labels}}} {stats.latency_sum_ms:.3f}')
+            lines.append(f'adtopia_agent_call_latency_ms_count{{{labels}}} {stats.calls}')
+
+        counters = [
+            ('adtopia_agent_call_errors_total', 'Failed provider calls', 'errors'),
+            ('adtopia_agent_prompt_tokens_total', 'Prompt tokens consumed', 'prompt_tokens'),
+            ('adtopia_agent_completion_tokens_total', 'Completion tokens consumed', 'completion_tokens'),
+            ('adtopia_agent_cost_usd_total', 'Estimated provider cost in USD', 'cost_usd'),
+        ]
+        for name, help_text, field in counters:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for (provider, endpoint), stats in items:
+                lines.append(f'{name}{{provider="{provider}",endpoint="{endpoint}"}} {getattr(stats, field)}')
+
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path: str):
+        """Write `<path>.json` and `<path>.prom` snapshots"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        for suffix, content in (('.json', self.to_json()), ('.prom', self.to_prometheus())):
+            tmp_path = f"{path}{suffix}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(content)
+            os.replace(tmp_path, f"{path}{suffix}")
+
+    def start_periodic_dump(self, path: str, interval: float = 60.0):
+        """Dump snapshots every `interval` seconds on a daemon thread"""
+        if self._dump_thread and self._dump_thread.is_alive():
+            return
+
+        self._dump_stop.clear()
+
+        def _loop():
+            while not self._dump_stop.wait(interval):
+                try:
+                    self.dump(path)
+                except OSError as error:
+                    print(f"❌ Telemetry dump failed: {error}")
+
+        self._dump_thread = threading.Thread(target=_loop, name='agent-telemetry-dump', daemon=True)
+        self._dump_thread.start()
+
+    def stop_periodic_dump(self, path: Optional[str] = None):
+        """Stop the background dumper, writing one final snapshot if `path` is given"""
+        self._dump_stop.set()
+        if self._dump_thread:
+            self._dump_thread.join(timeout=5)
+            self._dump_thread = None
+        if path:
+            self.dump(path)
+
+    def start_from_env(self) -> Optional[str]:
+        """Start periodic dumps when AGENT_TELEMETRY_PATH is set; returns the path"""
+        path = os.getenv('AGENT_TELEMETRY_PATH')
+        if path:
+            self.start_periodic_dump(path, float(os.getenv('AGENT_TELEMETRY_INTERVAL', '60')))
+        return path
+
+    def reset(self):
+        """Drop all aggregates"""
+        with self._lock:
+            self._stats.clear()
+        self.started_at = datetime.now().isoformat()
+
+    def _copy_stats(self, stats: _EndpointStats) -> _EndpointStats:
+        copy = _EndpointStats(len(self.buckets_ms))
+        for field in _EndpointStats.__slots__:
+            value = getattr(stats, field)
+            setattr(copy, field, list(value) if isinstance(value, list) else value)
+        return copy
+
+    def _quantile(self, stats: _EndpointStats, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket that contains it"""
+        if not stats.calls:
+            return 0.0
+        rank = q * stats.calls
+        cumulative = 0
+        for bound, count in zip(self.buckets_ms, stats.buckets):
+            cumulative += count
+            if cumulative >= rank:
+                return float(min(bound, stats.latency_max_ms))
+        return stats.latency_max_ms
+
+
+# Process-wide collector shared by all agent scripts
+telemetry = AgentTelemetry()
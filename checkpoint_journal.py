@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+AdTopia Checkpoint Journal
+Append-only record of completed work units so long batch runs can resume
+
+Each completed lead, URL or other work unit is appended as one JSON line
+with its output. Reopening the journal replays it into a dict, so a rerun
+skips finished units with an O(1) lookup and only pays for the remainder.
+
+Core Flow:
+1. Open the journal (existing entries are replayed into memory)
+2. Skip any unit already `in` the journal
+3. `record()` each unit when it completes
+4. Lines are fsynced every `fsync_every` records or `fsync_interval` seconds,
+   and always on `close()`; a torn last line from a crash is discarded
+
+Author: AdTopia AI
+Version: 1.0
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+class CheckpointJournal:
+    """Durable set of completed work-unit IDs and their outputs"""
+
+    def __init__(self, path: str, fsync_every: int = 50, fsync_interval: float = 2.0):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_interval = fsync_interval
+        self.completed: Dict[str, Any] = {}
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        self._replay()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _replay(self):
+        """Load existing entries, skipping lines without an id and truncating a partially written final line"""
+        if not os.path.exists(self.path):
+            return
+
+        good_offset = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b'\n'):
+                    break
+                good_offset += len(line)
+                # A complete line that is valid JSON but not an entry is skipped, not truncated:
+                # later lines may still be good
+                if isinstance(entry, dict) and 'id' in entry:
+                    self.completed[entry['id']] = entry.get('output')
+
+        if good_offset < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_offset)
+
+    def __contains__(self, unit_id: str) -> bool:
+        return unit_id in self.completed
+
+    def __len__(self) -> int:
+        return len(self.completed)
+
+    def get(self, unit_id: str, default: Optional[Any] = None) -> Any:
+        return self.completed.get(unit_id, default)
+
+    def record(self, unit_id: str, output: Optional[Any] = None):
+        """Mark a unit complete; output must be JSON-serializable"""
+        entry = {'id': unit_id, 'output': output, 'completed_at': datetime.now().isoformat()}
+        self._file.write(json.dumps(entry, default=str) + '\n')
+        self.completed[unit_id] = output
+        self._unsynced += 1
+
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        """Flush and fsync pending entries"""
+        if self._file.closed or not self._unsynced:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def __enter__(self) -> 'CheckpointJournal':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+AdTopia MCP Load Generator
+Drive AdTopiaMCPAgent at N concurrent sessions against an HTTP MCP server
+
+Spawns mcp_standin_server.py (or targets --url), runs the agent pipeline for
+a fixed number of leads across N concurrent sessions, and reports pipeline
+and per-tool p50/p95/p99 latency, error counts and throughput.
+
+Run: python mcp_loadgen.py --sessions 50 --leads 500 --latency-ms 200 --jitter-ms 80
+     python mcp_loadgen.py --url http://127.0.0.1:8765/ --sessions 100 --mode staged
+
+Author: AdTopia AI
+Version: 1.0
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from mcp_standin_server import add_profile_args
+from run_mcp_agent import AdTopiaMCPAgent, HTTPMCPClient
+
+SAMPLE_LEADS = [
+    {
+        "name": "R Movers",
+        "niche": "movers",
+        "location": "Modesto CA",
+        "years": 14,
+        "features": ["Local Moves $99/hr", "Piano Specialty", "Free Estimates"],
+        "pain_points": ["Dead domain", "No keywords", "Poor visuals"]
+    },
+    {
+        "name": "CoolFix Plumbing",
+        "niche": "plumbers",
+        "location": "Fresno CA",
+        "years": 20,
+        "features": ["<30min Emergency", "No-Mess Free", "Licensed & Insured"],
+        "pain_points": ["High competition", "Slow response", "Pricing transparency"]
+    }
+]
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(q * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def latency_summary(values_ms: List[float]) -> Dict[str, float]:
+    values = sorted(values_ms)
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 0.50), 1),
+        "p95_ms": round(percentile(values, 0.95), 1),
+        "p99_ms": round(percentile(values, 0.99), 1),
+        "max_ms": round(values[-1], 1) if values else 0.0
+    }
+
+
+def make_leads(count: int) -> List[Dict[str, Any]]:
+    return [
+        {**SAMPLE_LEADS[i % len(SAMPLE_LEADS)], "id": f"load_{i:06d}"}
+        for i in range(count)
+    ]
+
+
+class RecordingClient(HTTPMCPClient):
+    """HTTPMCPClient that keeps raw per-tool latencies for exact percentiles"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tool_latencies: Dict[str, List[float]] = {}
+        self.tool_errors: Dict[str, int] = {}
+
+    async def call_tool(self, tool_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        result = await super().call_tool(tool_name, parameters)
+        self.tool_latencies.setdefault(tool_name, []).append((time.perf_counter() - start) * 1000)
+        if not result.get("success"):
+            self.tool_errors[tool_name] = self.tool_errors.get(tool_name, 0) + 1
+        return result
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn_server(args: argparse.Namespace) -> subprocess.Popen:
+    """Start mcp_standin_server.py with the same latency/error profile"""
+    server_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mcp_standin_server.py")
+    command = [
+        sys.executable, server_script,
+        "--port", str(args.port),
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--distribution", args.distribution,
+        "--error-rate", str(args.error_rate),
+        "--http-error-rate", str(args.http_error_rate)
+    ]
+    for override in args.tool_latency:
+        command += ["--tool-latency", override]
+    if args.seed is not None:
+        command += ["--seed", str(args.seed)]
+
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        with contextlib.suppress(OSError), socket.create_connection(("127.0.0.1", args.port), timeout=0.2):
+            return process
+        time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("MCP stand-in server did not start")
+
+
+async def run_load(url: str, sessions: int, leads: List[Dict[str, Any]], mode: str) -> Dict[str, Any]:
+    client = RecordingClient(url, max_connections=sessions, verbose=False)
+    agent = AdTopiaMCPAgent(max_concurrency=sessions, client=client)
+    pipeline_latencies: List[float] = []
+    failures = 0
+
+    start = time.perf_counter()
+    # The agent narrates every step; keep the report readable
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if mode == "staged":
+            batch = await agent.run_staged_batch(leads)
+            results = batch["results"]
+            stage_metrics = batch["stageMetrics"]
+        else:
+            pending = iter(leads)
+            results = []
+            stage_metrics = None
+
+            async def session():
+                for lead in pending:
+                    results.append(await agent.run_agentic_pipeline(lead))
+
+            await asyncio.gather(*(session() for _ in range(sessions)))
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+
+    for result in results:
+        if result.get("success"):
+            pipeline_latencies.append(result["processingTime"])
+        else:
+            failures += 1
+
+    report = {
+        "mode": mode,
+        "sessions": sessions,
+        "leads": len(leads),
+        "successful": len(leads) - failures,
+        "failed": failures,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_leads_per_sec": round(len(leads) / elapsed, 3) if elapsed else 0.0,
+        "tool_calls_per_sec": round(sum(len(v) for v in client.tool_latencies.values()) / elapsed, 3) if elapsed else 0.0,
+        "pipeline_latency": latency_summary(pipeline_latencies),
+        "tool_latency": {
+            tool: {**latency_summary(values), "errors": client.tool_errors.get(tool, 0)}
+            for tool, values in sorted(client.tool_latencies.items())
+        }
+    }
+    if stage_metrics:
+        report["stage_metrics"] = stage_metrics
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    print("\n📈 MCP LOAD TEST REPORT")
+    print("=" * 60)
+    print(f"Mode: {report['mode']} | Sessions: {report['sessions']} | Leads: {report['leads']}")
+    print(f"Successful: {report['successful']} | Failed: {report['failed']}")
+    print(f"Elapsed: {report['elapsed_seconds']:.2f}s")
+    print(f"Throughput: {report['throughput_leads_per_sec']:.2f} leads/s ({report['tool_calls_per_sec']:.1f} tool calls/s)")
+
+    pipeline = report["pipeline_latency"]
+    print(f"\nPipeline latency: p50={pipeline['p50_ms']:.0f}ms p95={pipeline['p95_ms']:.0f}ms "
+          f"p99={pipeline['p99_ms']:.0f}ms max={pipeline['max_ms']:.0f}ms")
+
+    print("\nPer-tool latency:")
+    for tool, stats in report["tool_latency"].items():
+        print(f"  {tool:<22} n={stats['count']:<6} p50={stats['p50_ms']:.0f}ms p95={stats['p95_ms']:.0f}ms "
+              f"p99={stats['p99_ms']:.0f}ms errors={stats['errors']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test AdTopiaMCPAgent against an HTTP MCP server")
+    parser.add_argument("--url", help="Target MCP server (default: spawn mcp_standin_server.py)")
+    parser.add_argument("--port", type=int, default=0, help="Port for the spawned stand-in (default: random)")
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent agent sessions")
+    parser.add_argument("--leads", type=int, default=100, help="Total leads to process")
+    parser.add_argument("--mode", choices=["sessions", "staged"], default="sessions",
+                        help="Independent sessions, or run_staged_batch pipelining")
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this JSON file")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    server: Optional[subprocess.Popen] = None
+    url = args.url
+    if not url:
+        args.port = args.port or free_port()
+        server = spawn_server(args)
+        url = f"http://127.0.0.1:{args.port}/"
+
+    try:
+        report = asyncio.run(run_load(url, args.sessions, make_leads(args.leads), args.mode))
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=5)
+
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report saved: {args.json_path}")
+
+    return 0 if report["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+AdTopia MCP Stand-in Server
+Local HTTP/JSON-RPC MCP server for load-testing AdTopiaMCPAgent
+
+Serves the five AdTopia tools (analyze-lead, generate-ad-content,
+deploy-to-platform, track-performance, optimize-strategy) over real HTTP
+with keep-alive, so agent runs exercise serialization, connection reuse and
+concurrency instead of an in-process fake. Latency and error rates are
+configurable per tool.
+
+Protocol: POST / with a JSON-RPC 2.0 body
+  {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+   "params": {"name": "analyze-lead", "arguments": {...}}}
+Result: {"content": [{"type": "text", "text": "<tool JSON>"}], "isError": false}
+
+Run: python mcp_standin_server.py --port 8765 --latency-ms 500 --jitter-ms 150 --error-rate 0.01
+
+Author: AdTopia AI
+Version: 1.0
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from run_mcp_agent import MockMCPClient
+
+TOOL_NAMES = (
+    "analyze-lead",
+    "generate-ad-content",
+    "deploy-to-platform",
+    "track-performance",
+    "optimize-strategy"
+)
+
+
+@dataclass
+class ToolProfile:
+    """Latency and failure distribution for one tool"""
+    latency_ms: float = 500.0
+    jitter_ms: float = 0.0
+    distribution: str = "uniform"  # uniform | lognormal | fixed
+    error_rate: float = 0.0  # tool-level failures (isError result)
+    http_error_rate: float = 0.0  # transport-level 503s
+
+    def sample_latency(self, rng: random.Random) -> float:
+        """Draw one latency in seconds"""
+        if self.distribution == "fixed" or self.jitter_ms <= 0:
+            latency_ms = self.latency_ms
+        elif self.distribution == "lognormal":
+            # Median latency_ms, spread set so ~68% of samples fall within ±jitter_ms
+            sigma = min(self.jitter_ms / max(self.latency_ms, 1.0), 2.0)
+            latency_ms = rng.lognormvariate(0.0, sigma) * self.latency_ms
+        else:
+            latency_ms = rng.uniform(self.latency_ms - self.jitter_ms, self.latency_ms + self.jitter_ms)
+        return max(latency_ms, 0.0) / 1000
+
+
+@dataclass
+class StandInConfig:
+    """Server-wide defaults plus per-tool overrides"""
+    default: ToolProfile = field(default_factory=ToolProfile)
+    tools: Dict[str, ToolProfile] = field(default_factory=dict)
+    seed: Optional[int] = None
+
+    def profile(self, tool_name: str) -> ToolProfile:
+        return self.tools.get(tool_name, self.default)
+
+
+class MCPStandInServer:
+    """Minimal HTTP/1.1 keep-alive server answering MCP JSON-RPC tool calls"""
+
+    def __init__(self, config: Optional[StandInConfig] = None, host: str = "127.0.0.1", port: int = 8765):
+        self.config = config or StandInConfig()
+        self.host = host
+        self.port = port
+        self.rng = random.Random(self.config.seed)
+        self.tools = MockMCPClient()
+        self.stats = {"requests": 0, "tool_errors": 0, "http_errors": 0, "connections": 0}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        """Bind and start accepting connections"""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if not self._server:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/"
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats["connections"] += 1
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                body, keep_alive = request
+                status, payload = await self._handle_rpc(body)
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[bytes, bool]]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", "0"))
+        body = await reader.readexactly(length) if length else b""
+        keep_alive = headers.get("connection", "").lower() != "close"
+        return body, keep_alive
+
+    def _write_response(self, writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any], keep_alive: bool):
+        body = json.dumps(payload).encode()
+        reason = {200: "OK", 400: "Bad Request", 503: "Service Unavailable"}.get(status, "OK")
+        head = (
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        ).encode()
+        writer.write(head + body)
+
+    async def _handle_rpc(self, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        self.stats["requests"] += 1
+        try:
+            message = json.loads(body)
+        except ValueError:  # JSONDecodeError, or a body that is not valid UTF-8
+            return 400, {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}}
+        if not isinstance(message, dict):
+            # Batches and bare values are not requests this stand-in answers
+            return 400, {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}}
+
+        request_id = message.get("id")
+        method = message.get("method")
+
+        if method == "tools/list":
+            tools = [{"name": name, "inputSchema": {"type": "object"}} for name in TOOL_NAMES]
+            return 200, {"jsonrpc": "2.0", "id": request_id, "result": {"tools": tools}}
+
+        if method != "tools/call":
+            return 200, {"jsonrpc": "2.0", "id": request_id,
+                         "error": {"code": -32601, "message": f"Method not found: {method}"}}
+
+        params = message.get("params") or {}
+        if not isinstance(params, dict):
+            return 200, {"jsonrpc": "2.0", "id": request_id,
+                         "error": {"code": -32602, "message": "Invalid params: expected an object"}}
+        tool_name = params.get("name")
+        if tool_name not in TOOL_NAMES:
+            return 200, {"jsonrpc": "2.0", "id": request_id,
+                         "error": {"code": -32602, "message": f"Unknown tool: {tool_name}"}}
+
+        profile = self.config.profile(tool_name)
+        await asyncio.sleep(profile.sample_latency(self.rng))
+
+        if self.rng.random() < profile.http_error_rate:
+            self.stats["http_errors"] += 1
+            return 503, {"jsonrpc": "2.0", "id": request_id,
+                         "error": {"code": -32000, "message": "Service unavailable"}}
+
+        if self.rng.random() < profile.error_rate:
+            self.stats["tool_errors"] += 1
+            result = {"success": False, "error": f"{tool_name} failed (injected)"}
+        else:
+            result = await self.tools.route_tool(tool_name, params.get("arguments") or {})
+
+        return 200, {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "result": {
+                "content": [{"type": "text", "text": json.dumps(result)}],
+                "isError": not result.get("success", False)
+            }
+        }
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Local MCP stand-in server for AdTopia agent load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_profile_args(parser)
+    return parser
+
+
+def add_profile_args(parser: argparse.ArgumentParser):
+    """Latency/error flags shared with the load generator"""
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="Median tool latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Latency spread")
+    parser.add_argument("--distribution", choices=["uniform", "lognormal", "fixed"], default="uniform")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of tool calls failing")
+    parser.add_argument("--http-error-rate", type=float, default=0.0, help="Fraction of HTTP 503 responses")
+    parser.add_argument("--tool-latency", action="append", default=[], metavar="TOOL=MS",
+                        help="Per-tool median latency override (repeatable)")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args: argparse.Namespace) -> StandInConfig:
+    default = ToolProfile(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        distribution=args.distribution,
+        error_rate=args.error_rate,
+        http_error_rate=args.http_error_rate
+    )
+    tools = {}
+    for override in args.tool_latency:
+        tool_name, _, latency = override.partition("=")
+        if tool_name not in TOOL_NAMES:
+            raise SystemExit(f"Unknown tool in --tool-latency: {tool_name}")
+        tools[tool_name] = ToolProfile(
+            latency_ms=float(latency),
+            jitter_ms=default.jitter_ms,
+            distribution=default.distribution,
+            error_rate=default.error_rate,
+            http_error_rate=default.http_error_rate
+        )
+    return StandInConfig(default=default, tools=tools, seed=args.seed)
+
+
+async def main():
+    args = build_arg_parser().parse_args()
+    server = MCPStandInServer(config_from_args(args), host=args.host, port=args.port)
+    await server.start()
+    print(f"🧪 MCP stand-in listening on {server.url}")
+    await server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+AdTopia Result Sink
+Streaming JSONL output and running aggregates for agent batch runs
+
+Batch runs used to hold every result dict (content, deployment and
+performance payloads included) in a list until the end. Results are now
+written one line at a time as they complete, and the batch summary is
+folded in incrementally, so memory stays flat however many leads run and
+a crash still leaves every finished result on disk.
+
+Core Flow:
+1. Open a `JSONLResultSink` on the results path
+2. Write each result as it completes (one JSON object per line)
+3. fsync every `fsync_every` records or `fsync_interval` seconds
+4. Fold each result into `BatchAggregates` for the summary
+
+Author: AdTopia AI
+Version: 1.0
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict
+
+
+class BatchAggregates:
+    """Running batch counters; O(1) memory regardless of batch size"""
+
+    def __init__(self):
+        self.total = 0
+        self.successful = 0
+        self.failed = 0
+        self.total_roi = 0.0
+
+    def add(self, success: bool, roi: float = 0.0):
+        self.total += 1
+        if success:
+            self.successful += 1
+            self.total_roi += roi
+        else:
+            self.failed += 1
+
+    @property
+    def success_rate(self) -> float:
+        return self.successful / self.total * 100 if self.total else 0.0
+
+    @property
+    def average_roi(self) -> float:
+        return self.total_roi / self.successful if self.successful else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'total': self.total,
+            'successful': self.successful,
+            'failed': self.failed,
+            'successRate': self.success_rate,
+            'totalROI': self.total_roi,
+            'averageROI': self.average_roi
+        }
+
+
+class JSONLResultSink:
+    """Append-only JSONL writer with batched fsync"""
+
+    def __init__(self, path: str, fsync_every: int = 100, fsync_interval: float = 5.0):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_interval = fsync_interval
+        self.records_written = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, record: Dict[str, Any]):
+        """Append one result; values JSON cannot encode are stringified"""
+        self._file.write(json.dumps(record, default=str) + '\n')
+        self.records_written += 1
+        self._unsynced += 1
+
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        """Flush buffered lines and fsync them to disk"""
+        if self._file.closed:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def __enter__(self) -> 'JSONLResultSink':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
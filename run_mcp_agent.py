@@ -8,12 +8,19 @@ showing how AI reasoning transforms your automation pipeline
 into an intelligent revenue optimization machine.
 """
 
+import hashlib
 import json
+import os
 import asyncio
 import time
-from typing import Dict, List, Any
+from typing import Dict, List, Any, AsyncIterator, Container, Optional, Tuple
 from datetime import datetime
 
+from agent_telemetry import telemetry
+from checkpoint_journal import CheckpointJournal
+from result_sink import BatchAggregates, JSONLResultSink
+from staged_executor import Stage, StagedExecutor
+
 # Simulate MCP client (in production, this would be the actual MCP client)
 class MockMCPClient:
     """Mock MCP client for demonstration"""
@@ -27,10 +34,18 @@ class MockMCPClient:
         print(f"🧠 MCP Tool Call: {tool_name}")
         print(f"📦 Parameters: {json.dumps(parameters, indent=2)}")
         
-        # Simulate processing time
+        with telemetry.track("mcp", tool_name) as call:
+            result = await self._dispatch_tool(tool_name, parameters)
+            call.error = not result.get("success")
+        return result
+    
+    async def _dispatch_tool(self, tool_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Simulate processing time, then route to the mock handler"""
         await asyncio.sleep(0.5)
-        
-        # Return mock responses based on tool
+        return await self.route_tool(tool_name, parameters)
+    
+    async def route_tool(self, tool_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the mock response for a tool (no simulated latency)"""
         if tool_name == "analyze-lead":
             return await self._analyze_lead(parameters)
         elif tool_name == "generate-ad-content":
@@ -155,209 +170,475 @@ class MockMCPClient:
             }
         }
 
+class HTTPMCPClient:
+    """MCP client speaking JSON-RPC 2.0 `tools/call` over HTTP (e.g. mcp_standin_server.py)"""
+    
+    def __init__(self, server_url: str, max_connections: int = 100, timeout: float = 30.0, verbose: bool = True):
+        import httpx  # only needed when talking to a real server
+        
+        self.server_url = server_url
+        self.session_id = f"session_{int(time.time())}"
+        self.agent_version = "1.0.0"
+        self.verbose = verbose
+        self._request_id = 0
+        self._http = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+    
+    async def call_tool(self, tool_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Call an MCP tool over HTTP; transport and RPC errors come back as failed results"""
+        if self.verbose:
+            print(f"🧠 MCP Tool Call: {tool_name}")
+            print(f"📦 Parameters: {json.dumps(parameters, indent=2)}")
+        
+        self._request_id += 1
+        payload = {
+            "jsonrpc": "2.0",
+            "id": self._request_id,
+            "method": "tools/call",
+            "params": {"name": tool_name, "arguments": parameters}
+        }
+        
+        with telemetry.track("mcp", tool_name) as call:
+            try:
+                response = await self._http.post(self.server_url, json=payload)
+                if response.status_code != 200:
+                    result = {"success": False, "error": f"HTTP {response.status_code}"}
+                else:
+                    body = response.json()
+                    if "error" in body:
+                        result = {"success": False, "error": body["error"].get("message", "RPC error")}
+                    else:
+                        result = json.loads(body["result"]["content"][0]["text"])
+            except Exception as error:
+                result = {"success": False, "error": f"{type(error).__name__}: {error}"}
+            call.error = not result.get("success")
+        return result
+    
+    async def aclose(self):
+        """Close pooled connections"""
+        await self._http.aclose()
+
 class AdTopiaMCPAgent:
     """AdTopia MCP Agentic Intelligence System"""
     
-    def __init__(self):
-        self.client = MockMCPClient()
+    # (MCP tool, stage handler) in pipeline order
+    PIPELINE_STAGES = [
+        ("analyze-lead", "_stage_analyze"),
+        ("generate-ad-content", "_stage_generate"),
+        ("deploy-to-platform", "_stage_deploy"),
+        ("track-performance", "_stage_track"),
+        ("optimize-strategy", "_stage_optimize")
+    ]
+    
+    def __init__(self, max_concurrency: Optional[int] = None, tool_concurrency: Optional[Dict[str, int]] = None,
+                 client: Optional[Any] = None):
+        self.client = client or MockMCPClient()
         self.session_stats = {
             "total_sessions": 0,
             "successful_sessions": 0,
             "total_roi_generated": 0,
             "leads_processed": 0
         }
+        
+        # Concurrency limits: leads in flight per batch, and per-tool in-flight calls
+        self.max_concurrency = max_concurrency or int(os.getenv("MCP_AGENT_CONCURRENCY", "10"))
+        self.tool_concurrency = tool_concurrency or {}
+        self._tool_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._stats_lock = asyncio.Lock()
+    
+    async def _call_tool(self, tool_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Call an MCP tool, bounded by that tool's concurrency limit"""
+        semaphore = self._tool_semaphores.get(tool_name)
+        if semaphore is None:
+            limit = self.tool_concurrency.get(tool_name, self.max_concurrency)
+            semaphore = self._tool_semaphores[tool_name] = asyncio.Semaphore(limit)
+        
+        async with semaphore:
+            return await self.client.call_tool(tool_name, parameters)
     
     async def run_agentic_pipeline(self, lead_data: Dict[str, Any]) -> Dict[str, Any]:
         """Run complete agentic pipeline with AI reasoning"""
+        ctx = await self._start_pipeline(lead_data)
+        
+        try:
+            for _, stage in self.PIPELINE_STAGES:
+                ctx = await getattr(self, stage)(ctx)
+            return await self._complete_pipeline(ctx)
+            
+        except Exception as error:
+            return self._fail_pipeline(error)
+    
+    async def _start_pipeline(self, lead_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Open a pipeline session and return its stage context"""
         print(f"🚀 Starting MCP Agentic Pipeline for {lead_data.get('name', 'Unknown Business')}")
         print("=" * 60)
         
-        start_time = time.time()
-        self.session_stats["total_sessions"] += 1
+        ctx = {"lead": lead_data, "start_time": time.time()}
+        async with self._stats_lock:
+            self.session_stats["total_sessions"] += 1
+        return ctx
+    
+    async def _stage_analyze(self, ctx: Dict[str, Any]) -> Dict[str, Any]:
+        """Step 1: AI Lead Analysis"""
+        lead_data = ctx["lead"]
+        print("\n🧠 STEP 1: AI Lead Analysis")
+        print("-" * 30)
         
-        try:
-            # Step 1: AI Lead Analysis
-            print("\n🧠 STEP 1: AI Lead Analysis")
-            print("-" * 30)
-            
-            analysis_result = await self.client.call_tool("analyze-lead", {
-                "leadData": lead_data,
-                "historicalPerformance": [],
-                "marketContext": "High competition, 28% text spike opportunity"
-            })
-            
-            if not analysis_result.get("success"):
-                raise Exception("Lead analysis failed")
-            
-            analysis = analysis_result["analysis"]
-            print(f"✅ Urgency Level: {analysis['urgencyLevel']}")
-            print(f"✅ Value Proposition: {analysis['valueProposition']}")
-            print(f"✅ Confidence: {analysis['confidence']}")
-            print(f"✅ Expected ROI: {analysis['expectedROI']}%")
-            
-            # Step 2: AI Content Generation
-            print(f"\n🎨 STEP 2: AI Content Generation")
-            print("-" * 30)
-            
-            content_result = await self.client.call_tool("generate-ad-content", {
-                "niche": lead_data.get("niche", "general"),
-                "urgencyLevel": analysis["urgencyLevel"],
-                "valueProposition": analysis["valueProposition"],
-                "location": lead_data.get("location", "Unknown"),
-                "leadData": lead_data
-            })
-            
-            if not content_result.get("success"):
-                raise Exception("Content generation failed")
-            
-            content = content_result["content"]
-            print(f"✅ Content ID: {content_result['contentId']}")
-            print(f"✅ Urgency Cards: {len(content['urgencyCards'])} variants")
-            print(f"✅ Value Landing: Generated")
-            print(f"✅ Outreach Emails: 2 variants (A/B)")
-            
-            # Step 3: AI Deployment
-            print(f"\n🚀 STEP 3: AI Deployment")
-            print("-" * 30)
-            
-            deployment_result = await self.client.call_tool("deploy-to-platform", {
-                "contentId": content_result["contentId"],
-                "platform": "gamma",
-                "schedule": "immediate" if analysis["urgencyLevel"] == "high" else "scheduled",
-                "targetAudience": f"{lead_data.get('location', 'Local')} {lead_data.get('niche', 'service')} seekers",
-                "budget": 500 if analysis["urgencyLevel"] == "high" else 200
-            })
-            
-            if not deployment_result.get("success"):
-                raise Exception("Deployment failed")
-            
-            deployment = deployment_result["deployment"]
-            print(f"✅ Deployment ID: {deployment_result['deploymentId']}")
-            print(f"✅ Platform: {deployment['platform']}")
-            print(f"✅ Status: {deployment['status']}")
-            print(f"✅ Webhook Triggered: {deployment_result.get('webhookTriggered', False)}")
-            
-            # Step 4: AI Performance Tracking
-            print(f"\n📊 STEP 4: AI Performance Tracking")
-            print("-" * 30)
-            
-            # Simulate performance metrics after deployment
-            performance_metrics = {
-                "impressions": 1000,
-                "clicks": 50,
-                "conversions": 5,
-                "revenue": 495,
-                "roi": 11733.3
-            }
-            
-            tracking_result = await self.client.call_tool("track-performance", {
-                "deploymentId": deployment_result["deploymentId"],
-                "metrics": performance_metrics,
-                "timeframe": "24h"
-            })
-            
-            if not tracking_result.get("success"):
-                raise Exception("Performance tracking failed")
-            
-            performance = tracking_result["performance"]
-            insights = tracking_result["insights"]
-            print(f"✅ Impressions: {performance['impressions']}")
-            print(f"✅ Clicks: {performance['clicks']}")
-            print(f"✅ Conversions: {performance['conversions']}")
-            print(f"✅ Revenue: ${performance['revenue']}")
-            print(f"✅ ROI: {performance['roi']}%")
-            print(f"✅ Performance Score: {insights['performanceScore']}")
-            print(f"✅ Recommendation: {insights['recommendation']}")
-            
-            # Step 5: AI Strategy Optimization
-            print(f"\n🔧 STEP 5: AI Strategy Optimization")
-            print("-" * 30)
-            
-            optimization_result = await self.client.call_tool("optimize-strategy", {
-                "deploymentId": deployment_result["deploymentId"],
-                "currentPerformance": performance_metrics,
-                "optimizationGoal": "increase_roi"
-            })
-            
-            if not optimization_result.get("success"):
-                raise Exception("Strategy optimization failed")
-            
-            optimization = optimization_result["optimization"]
-            recommendation = optimization_result["recommendation"]
-            print(f"✅ Optimization Action: {optimization['action']}")
-            print(f"✅ Budget Adjustment: ${optimization['budgetAdjustment']}")
-            print(f"✅ Platform Adjustment: {optimization['platformAdjustment']}")
-            print(f"✅ Expected Improvement: {recommendation['expectedImprovement']}")
-            print(f"✅ Timeline: {recommendation['timeline']}")
-            
-            # Update session stats
-            processing_time = (time.time() - start_time) * 1000
+        analysis_result = await self._call_tool("analyze-lead", {
+            "leadData": lead_data,
+            "historicalPerformance": [],
+            "marketContext": "High competition, 28% text spike opportunity"
+        })
+        
+        if not analysis_result.get("success"):
+            raise Exception("Lead analysis failed")
+        
+        analysis = ctx["analysis"] = analysis_result["analysis"]
+        print(f"✅ Urgency Level: {analysis['urgencyLevel']}")
+        print(f"✅ Value Proposition: {analysis['valueProposition']}")
+        print(f"✅ Confidence: {analysis['confidence']}")
+        print(f"✅ Expected ROI: {analysis['expectedROI']}%")
+        return ctx
+    
+    async def _stage_generate(self, ctx: Dict[str, Any]) -> Dict[str, Any]:
+        """Step 2: AI Content Generation"""
+        lead_data, analysis = ctx["lead"], ctx["analysis"]
+        print(f"\n🎨 STEP 2: AI Content Generation")
+        print("-" * 30)
+        
+        content_result = await self._call_tool("generate-ad-content", {
+            "niche": lead_data.get("niche", "general"),
+            "urgencyLevel": analysis["urgencyLevel"],
+            "valueProposition": analysis["valueProposition"],
+            "location": lead_data.get("location", "Unknown"),
+            "leadData": lead_data
+        })
+        
+        if not content_result.get("success"):
+            raise Exception("Content generation failed")
+        
+        ctx["content_id"] = content_result["contentId"]
+        content = ctx["content"] = content_result["content"]
+        print(f"✅ Content ID: {content_result['contentId']}")
+        print(f"✅ Urgency Cards: {len(content['urgencyCards'])} variants")
+        print(f"✅ Value Landing: Generated")
+        print(f"✅ Outreach Emails: 2 variants (A/B)")
+        return ctx
+    
+    async def _stage_deploy(self, ctx: Dict[str, Any]) -> Dict[str, Any]:
+        """Step 3: AI Deployment"""
+        lead_data, analysis = ctx["lead"], ctx["analysis"]
+        print(f"\n🚀 STEP 3: AI Deployment")
+        print("-" * 30)
+        
+        deployment_result = await self._call_tool("deploy-to-platform", {
+            "contentId": ctx["content_id"],
+            "platform": "gamma",
+            "schedule": "immediate" if analysis["urgencyLevel"] == "high" else "scheduled",
+            "targetAudience": f"{lead_data.get('location', 'Local')} {lead_data.get('niche', 'service')} seekers",
+            "budget": 500 if analysis["urgencyLevel"] == "high" else 200
+        })
+        
+        if not deployment_result.get("success"):
+            raise Exception("Deployment failed")
+        
+        ctx["deployment_id"] = deployment_result["deploymentId"]
+        deployment = ctx["deployment"] = deployment_result["deployment"]
+        print(f"✅ Deployment ID: {deployment_result['deploymentId']}")
+        print(f"✅ Platform: {deployment['platform']}")
+        print(f"✅ Status: {deployment['status']}")
+        print(f"✅ Webhook Triggered: {deployment_result.get('webhookTriggered', False)}")
+        return ctx
+    
+    async def _stage_track(self, ctx: Dict[str, Any]) -> Dict[str, Any]:
+        """Step 4: AI Performance Tracking"""
+        print(f"\n📊 STEP 4: AI Performance Tracking")
+        print("-" * 30)
+        
+        # Simulate performance metrics after deployment
+        performance_metrics = ctx["performance_metrics"] = {
+            "impressions": 1000,
+            "clicks": 50,
+            "conversions": 5,
+            "revenue": 495,
+            "roi": 11733.3
+        }
+        
+        tracking_result = await self._call_tool("track-performance", {
+            "deploymentId": ctx["deployment_id"],
+            "metrics": performance_metrics,
+            "timeframe": "24h"
+        })
+        
+        if not tracking_result.get("success"):
+            raise Exception("Performance tracking failed")
+        
+        performance = ctx["performance"] = tracking_result["performance"]
+        insights = tracking_result["insights"]
+        print(f"✅ Impressions: {performance['impressions']}")
+        print(f"✅ Clicks: {performance['clicks']}")
+        print(f"✅ Conversions: {performance['conversions']}")
+        print(f"✅ Revenue: ${performance['revenue']}")
+        print(f"✅ ROI: {performance['roi']}%")
+        print(f"✅ Performance Score: {insights['performanceScore']}")
+        print(f"✅ Recommendation: {insights['recommendation']}")
+        return ctx
+    
+    async def _stage_optimize(self, ctx: Dict[str, Any]) -> Dict[str, Any]:
+        """Step 5: AI Strategy Optimization"""
+        print(f"\n🔧 STEP 5: AI Strategy Optimization")
+        print("-" * 30)
+        
+        optimization_result = await self._call_tool("optimize-strategy", {
+            "deploymentId": ctx["deployment_id"],
+            "currentPerformance": ctx["performance_metrics"],
+            "optimizationGoal": "increase_roi"
+        })
+        
+        if not optimization_result.get("success"):
+            raise Exception("Strategy optimization failed")
+        
+        optimization = ctx["optimization"] = optimization_result["optimization"]
+        recommendation = ctx["recommendation"] = optimization_result["recommendation"]
+        print(f"✅ Optimization Action: {optimization['action']}")
+        print(f"✅ Budget Adjustment: ${optimization['budgetAdjustment']}")
+        print(f"✅ Platform Adjustment: {optimization['platformAdjustment']}")
+        print(f"✅ Expected Improvement: {recommendation['expectedImprovement']}")
+        print(f"✅ Timeline: {recommendation['timeline']}")
+        return ctx
+    
+    async def _complete_pipeline(self, ctx: Dict[str, Any]) -> Dict[str, Any]:
+        """Record a finished session and build its result"""
+        performance_metrics = ctx["performance_metrics"]
+        
+        # Update session stats
+        processing_time = (time.time() - ctx["start_time"]) * 1000
+        async with self._stats_lock:
             self.session_stats["successful_sessions"] += 1
             self.session_stats["total_roi_generated"] += performance_metrics["roi"]
             self.session_stats["leads_processed"] += 1
-            
-            print(f"\n🎯 AGENTIC PIPELINE COMPLETE")
-            print("=" * 60)
-            print(f"Processing Time: {processing_time:.0f}ms")
-            print(f"Success Rate: 100%")
-            print(f"ROI Generated: {performance_metrics['roi']}%")
-            print(f"Revenue: ${performance_metrics['revenue']}")
-            
-            return {
-                "success": True,
-                "sessionId": self.client.session_id,
-                "processingTime": processing_time,
-                "analysis": analysis,
-                "content": content,
-                "deployment": deployment,
-                "performance": performance,
-                "optimization": optimization,
-                "recommendation": recommendation
-            }
-            
-        except Exception as error:
-            print(f"❌ Agentic pipeline failed: {error}")
-            return {
-                "success": False,
-                "error": str(error),
-                "sessionId": self.client.session_id
-            }
+        
+        print(f"\n🎯 AGENTIC PIPELINE COMPLETE")
+        print("=" * 60)
+        print(f"Processing Time: {processing_time:.0f}ms")
+        print(f"Success Rate: 100%")
+        print(f"ROI Generated: {performance_metrics['roi']}%")
+        print(f"Revenue: ${performance_metrics['revenue']}")
+        
+        return {
+            "success": True,
+            "sessionId": self.client.session_id,
+            "processingTime": processing_time,
+            "analysis": ctx["analysis"],
+            "content": ctx["content"],
+            "deployment": ctx["deployment"],
+            "performance": ctx["performance"],
+            "optimization": ctx["optimization"],
+            "recommendation": ctx["recommendation"]
+        }
     
-    async def run_batch_optimization(self, leads: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Run batch optimization for multiple leads"""
+    def _fail_pipeline(self, error: BaseException) -> Dict[str, Any]:
+        """Build the result for a session that failed mid-pipeline"""
+        print(f"❌ Agentic pipeline failed: {error}")
+        return {
+            "success": False,
+            "error": str(error),
+            "sessionId": self.client.session_id
+        }
+    
+    async def run_batch_optimization(self, leads: List[Dict[str, Any]], max_concurrency: Optional[int] = None,
+                                     results_path: Optional[str] = None,
+                                     checkpoint_path: Optional[str] = None) -> Dict[str, Any]:
+        """Run batch optimization for multiple leads, up to `max_concurrency` at a time
+        
+        With `results_path`, each result is appended to that JSONL file as it
+        completes and is not kept in memory; the summary then carries the path
+        instead of a `results` list.
+        
+        With `checkpoint_path`, successful leads are journaled and a rerun
+        skips them, so only the remainder is sent through the MCP tools again.
+        """
         print(f"🏰 Running Batch Optimization for {len(leads)} leads")
         print("=" * 60)
         
-        results = []
-        total_roi = 0
-        successful_leads = 0
+        aggregates = BatchAggregates()
+        sink = JSONLResultSink(results_path) if results_path else None
+        results = [] if sink is None else None
+        journal = CheckpointJournal(checkpoint_path) if checkpoint_path else None
         
-        for i, lead in enumerate(leads, 1):
-            print(f"\n📋 Processing Lead {i}/{len(leads)}: {lead.get('name', 'Unknown')}")
-            result = await self.run_agentic_pipeline(lead)
-            results.append(result)
+        try:
+            if journal is not None:
+                # Completed leads count toward the summary without being rerun
+                resumed = 0
+                for index, lead in enumerate(leads, 1):
+                    lead_id = self._lead_unit_id(lead)
+                    if lead_id in journal:
+                        resumed += 1
+                        roi = journal.get(lead_id, {}).get("roi", 0)
+                        aggregates.add(True, roi)
+                        if results is not None:
+                            results.append((index, {"success": True, "resumed": True, "leadId": lead_id,
+                                                    "performance": {"roi": roi}}))
+                if resumed:
+                    print(f"♻️ Resuming: {resumed}/{len(leads)} leads already completed ({checkpoint_path})")
             
-            if result.get("success"):
-                successful_leads += 1
-                total_roi += result.get("performance", {}).get("roi", 0)
+            async for index, result in self.stream_batch_optimization(leads, max_concurrency, journal):
+                roi = result.get("performance", {}).get("roi", 0)
+                aggregates.add(result.get("success", False), roi)
+                if sink:
+                    sink.write({"index": index, "leadId": leads[index - 1].get("id"), **result})
+                else:
+                    results.append((index, result))
+                if journal is not None and result.get("success"):
+                    journal.record(self._lead_unit_id(leads[index - 1]), {"roi": roi})
+        finally:
+            if sink:
+                sink.close()
+            if journal is not None:
+                journal.close()
+        
+        if sink:
+            summary = self._summarize_batch(len(leads), aggregates)
+            summary["resultsPath"] = results_path
+            print(f"💾 Results: {results_path}")
+            return summary
+        
+        # Keep lead order so the summary matches the sequential run
+        results.sort(key=lambda item: item[0])
+        return self._summarize_batch(len(leads), aggregates, [result for _, result in results])
+    
+    @staticmethod
+    def _lead_unit_id(lead: Dict[str, Any]) -> str:
+        """Checkpoint key for a lead: its id, else a hash of its content
+        
+        Never the batch position, so editing or reordering the input between runs
+        cannot make a resume skip the wrong leads.
+        """
+        if lead.get("id"):
+            return str(lead["id"])
+        canonical = json.dumps(lead, sort_keys=True, default=str)
+        return f"lead_sha256_{hashlib.sha256(canonical.encode()).hexdigest()}"
+    
+    async def stream_batch_optimization(self, leads: List[Dict[str, Any]], max_concurrency: Optional[int] = None,
+                                        completed: Optional[Container[str]] = None
+                                        ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """Yield (1-based index, result) as leads finish; at most `max_concurrency` in flight
+        
+        Leads whose unit id is in `completed` are skipped.
+        """
+        limit = max_concurrency or self.max_concurrency
+        pending_leads = (
+            (i, lead) for i, lead in enumerate(leads, 1)
+            if completed is None or self._lead_unit_id(lead) not in completed
+        )
+        in_flight = set()
+        
+        async def process_lead(i: int, lead: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+            print(f"\n📋 Processing Lead {i}/{len(leads)}: {lead.get('name', 'Unknown')}")
+            return i, await self.run_agentic_pipeline(lead)
         
+        def refill():
+            # Tasks are created lazily so a huge batch never materializes all at once
+            while len(in_flight) < limit:
+                next_lead = next(pending_leads, None)
+                if next_lead is None:
+                    return
+                in_flight.add(asyncio.create_task(process_lead(*next_lead)))
+        
+        refill()
+        try:
+            while in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                in_flight.difference_update(done)
+                refill()
+                # Collect every finished task first, so one failure does not lose its siblings' results
+                results, error = [], None
+                for task in done:
+                    try:
+                        results.append(task.result())
+                    except Exception as e:
+                        error = error or e
+                for result in results:
+                    yield result
+                if error is not None:
+                    raise error
+        finally:
+            for task in in_flight:
+                task.cancel()
+            # Wait for the cancellations to land so no task (or the tool slot it holds) outlives the stream
+            await asyncio.gather(*in_flight, return_exceptions=True)
+    
+    async def run_staged_batch(self, leads: List[Dict[str, Any]], stage_workers: Optional[Dict[str, int]] = None,
+                               queue_size: Optional[int] = None) -> Dict[str, Any]:
+        """Run a batch as a staged pipeline: every tool stage has its own workers and bounded queue"""
+        print(f"🏰 Running Staged Batch Optimization for {len(leads)} leads")
+        print("=" * 60)
+        
+        stage_workers = stage_workers or {}
+        executor = StagedExecutor(
+            [
+                Stage(
+                    tool_name,
+                    getattr(self, handler),
+                    stage_workers.get(tool_name, self.tool_concurrency.get(tool_name, self.max_concurrency))
+                )
+                for tool_name, handler in self.PIPELINE_STAGES
+            ],
+            queue_size=queue_size or self.max_concurrency
+        )
+        
+        async def contexts():
+            for lead in leads:
+                yield await self._start_pipeline(lead)
+        
+        aggregates = BatchAggregates()
+        results = []
+        async for outcome in executor.stream(contexts()):
+            if outcome.success:
+                result = await self._complete_pipeline(outcome.value)
+            else:
+                result = self._fail_pipeline(outcome.error)
+            aggregates.add(result.get("success", False), result.get("performance", {}).get("roi", 0))
+            results.append((outcome.index, result))
+        results.sort(key=lambda item: item[0])
+        
+        summary = self._summarize_batch(len(leads), aggregates, [result for _, result in results])
+        summary["stageMetrics"] = executor.metrics_summary()
+        
+        print(f"\n⚙️ STAGE THROUGHPUT")
+        print("-" * 60)
+        for metrics in summary["stageMetrics"]:
+            print(f"{metrics['stage']:<22} workers={metrics['workers']:<3} "
+                  f"done={metrics['processed']:<5} failed={metrics['failed']:<4} "
+                  f"{metrics['throughput_per_sec']:.2f}/s util={metrics['utilization']:.0%} "
+                  f"blocked={metrics['blocked_seconds']:.1f}s")
+        
+        return summary
+    
+    def _summarize_batch(self, lead_count: int, aggregates: BatchAggregates,
+                         results: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Print the batch summary and build the batch result"""
         print(f"\n🏆 BATCH OPTIMIZATION COMPLETE")
         print("=" * 60)
-        print(f"Total Leads: {len(leads)}")
-        print(f"Successful: {successful_leads}")
-        print(f"Success Rate: {(successful_leads/len(leads)*100):.1f}%")
-        print(f"Total ROI Generated: {total_roi:.1f}%")
-        print(f"Average ROI per Lead: {(total_roi/successful_leads if successful_leads > 0 else 0):.1f}%")
+        print(f"Total Leads: {lead_count}")
+        print(f"Successful: {aggregates.successful}")
+        print(f"Success Rate: {(aggregates.successful/lead_count*100):.1f}%")
+        print(f"Total ROI Generated: {aggregates.total_roi:.1f}%")
+        print(f"Average ROI per Lead: {aggregates.average_roi:.1f}%")
         
-        return {
+        summary = {
             "success": True,
-            "totalLeads": len(leads),
-            "successfulLeads": successful_leads,
-            "successRate": (successful_leads/len(leads)*100),
-            "totalROI": total_roi,
-            "averageROI": (total_roi/successful_leads if successful_leads > 0 else 0),
-            "results": results
+            "totalLeads": lead_count,
+            "successfulLeads": aggregates.successful,
+            "successRate": (aggregates.successful/lead_count*100),
+            "totalROI": aggregates.total_roi,
+            "averageROI": aggregates.average_roi
         }
+        if results is not None:
+            summary["results"] = results
+        return summary
     
     def print_session_stats(self):
         """Print session statistics"""
@@ -403,17 +684,26 @@ async def main():
     
     # Initialize MCP agent
     agent = AdTopiaMCPAgent()
+    telemetry_path = telemetry.start_from_env()
     
     print("🔥 AdTopia MCP Agentic Intelligence System")
     print("🧠 AI Lieutenant for $600K ARR Scaling")
     print("=" * 60)
     
     # Run batch optimization
-    batch_result = await agent.run_batch_optimization(test_leads)
+    batch_result = await agent.run_batch_optimization(
+        test_leads,
+        results_path=os.getenv("MCP_AGENT_RESULTS_PATH"),
+        checkpoint_path=os.getenv("MCP_AGENT_CHECKPOINT_PATH")
+    )
     
     # Print final statistics
     agent.print_session_stats()
     
+    if telemetry_path:
+        telemetry.stop_periodic_dump(telemetry_path)
+        print(f"\n📈 Call telemetry: {telemetry_path}.json / {telemetry_path}.prom")
+    
     print(f"\n🎯 MCP AGENTIC SYSTEM DEPLOYED!")
     print("Ready for systematic $600K ARR domination! 🚀")
 
@@ -26,11 +26,12 @@ from gen_urgency import UrgencyGenerator
 from gen_value import ValueGenerator
 from gen_outreach import OutreachGenerator
 from niche_adapter import NicheAdapter
+from checkpoint_journal import CheckpointJournal
 
 class FullPipelineRunner:
     """Complete end-to-end automation pipeline runner"""
     
-    def __init__(self):
+    def __init__(self, checkpoint_path: Optional[str] = None):
         self.automation = AdTopiaAutomation()
         self.urgency_gen = UrgencyGenerator()
         self.value_gen = ValueGenerator()
@@ -53,6 +54,9 @@ class FullPipelineRunner:
         # Output directory
         self.output_dir = "./outputs"
         os.makedirs(self.output_dir, exist_ok=True)
+        
+        # Completed leads journal for resumable batch runs
+        self.checkpoint_path = checkpoint_path
     
     def run_full_pipeline(self, lead_json_path: str, target_niche: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -141,6 +145,52 @@ class FullPipelineRunner:
             'pipeline_stats': self.pipeline_stats
         }
     
+    def run_batch(self, lead_json_paths: List[str], target_niche: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Run the full pipeline over many lead files, resuming from the checkpoint journal
+        """
+        print(f"🏰 Running Full Pipeline Batch for {len(lead_json_paths)} leads")
+        print("=" * 60)
+        
+        journal = CheckpointJournal(self.checkpoint_path) if self.checkpoint_path else None
+        batch = {'processed': 0, 'resumed': 0, 'failed': 0, 'results': {}}
+        
+        try:
+            for i, lead_json_path in enumerate(lead_json_paths, 1):
+                unit_id = f"{lead_json_path}:{target_niche or ''}"
+                if journal is not None and unit_id in journal:
+                    batch['resumed'] += 1
+                    batch['results'][unit_id] = journal.get(unit_id)
+                    continue
+                
+                print(f"\n📋 Lead {i}/{len(lead_json_paths)}: {lead_json_path}")
+                result = self.run_full_pipeline(lead_json_path, target_niche)
+                if not result.get('success'):
+                    batch['failed'] += 1
+                    continue
+                
+                # Journal only what a rerun needs; prompts are already in the exported files
+                output = {
+                    'business_name': result['business_data'].get('name'),
+                    'monthly_roi': result['roi_data']['monthly_roi'],
+                    'files_created': result['export_result']['files_created']
+                }
+                batch['processed'] += 1
+                batch['results'][unit_id] = output
+                if journal is not None:
+                    journal.record(unit_id, output)
+        finally:
+            if journal is not None:
+                journal.close()
+        
+        print(f"\n🏆 BATCH COMPLETE")
+        print("=" * 60)
+        print(f"Processed: {batch['processed']}")
+        print(f"Resumed from checkpoint: {batch['resumed']}")
+        print(f"Failed: {batch['failed']}")
+        
+        return batch
+    
     def _generate_all_prompts(self, biz_data: Dict[str, Any]) -> Dict[str, str]:
         """Generate all prompt types"""
         prompts = {}
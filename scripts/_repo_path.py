@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+"""
+Repo Path Shim
+Makes the shared agent helpers at the repo root (agent_telemetry, result_sink,
+checkpoint_journal) importable from scripts; `import _repo_path` before importing them
+"""
+
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
@@ -7,13 +7,17 @@ Deploy your AI automation stack with Activepieces + MCP integration
 import asyncio
 import json
 import os
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 from dataclasses import dataclass, asdict
 import openai
 from supabase import create_client
 import httpx
 from datetime import datetime, timedelta
 
+import _repo_path  # noqa: F401  (puts the repo root on sys.path)
+from agent_telemetry import telemetry
+from result_sink import BatchAggregates, JSONLResultSink
+
 @dataclass
 class LeadOptimization:
     lead_id: str
@@ -42,6 +46,26 @@ class AdTopiaAgenticSequence:
         self.learning_cache = {}
         self.performance_history = []
     
+    async def _chat_completion(self, endpoint: str, **kwargs):
+        """OpenAI chat completion with latency/token telemetry"""
+        with telemetry.track("openai", endpoint) as call:
+            response = await self.openai_client.chat.completions.create(**kwargs)
+            call.add_usage(getattr(response, "usage", None), kwargs.get("model"))
+        return response
+    
+    async def _post_mcp(self, path: str, payload: Dict, provider: str = "mcp_server") -> httpx.Response:
+        """POST to the MCP server with latency/error telemetry"""
+        with telemetry.track(provider, path) as call:
+            async with httpx.AsyncClient() as client:
+                response = await client.post(f"{self.mcp_server_url}{path}", json=payload)
+            call.error = response.status_code != 200
+        return response
+    
+    def _execute_supabase(self, query, table: str, operation: str):
+        """Execute a Supabase query builder with latency/error telemetry"""
+        with telemetry.track("supabase", f"{table}.{operation}"):
+            return query.execute()
+    
     async def process_lead_agentically(self, lead_data: Dict) -> LeadOptimization:
         """AI analyzes lead and determines optimal strategy"""
         
@@ -68,7 +92,8 @@ class AdTopiaAgenticSequence:
         """
         
         try:
-            analysis = await self.openai_client.chat.completions.create(
+            analysis = await self._chat_completion(
+                "chat.completions:optimize_lead",
                 model="gpt-4-turbo",
                 messages=[{"role": "user", "content": context_prompt}],
                 functions=[
@@ -222,42 +247,40 @@ class AdTopiaAgenticSequence:
         """Generate urgency-focused ad content"""
         
         # Call MCP server for content generation
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.mcp_server_url}/api/generate-content",
-                json={
-                    "niche": optimization.niche,
-                    "urgencyLevel": "high" if optimization.urgency_score > 7 else "medium",
-                    "valueProposition": optimization.value_proposition,
-                    "location": optimization.location,
-                    "optimization": asdict(optimization)
-                }
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                raise Exception(f"Content generation failed: {response.status_code}")
+        response = await self._post_mcp(
+            "/api/generate-content",
+            {
+                "niche": optimization.niche,
+                "urgencyLevel": "high" if optimization.urgency_score > 7 else "medium",
+                "valueProposition": optimization.value_proposition,
+                "location": optimization.location,
+                "optimization": asdict(optimization)
+            }
+        )
+        
+        if response.status_code == 200:
+            return response.json()
+        else:
+            raise Exception(f"Content generation failed: {response.status_code}")
     
     async def generate_value_content(self, optimization: LeadOptimization) -> Dict:
         """Generate value-focused ad content"""
         
         # Call MCP server for value content generation
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.mcp_server_url}/api/generate-value-content",
-                json={
-                    "niche": optimization.niche,
-                    "valueProposition": optimization.value_proposition,
-                    "location": optimization.location,
-                    "optimization": asdict(optimization)
-                }
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                raise Exception(f"Value content generation failed: {response.status_code}")
+        response = await self._post_mcp(
+            "/api/generate-value-content",
+            {
+                "niche": optimization.niche,
+                "valueProposition": optimization.value_proposition,
+                "location": optimization.location,
+                "optimization": asdict(optimization)
+            }
+        )
+        
+        if response.status_code == 200:
+            return response.json()
+        else:
+            raise Exception(f"Value content generation failed: {response.status_code}")
     
     async def deploy_to_gamma(self, content: Dict, variant: str = "A") -> Dict:
         """Deploy content to Gamma platform"""
@@ -265,22 +288,22 @@ class AdTopiaAgenticSequence:
         print(f"🎨 Deploying to Gamma platform (variant {variant})")
         
         # Call MCP server for Gamma deployment
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.mcp_server_url}/api/deploy-gamma",
-                json={
-                    "content": content,
-                    "variant": variant,
-                    "apiKey": self.gamma_api_key
-                }
-            )
-            
-            if response.status_code == 200:
-                deployment = response.json()
-                print(f"✅ Gamma deployment successful - URL: {deployment.get('url', 'N/A')}")
-                return deployment
-            else:
-                raise Exception(f"Gamma deployment failed: {response.status_code}")
+        response = await self._post_mcp(
+            "/api/deploy-gamma",
+            {
+                "content": content,
+                "variant": variant,
+                "apiKey": self.gamma_api_key
+            },
+            provider="gamma"
+        )
+        
+        if response.status_code == 200:
+            deployment = response.json()
+            print(f"✅ Gamma deployment successful - URL: {deployment.get('url', 'N/A')}")
+            return deployment
+        else:
+            raise Exception(f"Gamma deployment failed: {response.status_code}")
     
     async def track_deployment(self, optimization: LeadOptimization, deployment: Dict, sequence_type: str):
         """Track deployment in Supabase for learning"""
@@ -295,7 +318,7 @@ class AdTopiaAgenticSequence:
         }
         
         try:
-            result = self.supabase.table("mcp_agent_sessions").insert(tracking_data).execute()
+            result = self._execute_supabase(self.supabase.table("mcp_agent_sessions").insert(tracking_data), "mcp_agent_sessions", "insert")
             print(f"📊 Deployment tracked in Supabase")
         except Exception as error:
             print(f"❌ Failed to track deployment: {error}")
@@ -317,7 +340,7 @@ class AdTopiaAgenticSequence:
         }
         
         try:
-            self.supabase.table("follow_up_tasks").insert(follow_up_data).execute()
+            self._execute_supabase(self.supabase.table("follow_up_tasks").insert(follow_up_data), "follow_up_tasks", "insert")
             print(f"✅ Follow-up scheduled")
         except Exception as error:
             print(f"❌ Failed to schedule follow-up: {error}")
@@ -338,7 +361,7 @@ class AdTopiaAgenticSequence:
         }
         
         try:
-            self.supabase.table("ab_analysis_tasks").insert(analysis_data).execute()
+            self._execute_supabase(self.supabase.table("ab_analysis_tasks").insert(analysis_data), "ab_analysis_tasks", "insert")
             print(f"✅ A/B analysis scheduled")
         except Exception as error:
             print(f"❌ Failed to schedule A/B analysis: {error}")
@@ -372,7 +395,8 @@ class AdTopiaAgenticSequence:
         """
         
         try:
-            learning_update = await self.openai_client.chat.completions.create(
+            learning_update = await self._chat_completion(
+                "chat.completions:learning",
                 model="gpt-4-turbo",
                 messages=[{"role": "user", "content": learning_prompt}]
             )
@@ -389,7 +413,7 @@ class AdTopiaAgenticSequence:
         """Get historical performance data for niche"""
         
         try:
-            result = self.supabase.table("performance_metrics").select("*").eq("niche", niche).limit(10).execute()
+            result = self._execute_supabase(self.supabase.table("performance_metrics").select("*").eq("niche", niche).limit(10), "performance_metrics", "select")
             return result.data or []
         except Exception:
             return []
@@ -410,7 +434,7 @@ class AdTopiaAgenticSequence:
         """Get deployment performance data"""
         
         try:
-            result = self.supabase.table("performance_metrics").select("*").eq("deployment_id", deployment_id).execute()
+            result = self._execute_supabase(self.supabase.table("performance_metrics").select("*").eq("deployment_id", deployment_id), "performance_metrics", "select")
             return result.data[0] if result.data else None
         except Exception:
             return None
@@ -426,7 +450,7 @@ class AdTopiaAgenticSequence:
         }
         
         try:
-            self.supabase.table("ai_knowledge_base").insert(knowledge_data).execute()
+            self._execute_supabase(self.supabase.table("ai_knowledge_base").insert(knowledge_data), "ai_knowledge_base", "insert")
         except Exception as error:
             print(f"❌ Failed to update knowledge base: {error}")
     
@@ -487,7 +511,7 @@ class AdTopiaAgenticSequence:
         }
         
         try:
-            self.supabase.table("manual_review_queue").insert(review_data).execute()
+            self._execute_supabase(self.supabase.table("manual_review_queue").insert(review_data), "manual_review_queue", "insert")
             print(f"✅ Lead flagged for manual review")
         except Exception as error:
             print(f"❌ Failed to flag for review: {error}")
@@ -529,14 +553,10 @@ async def rodrigo_success_replication():
     
     return optimization
 
-async def batch_agentic_processing(leads: List[Dict]):
-    """Process multiple leads with agentic AI optimization"""
+async def stream_agentic_processing(leads: List[Dict]) -> AsyncIterator[Dict]:
+    """Yield one result per lead as soon as it is processed"""
     
     agent = AdTopiaAgenticSequence()
-    results = []
-    
-    print(f"🏰 Processing {len(leads)} leads with agentic AI")
-    print("=" * 60)
     
     for i, lead in enumerate(leads, 1):
         print(f"\n📋 Processing Lead {i}/{len(leads)}: {lead.get('name', 'Unknown')}")
@@ -544,25 +564,57 @@ async def batch_agentic_processing(leads: List[Dict]):
         try:
             optimization = await agent.process_lead_agentically(lead)
             await agent.execute_optimization_sequence(optimization)
-            results.append({"lead": lead, "optimization": optimization, "success": True})
+            yield {"lead": lead, "optimization": optimization, "success": True}
         except Exception as error:
             print(f"❌ Failed to process lead {lead.get('id', 'unknown')}: {error}")
-            results.append({"lead": lead, "error": str(error), "success": False})
+            yield {"lead": lead, "error": str(error), "success": False}
+
+async def batch_agentic_processing(leads: List[Dict], results_path: Optional[str] = None,
+                                   aggregates: Optional[BatchAggregates] = None) -> List[Dict]:
+    """Process multiple leads with agentic AI optimization
     
-    # Summary
-    successful = sum(1 for r in results if r["success"])
-    total_roi = sum(r["optimization"].expected_roi for r in results if r["success"])
+    Returns the result list. With `results_path` each result is streamed to
+    that JSONL file instead of being kept, and the returned list is empty;
+    pass `aggregates` to read the running totals either way.
+    """
     
+    aggregates = aggregates if aggregates is not None else BatchAggregates()
+    sink = JSONLResultSink(results_path) if results_path else None
+    results = []
+    
+    print(f"🏰 Processing {len(leads)} leads with agentic AI")
+    print("=" * 60)
+    
+    try:
+        async for result in stream_agentic_processing(leads):
+            aggregates.add(result["success"], result["optimization"].expected_roi if result["success"] else 0)
+            if sink:
+                record = dict(result)
+                if result["success"]:
+                    record["optimization"] = asdict(result["optimization"])
+                sink.write(record)
+            else:
+                results.append(result)
+    finally:
+        if sink:
+            sink.close()
+    
+    # Summary
     print(f"\n🏆 BATCH PROCESSING COMPLETE")
     print("=" * 60)
     print(f"Total Leads: {len(leads)}")
-    print(f"Successful: {successful}")
-    print(f"Success Rate: {(successful/len(leads)*100):.1f}%")
-    print(f"Total Expected ROI: {total_roi:.1f}%")
-    print(f"Average ROI per Lead: {(total_roi/successful if successful > 0 else 0):.1f}%")
+    print(f"Successful: {aggregates.successful}")
+    print(f"Success Rate: {aggregates.success_rate:.1f}%")
+    print(f"Total Expected ROI: {aggregates.total_roi:.1f}%")
+    print(f"Average ROI per Lead: {aggregates.average_roi:.1f}%")
     
+    if sink:
+        print(f"💾 Results: {results_path} ({sink.records_written} records)")
     return results
 
 if __name__ == "__main__":
     # Test the agentic sequence
+    telemetry_path = telemetry.start_from_env()
     asyncio.run(rodrigo_success_replication())
+    if telemetry_path:
+        telemetry.stop_periodic_dump(telemetry_path)
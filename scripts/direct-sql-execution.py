@@ -7,9 +7,11 @@ Execute SQL fixes directly via Supabase connection
 
 import os
 import sys
-import requests
 import json
 from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "supabase-purge"))
+from sql_statements import plan_sql
+from sql_executor import SqlExecutor
 
 def execute_supabase_fixes():
     """Execute Supabase security and performance fixes"""
@@ -40,49 +42,41 @@ def execute_supabase_fixes():
     with open(sql_file, 'r') as f:
         sql_content = f.read()
     
-    # Split SQL into individual statements
-    sql_statements = [stmt.strip() for stmt in sql_content.split(';') if stmt.strip()]
+    # Split on real statement boundaries ($$ bodies, literals and comments stay intact)
+    # and pack consecutive statements into as few round trips as is safe
+    batches = plan_sql(sql_content)
+    statement_count = sum(len(batch) for batch in batches)
     
-    print(f"🔧 Executing {len(sql_statements)} SQL statements...")
+    print(f"🔧 Executing {statement_count} SQL statements in {len(batches)} round trips...")
     
-    # Execute each SQL statement
+    # Execute each batch; counts below are in statements
     success_count = 0
     error_count = 0
     
-    for i, statement in enumerate(sql_statements, 1):
-        if not statement or statement.startswith('--'):
-            continue
+    # One pooled keep-alive session for every round trip, with timeouts and retries
+    with SqlExecutor(SUPABASE_URL, service_role_key) as executor:
+        for i, batch in enumerate(batches, 1):
+            label = "isolated" if batch.isolated else f"{len(batch)} statements"
+            print(f"📝 Executing batch {i}/{len(batches)} ({label})...")
             
-        print(f"📝 Executing statement {i}/{len(sql_statements)}...")
-        
-        try:
-            # Use the REST API to execute SQL
-            response = requests.post(
-                f"{SUPABASE_URL}/rest/v1/rpc/exec_sql",
-                headers={
-                    "Authorization": f"Bearer {service_role_key}",
-                    "Content-Type": "application/json",
-                    "apikey": service_role_key
-                },
-                json={"sql": statement}
-            )
+            result = executor.execute(batch)
             
-            if response.status_code == 200:
-                print(f"✅ Statement {i} executed successfully")
-                success_count += 1
+            if result.ok:
+                print(f"✅ Batch {i} executed successfully ({result.latency_ms:.0f} ms)")
+                success_count += len(batch)
+            elif result.status_code is None:
+                print(f"❌ Batch {i} error: {result.text}")
+                error_count += len(batch)
             else:
-                print(f"❌ Statement {i} failed: {response.status_code} - {response.text}")
-                error_count += 1
-                
-        except Exception as e:
-            print(f"❌ Statement {i} error: {str(e)}")
-            error_count += 1
+                print(f"❌ Batch {i} failed: {result.status_code} - {result.text}")
+                error_count += len(batch)
     
     # Summary
     print(f"\n📊 EXECUTION SUMMARY:")
     print(f"✅ Successful: {success_count}")
     print(f"❌ Failed: {error_count}")
-    print(f"📋 Total: {len(sql_statements)}")
+    print(f"📋 Total: {statement_count}")
+    executor.print_summary()
     
     if error_count == 0:
         print("\n🎉 ALL SUPABASE SECURITY & PERFORMANCE FIXES COMPLETED!")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Gamma Migration Benchmark
+Description: Run GammaMigrator against local stand-ins and report URLs/minute, bytes/second and per-stage latency
+Author: omniumai357
+Date: 2025-10-09
+
+Run: python benchmark-migration.py --sizes 10,100,1000 --workers 16 --rate-limit-rate 0.01
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from migration_standins import MigrationStandIns, add_standin_args, config_from_args
+from rate_limiter import AdaptiveTokenBucket
+
+# Synthetic URL stems that spread runs across the migrator's niche/CTA/language branches
+URL_STEMS = [
+    'stress-free-plumbing', 'coolfix-emergency-hvac', 'trusted-family-movers', 'mudanzas-servicio',
+    'pro-paint-contractor', 'sparkle-maid-cleaning', 'weekend-tamale-sale', 'main-street-bakery'
+]
+
+
+def synthetic_urls(count: int) -> List[str]:
+    return [f"https://{URL_STEMS[i % len(URL_STEMS)]}-{i:05d}.gamma.site/" for i in range(count)]
+
+
+def load_migrator_module():
+    spec = importlib.util.spec_from_file_location(
+        'migrate_to_supabase', Path(__file__).resolve().parent / 'migrate-to-supabase.py'
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_size(module, standins: MigrationStandIns, size: int, args: argparse.Namespace) -> Dict:
+    standins.state.reset()
+    migrator = module.GammaMigrator(workers=args.workers)
+    # Benchmarks measure the pipeline, not the production ramp-up from 1 req/s
+    migrator.rate_limiter = AdaptiveTokenBucket(rate=args.rps, burst=args.workers, max_rate=args.rps)
+
+    started = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        migrator.run_migration(synthetic_urls(size))
+    elapsed = time.perf_counter() - started
+
+    server = standins.state.snapshot()
+    log = migrator.migration_log
+    return {
+        'urls': size,
+        'successful': log['successful'],
+        'failed': log['failed'],
+        'seconds': round(elapsed, 2),
+        'urls_per_minute': round(log['successful'] / elapsed * 60, 1),
+        'download_bytes_per_sec': round(server['bytes_served'] / elapsed),
+        'upload_bytes_per_sec': round(server['bytes_uploaded'] / elapsed),
+        'stage_summary': log['stage_summary'],
+        'stage_graph': log['stages'],
+        'server': server,
+        'rate_limiter': log['rate_limiter'],
+        'dedupe': log['dedupe']
+    }
+
+
+def print_report(result: Dict):
+    print(f"\n📈 {result['urls']} URLs in {result['seconds']}s: {result['urls_per_minute']} URLs/min "
+          f"({result['successful']} ok, {result['failed']} failed)")
+    print(f"   ⬇️ {result['download_bytes_per_sec'] / 1e6:.2f} MB/s downloaded | "
+          f"⬆️ {result['upload_bytes_per_sec'] / 1e6:.2f} MB/s uploaded | "
+          f"429s: {result['server']['rate_limited']} | 5xx: {result['server']['server_errors']}")
+    summary = result['stage_summary']
+    print(f"   🔁 Retries: {summary['retries']} | Peak RSS: {summary['peak_rss_mb']} MB")
+    print(f"   {'stage':<14} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for stage, s in summary['stages_ms'].items():
+        print(f"   {stage:<14} {s['count']:>7} {s['p50']:>10} {s['p95']:>10} {s['p99']:>10} {s['max']:>10}")
+    # Time a stage spent blocked handing work downstream points at the stage to scale next
+    print("   ⏸️ Blocked on downstream: " + ', '.join(
+        f"{stage} {s['blocked_seconds']:.1f}s" for stage, s in result['stage_graph'].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark GammaMigrator against local stand-ins')
+    parser.add_argument('--sizes', default='10,100,1000', help='Comma-separated URL counts (10 to 10000)')
+    parser.add_argument('--workers', type=int, default=16, help='URL workers (GAMMA_MIGRATION_WORKERS)')
+    parser.add_argument('--rps', type=float, default=100.0, help='Gamma request-rate ceiling for the run')
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    parser.add_argument('--verbose', action='store_true', help='Keep migrator logging on')
+    add_standin_args(parser)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    output = os.path.abspath(args.output) if args.output else None
+
+    standins = MigrationStandIns(config_from_args(args)).start()
+    print(f"🧪 Stand-ins on {standins.url} ({len(standins.state.cards)} distinct cards)")
+    os.environ.update(standins.environment())
+    os.environ['GAMMA_MIGRATION_WORKERS'] = str(args.workers)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='gamma-bench-') as workdir:
+        # The migrator writes migration.log, migration-log.json and fallbacks to its cwd
+        previous_cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            module = load_migrator_module()
+            if not args.verbose:
+                logging.disable(logging.CRITICAL)
+            for size in sizes:
+                print(f"\n🚀 Migrating {size} synthetic URLs...")
+                result = run_size(module, standins, size, args)
+                print_report(result)
+                results.append(result)
+        finally:
+            logging.disable(logging.NOTSET)
+            os.chdir(previous_cwd)
+            standins.stop()
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+        print(f"\n💾 Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Gamma Card Content Index
+Description: Content-addressed hash -> storage_path index so identical cards are uploaded once
+Author: omniumai357
+Date: 2025-10-09
+"""
+
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+
+# The repo-root helper is reachable via scripts/_repo_path, which migrate-to-supabase imports first
+from checkpoint_journal import CheckpointJournal
+
+
+def content_hash(png_data: bytes) -> str:
+    return hashlib.sha256(png_data).hexdigest()
+
+
+class ContentIndex:
+    """Maps card content hashes to the storage object that already holds them.
+
+    Known hashes come from a local journal (survives reruns) and from
+    gamma_gallery.content_hash (shared across machines). Concurrent workers
+    that hit the same new hash wait for the first upload instead of racing it.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self._journal = CheckpointJournal(path) if path else None
+        self._paths: Dict[str, str] = dict(self._journal.completed) if self._journal is not None else {}
+        self._hashes: Dict[str, str] = {storage_path: digest for digest, storage_path in self._paths.items()}
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {'unique': 0, 'duplicates': 0, 'bytes_saved': 0}
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def add(self, digest: str, storage_path: str, persist: bool = True):
+        """Register an object that already exists in storage."""
+        with self._lock:
+            self._index(digest, storage_path, persist)
+
+    def _index(self, digest: str, storage_path: str, persist: bool):
+        # Caller holds the lock
+        if digest in self._paths:
+            return
+        self._paths[digest] = storage_path
+        self._hashes[storage_path] = digest
+        if persist and self._journal is not None:
+            self._journal.record(digest, storage_path)
+
+    def hash_of(self, storage_path: str) -> Optional[str]:
+        with self._lock:
+            return self._hashes.get(storage_path)
+
+    def resolve(self, png_data: bytes, store: Callable[[], Tuple[str, bool]]) -> Tuple[str, bool]:
+        """Return (storage_path, deduplicated).
+
+        `store` uploads the card and returns (storage_path, landed_in_storage); it only
+        runs when no stored object has the same content.
+        """
+        digest = content_hash(png_data)
+        with self._lock:
+            existing = self._paths.get(digest)
+            waiting_on = None if existing else self._in_flight.get(digest)
+            if existing is None and waiting_on is None:
+                owner = self._in_flight[digest] = Future()
+
+        if existing is None and waiting_on is not None:
+            existing = waiting_on.result()
+
+        if existing is not None:
+            with self._lock:
+                self.stats['duplicates'] += 1
+                self.stats['bytes_saved'] += len(png_data)
+            return existing, True
+
+        if waiting_on is not None:
+            # The first upload of this content fell back to a local file; store our own copy
+            storage_path, _ = store()
+            with self._lock:
+                self._hashes[storage_path] = digest
+            return storage_path, False
+
+        try:
+            storage_path, landed = store()
+        except BaseException:
+            with self._lock:
+                self._in_flight.pop(digest, None)
+            owner.set_result(None)
+            raise
+
+        with self._lock:
+            # Index before leaving in-flight so no other worker can miss both and re-upload
+            self.stats['unique'] += 1
+            self._hashes[storage_path] = digest
+            if landed:
+                self._index(digest, storage_path, persist=True)
+            self._in_flight.pop(digest, None)
+        owner.set_result(storage_path if landed else None)
+        return storage_path, False
+
+    def flush(self):
+        """fsync newly indexed hashes."""
+        if self._journal is not None:
+            self._journal.sync()
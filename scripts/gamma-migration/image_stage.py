@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Gamma Card Image Stage
+Description: Normalize card PNGs to 1080x1080 and render gallery derivatives in a process pool, from a single decode
+Author: omniumai357
+Date: 2025-10-09
+
+Derivatives are opt-in. Without them, a PNG whose IHDR header already reads 1080x1080 is
+never decoded. With them, every card has to be decoded to render its derivatives, but an
+already-sized original is still uploaded byte-for-byte instead of being re-encoded
+(counted as 'passthrough').
+"""
+
+import io
+import os
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+from PIL import Image
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+TARGET_SIZE = (1080, 1080)
+# Worker-side steps timed per decoded card
+TIMED_STEPS = ('decode_ms', 'resize_ms', 'encode_ms', 'derivatives_ms')
+
+
+@dataclass(frozen=True)
+class DerivativeSpec:
+    """One extra rendition of each card: square edge in pixels plus output format."""
+    name: str
+    size: int
+    format: str = 'WEBP'
+    quality: int = 82
+
+    @property
+    def extension(self) -> str:
+        return self.format.lower()
+
+    @property
+    def content_type(self) -> str:
+        return f"image/{self.extension}"
+
+
+# Grid thumbnail, half-size card, and a full-size WebP for browsers that accept it
+DEFAULT_DERIVATIVES: Tuple[DerivativeSpec, ...] = (
+    DerivativeSpec('thumb', 270),
+    DerivativeSpec('540', 540),
+    DerivativeSpec('webp', 1080),
+)
+
+
+def parse_derivatives(spec: str) -> Tuple[DerivativeSpec, ...]:
+    """Parse 'name:size:format,...' (e.g. 'thumb:270:webp,540:540:png'); empty string disables derivatives."""
+    derivatives = []
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, size, *fmt = item.split(':')
+        derivatives.append(DerivativeSpec(name, int(size), (fmt[0] if fmt else 'webp').upper()))
+    return tuple(derivatives)
+
+
+@dataclass
+class ProcessedCard:
+    """A normalized 1080x1080 PNG plus its encoded derivatives, keyed by spec name."""
+    png: bytes
+    derivatives: Dict[str, bytes] = field(default_factory=dict)
+
+
+def png_dimensions(png_data: bytes) -> Optional[Tuple[int, int]]:
+    """Read (width, height) from the IHDR chunk without decoding; None if not a PNG."""
+    # Signature (8) + chunk length (4) + b'IHDR' (4) + width (4) + height (4)
+    if len(png_data) < 24 or not png_data.startswith(PNG_SIGNATURE) or png_data[12:16] != b'IHDR':
+        return None
+    return struct.unpack('>II', png_data[16:24])
+
+
+def process_card(png_data: bytes, size: Tuple[int, int] = TARGET_SIZE,
+                 derivatives: Sequence[DerivativeSpec] = ()) -> Tuple[ProcessedCard, Dict[str, float]]:
+    """Decode once, normalize to `size`, and encode every derivative from the same pixels.
+
+    Module-level so it can run in a worker process.
+    """
+    start = time.perf_counter()
+    img = Image.open(io.BytesIO(png_data))
+    img.load()
+    decoded = time.perf_counter()
+
+    needs_resize = img.size != size
+    if needs_resize:
+        img = img.resize(size, Image.Resampling.LANCZOS)
+    resized = time.perf_counter()
+
+    if needs_resize:
+        output = io.BytesIO()
+        img.save(output, format='PNG', optimize=True)
+        png_data = output.getvalue()
+    encoded = time.perf_counter()
+
+    rendered = {}
+    for spec in derivatives:
+        variant = img if img.size == (spec.size, spec.size) else img.resize((spec.size, spec.size), Image.Resampling.LANCZOS)
+        if spec.format == 'WEBP' and variant.mode not in ('RGB', 'RGBA'):
+            variant = variant.convert('RGBA')
+        output = io.BytesIO()
+        variant.save(output, format=spec.format, quality=spec.quality, optimize=True)
+        rendered[spec.name] = output.getvalue()
+    derived = time.perf_counter()
+
+    return ProcessedCard(png_data, rendered), {
+        'passthrough': not needs_resize,
+        'decode_ms': (decoded - start) * 1000,
+        'resize_ms': (resized - decoded) * 1000,
+        'encode_ms': (encoded - resized) * 1000,
+        'derivatives_ms': (derived - encoded) * 1000
+    }
+
+
+class ImageStage:
+    """Shared image normalization stage; thread-safe, one process pool for all migration workers."""
+
+    def __init__(self, size: Tuple[int, int] = TARGET_SIZE, workers: Optional[int] = None,
+                 derivatives: Sequence[DerivativeSpec] = (),
+                 on_timings: Optional[Callable[[str, Dict[str, float]], None]] = None):
+        self.size = size
+        self.derivatives = tuple(derivatives)
+        self.workers = workers or os.cpu_count() or 1
+        # Called with (trace_id, timings) for every card, e.g. to attribute work to a URL
+        self.on_timings = on_timings
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Running sums over decoded cards, so memory stays flat however many cards pass through
+        self.step_totals_ms: Dict[str, float] = dict.fromkeys(TIMED_STEPS, 0.0)
+        self.stats = {'images': 0, 'fast_path': 0, 'decoded': 0, 'passthrough': 0, 'failed': 0}
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def submit(self, png_data: bytes, trace_id: str = '-') -> 'Future[ProcessedCard]':
+        """Start processing one PNG; already-sized PNGs skip decoding unless derivatives need the pixels."""
+        start = time.perf_counter()
+        dimensions = png_dimensions(png_data)
+        if dimensions == self.size and not self.derivatives:
+            self._record({'header_ms': (time.perf_counter() - start) * 1000, 'fast_path': True, 'passthrough': True},
+                         trace_id)
+            done: 'Future[ProcessedCard]' = Future()
+            done.set_result(ProcessedCard(png_data))
+            return done
+
+        result: 'Future[ProcessedCard]' = Future()
+
+        def _finish(work: Future):
+            try:
+                card, timings = work.result()
+            except Exception as e:
+                with self._lock:
+                    self.stats['failed'] += 1
+                result.set_exception(e)
+                return
+            self._record({**timings, 'fast_path': False}, trace_id)
+            result.set_result(card)
+
+        self._get_pool().submit(process_card, png_data, self.size, self.derivatives).add_done_callback(_finish)
+        return result
+
+    def map(self, png_stream: Iterable[bytes], lookahead: Optional[int] = None,
+            trace_id: str = '-') -> Iterator[ProcessedCard]:
+        """Process a stream of PNGs in order, keeping up to `lookahead` of them in the pool."""
+        lookahead = lookahead or self.workers
+        pending: deque = deque()
+        for png_data in png_stream:
+            pending.append(self.submit(png_data, trace_id))
+            if len(pending) >= lookahead:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def _record(self, timings: Dict[str, float], trace_id: str):
+        with self._lock:
+            self.stats['images'] += 1
+            self.stats['fast_path' if timings['fast_path'] else 'decoded'] += 1
+            if timings['fast_path'] or timings['passthrough']:
+                self.stats['passthrough'] += 1
+            if not timings['fast_path']:
+                for step in TIMED_STEPS:
+                    self.step_totals_ms[step] += timings[step]
+        if self.on_timings:
+            self.on_timings(trace_id, timings)
+
+    def summary(self) -> Dict[str, float]:
+        """Totals plus average decode/resize/encode/derivative milliseconds for images that needed work."""
+        with self._lock:
+            summary = dict(self.stats)
+            totals = dict(self.step_totals_ms)
+        summary['derivatives'] = [spec.name for spec in self.derivatives]
+        worked = summary['decoded']
+        for step in TIMED_STEPS:
+            summary[f'avg_{step}'] = round(totals[step] / worked, 2) if worked else 0.0
+        return summary
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown()
@@ -13,12 +13,28 @@ import requests
 import zipfile
 import io
 import logging
+import random
+import tempfile
 import uuid
+import sys
+import threading
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from dotenv import load_dotenv
 from supabase import create_client, Client
-from PIL import Image
+
+# Sibling migration modules, plus scripts/_repo_path for the shared agent helpers at the repo root
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import _repo_path  # noqa: F401
+from checkpoint_journal import CheckpointJournal
+from content_index import ContentIndex
+from image_stage import DEFAULT_DERIVATIVES, ImageStage, parse_derivatives
+from rate_limiter import AdaptiveTokenBucket
+from stage_graph import OUTPUT, StageGraph
+from telemetry import MigrationTelemetry
 
 # Enhanced logging setup
 logging.basicConfig(
@@ -34,12 +50,44 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+
+@dataclass
+class _UrlJob:
+    """One URL moving through the stage graph; card and upload counts decide when it reaches metadata."""
+    url: str
+    trace_id: str
+    started: float = 0.0
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    zip_url: Optional[str] = None
+    # card index -> {'png': (path, deduplicated), <derivative name>: path}
+    cards: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    pending: int = 0  # extracted cards not yet split into uploads, plus uploads not yet finished
+    extracted: bool = False
+    handed_off: bool = False
+    error: Optional[str] = None
+    success: bool = False
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def settle(self, delta: int = 0, extracted: bool = False) -> bool:
+        """Adjust outstanding work; True exactly once, when every card is stored."""
+        with self.lock:
+            self.pending += delta
+            self.extracted = self.extracted or extracted
+            if self.extracted and self.pending == 0 and not self.handed_off:
+                self.handed_off = True
+                return True
+            return False
+
+
 class GammaMigrator:
-    def __init__(self):
+    def __init__(self, checkpoint_path: Optional[str] = None, workers: Optional[int] = None,
+                 content_index_path: Optional[str] = None):
         """Initialize the Gamma migrator with API keys and clients."""
         self.supabase_url = os.getenv('SUPABASE_URL')
         self.supabase_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
         self.gamma_api_key = os.getenv('GAMMA_API_KEY')
+        # Overridable so benchmarks can point the migrator at migration_standins.py
+        self.gamma_api_url = os.getenv('GAMMA_API_URL', 'https://api.gamma.app/v1/generations')
         
         if not all([self.supabase_url, self.supabase_key, self.gamma_api_key]):
             raise ValueError("Missing required environment variables. Check SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY, and GAMMA_API_KEY")
@@ -57,6 +105,7 @@ class GammaMigrator:
             'started_at': datetime.now().isoformat(),
             'total_urls': 0,
             'processed': 0,
+            'resumed': 0,
             'successful': 0,
             'failed': 0,
             'errors': [],
@@ -66,11 +115,55 @@ class GammaMigrator:
         }
         
         # Enhanced rate limiting and retry configuration
-        self.api_delay = 1  # seconds between API calls (reduced for efficiency)
-        self.batch_size = 10
+        self.api_delay = 1  # initial seconds between API calls; the rate limiter adapts from here
         self.max_retries = 3
         self.retry_delays = [2, 4, 8]  # Exponential backoff
         
+        # Journal of migrated URLs; reruns skip them instead of paying for a new generation
+        self.checkpoint_path = checkpoint_path
+        
+        # Gamma API workers share one adaptive limiter: it starts at 1/api_delay
+        # requests per second, creeps up while Gamma accepts calls and backs off on 429s
+        self.workers = workers or int(os.getenv('GAMMA_MIGRATION_WORKERS', '4'))
+        self.rate_limiter = AdaptiveTokenBucket(
+            rate=1 / self.api_delay,
+            burst=self.workers,
+            max_rate=float(os.getenv('GAMMA_MAX_RPS', '10'))
+        )
+        self._log_lock = threading.Lock()
+        
+        # Per-URL stage timings, bytes, retries and peak RSS keyed by trace_id
+        self.telemetry = MigrationTelemetry()
+        
+        # ZIP archives are streamed to a spooled temp file: up to zip_spool_bytes stay in
+        # memory, larger archives roll over to disk, anything over zip_max_bytes is refused
+        self.zip_spool_bytes = int(float(os.getenv('GAMMA_ZIP_SPOOL_MB', '8')) * 1024 * 1024)
+        self.zip_max_bytes = int(float(os.getenv('GAMMA_ZIP_MAX_MB', '512')) * 1024 * 1024)
+        self.zip_max_entry_bytes = 64 * 1024 * 1024
+        self.download_chunk_bytes = 256 * 1024
+        
+        # CPU-bound resize/re-encode runs in a process pool shared by all URL workers; each card is
+        # decoded once and the gallery derivatives (thumbnail, 540px, WebP) are rendered in the same pass
+        derivatives = os.getenv('GAMMA_DERIVATIVES')
+        self.image_stage = ImageStage(
+            workers=int(os.getenv('GAMMA_IMAGE_WORKERS', '0')) or None,
+            derivatives=parse_derivatives(derivatives) if derivatives is not None else DEFAULT_DERIVATIVES,
+            on_timings=self._record_image_timings
+        )
+        self.derivative_paths: Dict[str, Dict[str, str]] = {}
+        
+        # Each stage of the graph (api -> download -> image -> upload -> metadata) has its own
+        # worker count; bounded queues between them make a slow stage hold back the ones before it
+        self.download_workers = int(os.getenv('GAMMA_DOWNLOAD_WORKERS', '4'))
+        self.upload_workers = int(os.getenv('GAMMA_UPLOAD_WORKERS', '8'))
+        self.metadata_workers = int(os.getenv('GAMMA_METADATA_WORKERS', '2'))
+        self.stage_stats: Dict[str, Dict[str, float]] = {}
+        self.upload_stats = {'objects': 0, 'bytes': 0, 'retries': 0, 'fallbacks': 0, 'seconds': 0.0}
+        
+        # Identical cards (common across a business's URL variants) are stored once and
+        # every gallery row points at that object
+        self.content_index = ContentIndex(content_index_path)
+        
     def extract_metadata_from_url(self, url: str) -> Dict[str, str]:
         """Extract business metadata from Gamma URL."""
         url_lower = url.lower()
@@ -160,6 +253,8 @@ class GammaMigrator:
         warnings = []
         
         for attempt in range(self.max_retries):
+            if attempt:
+                self.telemetry.add_retries(trace_id, 'api')
             try:
                 headers = {
                     'Authorization': f'Bearer {self.gamma_api_key}',
@@ -174,10 +269,13 @@ class GammaMigrator:
                     'count': 5
                 }
                 
+                waited = self.rate_limiter.acquire()
+                if waited >= 1:
+                    logger.info(f"⏳ Rate limiter held {trace_id} for {waited:.1f}s")
                 logger.info(f"🔄 Calling Gamma API (attempt {attempt + 1}/{self.max_retries}) - Trace: {trace_id}")
                 
                 response = requests.post(
-                    'https://api.gamma.app/v1/generations',
+                    self.gamma_api_url,
                     headers=headers,
                     json=payload,
                     timeout=60
@@ -185,6 +283,7 @@ class GammaMigrator:
                 
                 # Handle different HTTP status codes
                 if response.status_code == 200:
+                    self.rate_limiter.on_success()
                     data = response.json()
                     
                     # Check for warnings in response
@@ -212,8 +311,9 @@ class GammaMigrator:
                 elif response.status_code == 429:
                     retry_after = int(response.headers.get('Retry-After', 60))
                     logger.warning(f"⏳ Rate limit (429) for {trace_id}: Retry after {retry_after}s")
+                    # Pauses every worker and halves the request rate; the next acquire() waits it out
+                    self.rate_limiter.on_throttle(retry_after)
                     if attempt < self.max_retries - 1:
-                        time.sleep(retry_after)
                         continue
                     else:
                         return None, warnings
@@ -255,82 +355,129 @@ class GammaMigrator:
         return None, warnings
     
     def download_and_extract_zip(self, zip_url: str) -> List[bytes]:
-        """Download ZIP file and extract PNG images."""
+        """Download ZIP file and extract PNG images (none if the archive cannot be read in full)."""
         try:
-            # Download ZIP file
-            response = requests.get(zip_url, timeout=60)
-            response.raise_for_status()
-            
-            # Extract PNG files from ZIP
-            png_files = []
-            with zipfile.ZipFile(io.BytesIO(response.content)) as zip_file:
-                for file_info in zip_file.filelist:
-                    if file_info.filename.lower().endswith('.png'):
-                        png_data = zip_file.read(file_info.filename)
-                        
-                        # Resize to 1080x1080 if needed
-                        img = Image.open(io.BytesIO(png_data))
-                        if img.size != (1080, 1080):
-                            img = img.resize((1080, 1080), Image.Resampling.LANCZOS)
-                            
-                            # Convert back to bytes
-                            output = io.BytesIO()
-                            img.save(output, format='PNG', optimize=True)
-                            png_data = output.getvalue()
-                        
-                        png_files.append(png_data)
-            
-            return png_files
-            
-        except Exception as e:
-            print(f"❌ ZIP download/extraction failed: {str(e)}")
+            return [card.png for card in self.image_stage.map(self.iter_zip_pngs(zip_url))]
+        except Exception:
             return []
     
-    def upload_to_supabase(self, png_files: List[bytes], metadata: Dict[str, str], url: str, trace_id: str) -> List[str]:
-        """Upload PNG files to Supabase Storage and return storage paths with fallback."""
-        storage_paths = []
-        niche = metadata['niche']
-        language = metadata['language']
+    def iter_zip_pngs(self, zip_url: str, trace_id: str = '-') -> Iterator[bytes]:
+        """Stream the ZIP to a spooled temp file and yield its raw PNGs one at a time.
         
+        Peak memory is bounded by zip_spool_bytes plus one PNG, whatever the archive size.
+        Download and extraction errors are logged and re-raised, even after some PNGs were
+        yielded, so a partly read archive is never mistaken for a complete one.
+        """
         try:
-            for i, png_data in enumerate(png_files):
-                # Create storage path with trace ID for uniqueness
-                filename = f"{metadata['business_name'].lower().replace(' ', '-')}-{i+1}-{trace_id}.png"
-                storage_path = f"{niche}/{language}/{filename}"
+            with tempfile.SpooledTemporaryFile(max_size=self.zip_spool_bytes) as spool:
+                with self.telemetry.stage(trace_id, 'download'):
+                    zip_bytes = self._download_to(zip_url, spool)
+                self.telemetry.add_bytes(trace_id, 'downloaded', zip_bytes)
+                spool.seek(0)
+                extracted = 0
                 
-                # Try Supabase upload first
-                if self.supabase:
-                    try:
-                        result = self.supabase.storage.from_('gamma-cards').upload(
-                            storage_path,
-                            png_data,
-                            file_options={'content-type': 'image/png', 'upsert': True}
-                        )
+                with zipfile.ZipFile(spool) as zip_file:
+                    for file_info in zip_file.infolist():
+                        if not file_info.filename.lower().endswith('.png'):
+                            continue
+                        if file_info.file_size > self.zip_max_entry_bytes:
+                            logger.warning(f"⚠️ Skipping oversized ZIP entry {file_info.filename} ({file_info.file_size} bytes)")
+                            continue
                         
-                        if result.get('error'):
-                            logger.error(f"❌ Supabase upload failed for {storage_path}: {result['error']} - Trace: {trace_id}")
-                            # Fallback to local file save
-                            self._save_file_locally(png_data, storage_path, trace_id)
-                        else:
-                            storage_paths.append(storage_path)
-                            logger.info(f"✅ Uploaded to Supabase: {storage_path} - Trace: {trace_id}")
-                    except Exception as e:
-                        logger.error(f"❌ Supabase upload exception for {storage_path}: {str(e)} - Trace: {trace_id}")
-                        # Fallback to local file save
-                        self._save_file_locally(png_data, storage_path, trace_id)
-                else:
-                    # Supabase client not available, save locally
-                    logger.warning(f"⚠️ Supabase client not available, saving locally - Trace: {trace_id}")
-                    self._save_file_locally(png_data, storage_path, trace_id)
+                        # Only the read is timed; time spent downstream between yields is not extraction
+                        with self.telemetry.stage(trace_id, 'extract'):
+                            with zip_file.open(file_info) as entry:
+                                png_data = entry.read()
+                        self.telemetry.add_bytes(trace_id, 'extracted', len(png_data))
+                        
+                        extracted += 1
+                        yield png_data
                 
-                # Add to storage paths regardless of upload method
-                storage_paths.append(storage_path)
-            
-            return storage_paths
+                logger.info(f"📦 Extracted {extracted} PNG files from {zip_bytes} byte ZIP - Trace: {trace_id}")
             
         except Exception as e:
-            logger.error(f"❌ Upload process failed: {str(e)} - Trace: {trace_id}")
-            return []
+            logger.error(f"❌ ZIP download/extraction failed: {str(e)} - Trace: {trace_id}")
+            raise
+    
+    def _download_to(self, zip_url: str, spool) -> int:
+        """Stream a download into a file object, enforcing zip_max_bytes."""
+        total = 0
+        with requests.get(zip_url, timeout=60, stream=True) as response:
+            response.raise_for_status()
+            
+            declared = int(response.headers.get('Content-Length') or 0)
+            if declared > self.zip_max_bytes:
+                raise ValueError(f"ZIP is {declared} bytes, over the {self.zip_max_bytes} byte cap")
+            
+            for chunk in response.iter_content(chunk_size=self.download_chunk_bytes):
+                total += len(chunk)
+                if total > self.zip_max_bytes:
+                    raise ValueError(f"ZIP exceeded the {self.zip_max_bytes} byte cap")
+                spool.write(chunk)
+        return total
+    
+    def _store_card(self, png_data: bytes, storage_path: str, trace_id: str,
+                    content_type: str = 'image/png') -> Tuple[str, bool]:
+        """Upload an image unless identical content is already stored; returns (path, deduplicated)."""
+        storage_path, deduplicated = self.content_index.resolve(
+            png_data, lambda: self._upload_object(png_data, storage_path, trace_id, content_type)
+        )
+        if deduplicated:
+            logger.info(f"♻️ Duplicate image, reusing {storage_path} - Trace: {trace_id}")
+        return storage_path, deduplicated
+    
+    def _upload_object(self, png_data: bytes, storage_path: str, trace_id: str,
+                       content_type: str = 'image/png') -> Tuple[str, bool]:
+        """Upload one card with jittered retries, falling back to a local file; returns (path, uploaded)."""
+        started = time.perf_counter()
+        retries = 0
+        uploaded = False
+        
+        # Try Supabase upload first
+        if self.supabase:
+            for attempt in range(self.max_retries):
+                try:
+                    result = self.supabase.storage.from_('gamma-cards').upload(
+                        storage_path,
+                        png_data,
+                        file_options={'content-type': content_type, 'upsert': 'true'}
+                    )
+                    
+                    error = result.get('error') if isinstance(result, dict) else None
+                    if not error:
+                        uploaded = True
+                        logger.info(f"✅ Uploaded to Supabase: {storage_path} - Trace: {trace_id}")
+                        break
+                    logger.error(f"❌ Supabase upload failed for {storage_path}: {error} - Trace: {trace_id}")
+                except Exception as e:
+                    logger.error(f"❌ Supabase upload exception for {storage_path}: {str(e)} - Trace: {trace_id}")
+                
+                if attempt < self.max_retries - 1:
+                    retries += 1
+                    # Full jitter keeps retries from many workers from landing together
+                    time.sleep(random.uniform(0, self.retry_delays[attempt]))
+        else:
+            # Supabase client not available, save locally
+            logger.warning(f"⚠️ Supabase client not available, saving locally - Trace: {trace_id}")
+        
+        if not uploaded:
+            # Fallback to local file save
+            self._save_file_locally(png_data, storage_path, trace_id)
+        
+        elapsed = time.perf_counter() - started
+        with self._log_lock:
+            self.upload_stats['objects'] += 1
+            self.upload_stats['bytes'] += len(png_data)
+            self.upload_stats['retries'] += retries
+            self.upload_stats['fallbacks'] += 0 if uploaded else 1
+            self.upload_stats['seconds'] += elapsed
+        
+        self.telemetry.add_time(trace_id, 'upload', elapsed * 1000)
+        self.telemetry.add_retries(trace_id, 'upload', retries)
+        if uploaded:
+            self.telemetry.add_bytes(trace_id, 'uploaded', len(png_data))
+        
+        return storage_path, uploaded
     
     def _save_file_locally(self, png_data: bytes, storage_path: str, trace_id: str):
         """Fallback method to save files locally when Supabase is unavailable."""
@@ -347,129 +494,330 @@ class GammaMigrator:
         except Exception as e:
             logger.error(f"❌ Local save failed for {storage_path}: {str(e)} - Trace: {trace_id}")
     
+    def build_gallery_rows(self, url: str, storage_paths: List[str], metadata: Dict[str, str]) -> List[Dict]:
+        """Build the gamma_gallery rows for one migrated URL (one row per distinct stored card)."""
+        first_seen = {}
+        for i, storage_path in enumerate(storage_paths):
+            first_seen.setdefault(storage_path, i)
+        
+        return [
+            {
+                'original_gamma_url': url,
+                'storage_path': storage_path,
+                'niche': metadata['niche'],
+                'language': metadata['language'],
+                'title': f"{metadata['business_name']} - Card {i+1}",
+                'description': f"Professional {metadata['niche']} ad card with {metadata['cta_type']} theme",
+                'fomo_score': metadata['fomo_score'],
+                'cta_type': metadata['cta_type'],
+                'is_featured': metadata['fomo_score'] >= 8,
+                'is_placeholder': False,
+                'utm_campaign': metadata['utm_campaign'],
+                'content_hash': self.content_index.hash_of(storage_path),
+                'derivative_paths': self.derivative_paths.get(storage_path, {})
+            }
+            for storage_path, i in first_seen.items()
+        ]
+    
     def insert_gallery_metadata(self, url: str, storage_paths: List[str], metadata: Dict[str, str], trace_id: str) -> bool:
         """Insert gallery metadata into gamma_gallery table with enhanced error handling."""
         try:
-            for i, storage_path in enumerate(storage_paths):
-                gallery_data = {
-                    'original_gamma_url': url,
-                    'storage_path': storage_path,
-                    'niche': metadata['niche'],
-                    'language': metadata['language'],
-                    'title': f"{metadata['business_name']} - Card {i+1}",
-                    'description': f"Professional {metadata['niche']} ad card with {metadata['cta_type']} theme",
-                    'fomo_score': metadata['fomo_score'],
-                    'cta_type': metadata['cta_type'],
-                    'is_featured': metadata['fomo_score'] >= 8,
-                    'is_placeholder': False,
-                    'utm_campaign': metadata['utm_campaign']
-                }
-                
-                # Try Supabase insert if available
-                if self.supabase:
-                    try:
-                        result = self.supabase.table('gamma_gallery').insert(gallery_data).execute()
-                        
-                        if result.data:
-                            logger.info(f"✅ Metadata inserted for: {storage_path} - Trace: {trace_id}")
-                        else:
-                            logger.error(f"❌ Metadata insert failed for: {storage_path} - Trace: {trace_id}")
-                            return False
-                    except Exception as e:
-                        logger.error(f"❌ Supabase metadata insert failed for {storage_path}: {str(e)} - Trace: {trace_id}")
-                        # Fallback to local JSON log
-                        self._log_metadata_locally(gallery_data, trace_id)
-                else:
-                    # Supabase not available, log locally
-                    logger.warning(f"⚠️ Supabase not available, logging metadata locally - Trace: {trace_id}")
-                    self._log_metadata_locally(gallery_data, trace_id)
-            
-            return True
-            
+            return self.upsert_gallery_rows(self.build_gallery_rows(url, storage_paths, metadata), trace_id)
         except Exception as e:
             logger.error(f"❌ Metadata insert process failed: {str(e)} - Trace: {trace_id}")
             return False
     
-    def _log_metadata_locally(self, gallery_data: Dict, trace_id: str):
+    def upsert_gallery_rows(self, rows: List[Dict], trace_id: str) -> bool:
+        """Write rows with one bulk upsert keyed on (URL, storage_path); split into per-row retries only if it fails."""
+        if not rows:
+            return True
+        
+        if not self.supabase:
+            # Supabase not available, log locally
+            logger.warning(f"⚠️ Supabase not available, logging metadata locally - Trace: {trace_id}")
+            self._log_metadata_locally(rows, trace_id)
+            return True
+        
+        try:
+            result = self.supabase.table('gamma_gallery').upsert(rows, on_conflict='original_gamma_url,storage_path').execute()
+            if result.data and len(result.data) == len(rows):
+                logger.info(f"✅ Metadata upserted for {len(rows)} cards - Trace: {trace_id}")
+                return True
+            logger.warning(f"⚠️ Bulk metadata upsert wrote {len(result.data or [])}/{len(rows)} rows, retrying per row - Trace: {trace_id}")
+        except Exception as e:
+            logger.warning(f"⚠️ Bulk metadata upsert failed ({str(e)}), retrying per row - Trace: {trace_id}")
+        
+        # A bad row fails the whole statement; isolate it so the good rows still land
+        self.telemetry.add_retries(trace_id, 'metadata', len(rows))
+        fallback_rows = []
+        all_inserted = True
+        for row in rows:
+            try:
+                result = self.supabase.table('gamma_gallery').upsert(row, on_conflict='original_gamma_url,storage_path').execute()
+                if result.data:
+                    logger.info(f"✅ Metadata inserted for: {row['storage_path']} - Trace: {trace_id}")
+                else:
+                    logger.error(f"❌ Metadata insert failed for: {row['storage_path']} - Trace: {trace_id}")
+                    all_inserted = False
+            except Exception as e:
+                logger.error(f"❌ Supabase metadata insert failed for {row['storage_path']}: {str(e)} - Trace: {trace_id}")
+                fallback_rows.append(row)
+        
+        # Fallback to local JSON log
+        self._log_metadata_locally(fallback_rows, trace_id)
+        return all_inserted
+    
+    def _log_metadata_locally(self, rows: List[Dict], trace_id: str):
         """Fallback method to log metadata locally when Supabase is unavailable."""
+        if not rows:
+            return
         try:
             # Create local metadata log
             metadata_log_path = f"migrated_files/metadata_log_{trace_id}.json"
             os.makedirs(os.path.dirname(metadata_log_path), exist_ok=True)
             
-            # Append to log file
+            # Append every row through one buffered write
             with open(metadata_log_path, 'a') as f:
-                f.write(json.dumps(gallery_data) + '\n')
+                f.writelines(json.dumps(row) + '\n' for row in rows)
             
-            logger.info(f"💾 Metadata logged locally: {metadata_log_path} - Trace: {trace_id}")
+            logger.info(f"💾 Metadata logged locally ({len(rows)} rows): {metadata_log_path} - Trace: {trace_id}")
         except Exception as e:
             logger.error(f"❌ Local metadata log failed: {str(e)} - Trace: {trace_id}")
     
-    def migrate_gamma_url(self, url: str) -> bool:
-        """Migrate a single Gamma URL to Supabase with enhanced error handling."""
-        trace_id = str(uuid.uuid4())[:8]
-        self.migration_log['trace_ids'].append(trace_id)
+    def load_remote_content_index(self, page_size: int = 1000) -> int:
+        """Seed the content index with hashes of cards already in gamma_gallery."""
+        if not self.supabase:
+            return 0
         
-        logger.info(f"🔄 Processing: {url} - Trace: {trace_id}")
+        loaded = 0
+        try:
+            offset = 0
+            while True:
+                result = (
+                    self.supabase.table('gamma_gallery')
+                    .select('content_hash, storage_path')
+                    .not_.is_('content_hash', 'null')
+                    .range(offset, offset + page_size - 1)
+                    .execute()
+                )
+                for row in result.data or []:
+                    self.content_index.add(row['content_hash'], row['storage_path'], persist=False)
+                    loaded += 1
+                if len(result.data or []) < page_size:
+                    break
+                offset += page_size
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load remote content index ({str(e)}); using local index only")
+        
+        return loaded
+    
+    def _record_image_timings(self, trace_id: str, timings: Dict[str, float]):
+        self.telemetry.add_time(trace_id, 'decode_resize', sum(v for k, v in timings.items() if k.endswith('_ms')))
+    
+    def _record_error(self, error_msg: str):
+        with self._log_lock:
+            self.migration_log['errors'].append(error_msg)
+    
+    def _new_job(self, url: str, trace_id: Optional[str] = None) -> _UrlJob:
+        job = _UrlJob(url, trace_id or str(uuid.uuid4())[:8])
+        with self._log_lock:
+            self.migration_log['trace_ids'].append(job.trace_id)
+        self.telemetry.start(job.trace_id, url)
+        return job
+    
+    def _fail_job(self, job: _UrlJob, reason: str, emit: Callable):
+        error_msg = f"{reason}: {job.url} - Trace: {job.trace_id}"
+        logger.error(f"❌ {error_msg}")
+        self._record_error(error_msg)
+        job.error = error_msg
+        emit(job, to=OUTPUT)
+    
+    def _api_stage(self, job: _UrlJob, emit: Callable):
+        """Stage 1: metadata, prompt and the rate-limited Gamma generation call."""
+        job.started = time.perf_counter()
+        logger.info(f"🔄 Processing: {job.url} - Trace: {job.trace_id}")
         
         try:
-            # Extract metadata
-            metadata = self.extract_metadata_from_url(url)
-            logger.info(f"📊 Metadata: {metadata['niche']} | {metadata['language']} | FOMO: {metadata['fomo_score']} - Trace: {trace_id}")
-            
-            # Create prompt
-            prompt = self.create_gamma_prompt(url, metadata)
+            job.metadata = self.extract_metadata_from_url(job.url)
+            metadata = job.metadata
+            logger.info(f"📊 Metadata: {metadata['niche']} | {metadata['language']} | FOMO: {metadata['fomo_score']} - Trace: {job.trace_id}")
             
-            # Call Gamma API with enhanced error handling
-            zip_url, warnings = self.call_gamma_api(prompt, trace_id)
-            if warnings:
+            prompt = self.create_gamma_prompt(job.url, metadata)
+            with self.telemetry.stage(job.trace_id, 'api'):
+                job.zip_url, warnings = self.call_gamma_api(prompt, job.trace_id)
+        except Exception as e:
+            self._fail_job(job, f"Migration failed ({str(e)})", emit)
+            return
+        
+        if warnings:
+            with self._log_lock:
                 self.migration_log['warnings'].append({
-                    'url': url,
-                    'trace_id': trace_id,
+                    'url': job.url,
+                    'trace_id': job.trace_id,
                     'warnings': warnings
                 })
-            
-            if not zip_url:
-                error_msg = f"API call failed: {url} - Trace: {trace_id}"
-                logger.error(f"❌ {error_msg}")
-                self.migration_log['errors'].append(error_msg)
-                return False
-            
-            # Download and extract PNGs
-            png_files = self.download_and_extract_zip(zip_url)
-            if not png_files:
-                error_msg = f"ZIP extraction failed: {url} - Trace: {trace_id}"
-                logger.error(f"❌ {error_msg}")
-                self.migration_log['errors'].append(error_msg)
-                return False
-            
-            logger.info(f"📦 Extracted {len(png_files)} PNG files - Trace: {trace_id}")
-            
-            # Upload to Supabase (with fallback to file save if Supabase fails)
-            storage_paths = self.upload_to_supabase(png_files, metadata, url, trace_id)
-            if not storage_paths:
-                error_msg = f"Upload failed: {url} - Trace: {trace_id}"
-                logger.error(f"❌ {error_msg}")
-                self.migration_log['errors'].append(error_msg)
-                return False
-            
-            # Insert metadata
-            if self.insert_gallery_metadata(url, storage_paths, metadata, trace_id):
-                logger.info(f"✅ Successfully migrated: {url} - Trace: {trace_id}")
+        
+        if not job.zip_url:
+            self._fail_job(job, "API call failed", emit)
+            return
+        emit(job)
+    
+    def _download_stage(self, job: _UrlJob, emit: Callable):
+        """Stage 2: stream the ZIP and hand each PNG to the image stage, blocking while it is full."""
+        extracted = 0
+        try:
+            for png_data in self.iter_zip_pngs(job.zip_url, job.trace_id):
+                job.settle(+1)
+                emit((job, extracted, png_data))
+                extracted += 1
+        except Exception as e:
+            if extracted:
+                # Cards already queued still drain; the metadata stage then fails the URL,
+                # so a partial archive is never recorded as migrated or journaled
+                with job.lock:
+                    job.error = job.error or (f"ZIP extraction failed after {extracted} cards ({str(e)}): "
+                                              f"{job.url} - Trace: {job.trace_id}")
+        
+        if not extracted:
+            self._fail_job(job, "ZIP extraction failed", emit)
+        elif job.settle(extracted=True):
+            emit(job, to='metadata')
+    
+    def _image_stage(self, item: Tuple[_UrlJob, int, bytes], emit: Callable):
+        """Stage 3: normalize the card and render derivatives, then queue one upload per object."""
+        job, index, png_data = item
+        try:
+            card = self.image_stage.submit(png_data, job.trace_id).result()
+        except Exception as e:
+            logger.error(f"❌ Image processing failed for card {index + 1}: {str(e)} - Trace: {job.trace_id}")
+            with job.lock:
+                job.error = job.error or f"Image processing failed: {job.url} - Trace: {job.trace_id}"
+            if job.settle(-1):
+                emit(job, to='metadata')
+            return
+        
+        metadata = job.metadata
+        # Storage path carries the trace ID for uniqueness
+        stem = f"{metadata['business_name'].lower().replace(' ', '-')}-{index+1}-{job.trace_id}"
+        prefix = f"{metadata['niche']}/{metadata['language']}"
+        uploads = [(job, index, None, card.png, f"{prefix}/{stem}.png", 'image/png')]
+        for spec in self.image_stage.derivatives:
+            if spec.name in card.derivatives:
+                uploads.append((job, index, spec.name, card.derivatives[spec.name],
+                                f"{prefix}/{stem}-{spec.name}.{spec.extension}", spec.content_type))
+        
+        # The card's own unit becomes one unit per object before any upload can finish
+        job.settle(len(uploads) - 1)
+        for upload in uploads:
+            emit(upload)
+    
+    def _upload_stage(self, item: Tuple, emit: Callable):
+        """Stage 4: store one object (deduplicated by content) and release the URL once all are stored."""
+        job, index, name, data, storage_path, content_type = item
+        try:
+            stored = self._store_card(data, storage_path, job.trace_id, content_type)
+        except Exception as e:
+            logger.error(f"❌ Upload failed for {storage_path}: {str(e)} - Trace: {job.trace_id}")
+            with job.lock:
+                job.error = job.error or f"Upload failed: {job.url} - Trace: {job.trace_id}"
+        else:
+            with job.lock:
+                card = job.cards.setdefault(index, {})
+                if name is None:
+                    card['png'] = stored
+                else:
+                    card[name] = stored[0]
+        
+        if job.settle(-1):
+            emit(job, to='metadata')
+    
+    def _metadata_stage(self, job: _UrlJob, emit: Callable):
+        """Stage 5: one bulk gamma_gallery upsert per URL."""
+        if job.error:
+            self._record_error(job.error)
+            logger.error(f"❌ {job.error}")
+            emit(job)
+            return
+        
+        # Paths come back in card order, whether the object landed in Supabase, locally,
+        # or was already stored under another URL
+        storage_paths = []
+        duplicates = 0
+        for index in sorted(job.cards):
+            card = job.cards[index]
+            storage_path, deduplicated = card['png']
+            storage_paths.append(storage_path)
+            duplicates += 1 if deduplicated else 0
+            derived = {name: path for name, path in card.items() if name != 'png'}
+            if derived:
+                with self._log_lock:
+                    self.derivative_paths[storage_path] = derived
+        logger.info(f"⬆️ Stored {len(storage_paths)} cards ({duplicates} already stored) - Trace: {job.trace_id}")
+        
+        with self.telemetry.stage(job.trace_id, 'metadata'):
+            inserted = self.insert_gallery_metadata(job.url, storage_paths, job.metadata, job.trace_id)
+        
+        if inserted:
+            logger.info(f"✅ Successfully migrated: {job.url} - Trace: {job.trace_id}")
+            job.success = True
+            with self._log_lock:
                 self.migration_log['successful'] += 1
                 self.migration_log['cost_estimate'] += 0.50  # $0.50 per generation
-                return True
-            else:
-                error_msg = f"Metadata insert failed: {url} - Trace: {trace_id}"
-                logger.error(f"❌ {error_msg}")
-                self.migration_log['errors'].append(error_msg)
-                return False
-                
-        except Exception as e:
-            error_msg = f"Migration failed for {url}: {str(e)} - Trace: {trace_id}"
+        else:
+            error_msg = f"Metadata insert failed: {job.url} - Trace: {job.trace_id}"
             logger.error(f"❌ {error_msg}")
-            self.migration_log['errors'].append(error_msg)
-            return False
+            self._record_error(error_msg)
+        emit(job)
+    
+    def _on_stage_error(self, stage: str, item: Any, error: BaseException, emit: Callable):
+        """Fail the URL that owns an item whose handler raised, so it still reaches OUTPUT exactly once."""
+        job = item if isinstance(item, _UrlJob) else item[0]
+        error_msg = f"Unhandled {stage} stage error ({str(error)}): {job.url} - Trace: {job.trace_id}"
+        logger.error(f"💥 {error_msg}")
+        with job.lock:
+            job.error = job.error or error_msg
+            job.success = False
+        
+        if stage in ('image', 'upload'):
+            # The item was one outstanding unit of the URL's cards; the last unit out hands it on
+            release = job.settle(-1)
+        elif stage == 'download':
+            # Cards already queued still drain and hand the URL on; otherwise release it here
+            release = job.settle(extracted=True)
+        else:
+            # api raised before handing the job on, metadata after it was handed off to this stage
+            release = True
+        if release:
+            self._record_error(job.error)
+            emit(job, to=OUTPUT)
+    
+    def build_stage_graph(self) -> StageGraph:
+        """api -> download -> image -> upload -> metadata, each stage with its own workers."""
+        return (
+            StageGraph(on_error=self._on_stage_error)
+            .add_stage('api', self._api_stage, self.workers)
+            .add_stage('download', self._download_stage, self.download_workers)
+            # Enough card slots to keep every image process busy, but never a whole backlog of PNGs
+            .add_stage('image', self._image_stage, self.image_stage.workers, capacity=self.image_stage.workers * 2)
+            .add_stage('upload', self._upload_stage, self.upload_workers)
+            .add_stage('metadata', self._metadata_stage, self.metadata_workers)
+        )
+    
+    def migrate_urls(self, jobs: Iterable[_UrlJob]) -> Iterator[_UrlJob]:
+        """Run jobs through a fresh stage graph, yielding each one as it succeeds or fails."""
+        graph = self.build_stage_graph()
+        try:
+            for job in graph.run(jobs):
+                if job.started:
+                    self.telemetry.add_time(job.trace_id, 'total', (time.perf_counter() - job.started) * 1000)
+                self.telemetry.finish(job.trace_id, job.success)
+                yield job
+        finally:
+            self.stage_stats = graph.snapshot()
+    
+    def migrate_gamma_url(self, url: str, trace_id: Optional[str] = None) -> bool:
+        """Migrate a single Gamma URL to Supabase through the stage graph."""
+        return all(job.success for job in self.migrate_urls([self._new_job(url, trace_id)]))
     
     def save_migration_log(self):
         """Save migration progress to JSON file."""
@@ -485,31 +833,62 @@ class GammaMigrator:
         print(f"\n📊 Migration Summary:")
         print(f"   Total URLs: {self.migration_log['total_urls']}")
         print(f"   Successful: {self.migration_log['successful']}")
+        print(f"   Resumed: {self.migration_log['resumed']}")
         print(f"   Failed: {self.migration_log['failed']}")
         print(f"   Cost Estimate: ${self.migration_log['cost_estimate']:.2f}")
         print(f"   Duration: {self.migration_log['duration_minutes']:.1f} minutes")
+        
+        stages = self.migration_log.get('stage_summary', {}).get('stages_ms', {})
+        for stage, summary in stages.items():
+            print(f"   {stage}: p50 {summary['p50']:.0f}ms | p95 {summary['p95']:.0f}ms | max {summary['max']:.0f}ms")
     
     def run_migration(self, urls: List[str]):
-        """Run the complete migration process."""
+        """Run the complete migration process, skipping URLs already in the checkpoint journal."""
         print("🚀 Starting Gamma Gallery Migration")
         print(f"📋 Processing {len(urls)} URLs")
         
         self.migration_log['total_urls'] = len(urls)
+        journal = CheckpointJournal(self.checkpoint_path) if self.checkpoint_path else None
         
-        for i, url in enumerate(urls, 1):
-            print(f"\n[{i}/{len(urls)}] Processing URL...")
+        try:
+            pending = [url for url in urls if journal is None or url not in journal]
+            self.migration_log['resumed'] = len(urls) - len(pending)
+            if self.migration_log['resumed']:
+                logger.info(f"♻️ Resuming: {self.migration_log['resumed']}/{len(urls)} URLs already migrated ({self.checkpoint_path})")
             
-            success = self.migrate_gamma_url(url)
-            self.migration_log['processed'] += 1
+            remote_hashes = self.load_remote_content_index()
+            logger.info(f"🔑 Content index: {len(self.content_index)} known cards ({remote_hashes} from gamma_gallery)")
+            logger.info(f"⚙️ Stage workers: api {self.workers}, download {self.download_workers}, "
+                        f"image {self.image_stage.workers}, upload {self.upload_workers}, metadata {self.metadata_workers}; "
+                        f"starting at {self.rate_limiter.rate:.2f} req/s")
             
-            if not success:
-                self.migration_log['failed'] += 1
+            def jobs() -> Iterator[_UrlJob]:
+                # Pulled lazily by the graph, so only a queue's worth of URLs is ever waiting
+                for i, url in enumerate(pending, 1):
+                    print(f"\n[{i}/{len(pending)}] Processing URL...")
+                    yield self._new_job(url)
             
-            # Rate limiting
-            if i < len(urls):
-                print(f"⏳ Waiting {self.api_delay}s before next request...")
-                time.sleep(self.api_delay)
+            for job in self.migrate_urls(jobs()):
+                self.migration_log['processed'] += 1
+                if job.success:
+                    if journal is not None:
+                        journal.record(job.url, {'trace_id': job.trace_id})
+                else:
+                    self.migration_log['failed'] += 1
+        finally:
+            if journal is not None:
+                journal.close()
+            self.image_stage.close()
+            self.content_index.flush()
         
+        self.migration_log['workers'] = self.workers
+        self.migration_log['stages'] = self.stage_stats
+        self.migration_log['uploads'] = dict(self.upload_stats)
+        self.migration_log['dedupe'] = dict(self.content_index.stats)
+        self.migration_log['image_stage'] = self.image_stage.summary()
+        self.migration_log['rate_limiter'] = self.rate_limiter.snapshot()
+        self.migration_log['url_metrics'] = self.telemetry.urls
+        self.migration_log['stage_summary'] = self.telemetry.summary()
         self.save_migration_log()
         print("\n🎉 Migration completed!")
 
@@ -540,7 +919,10 @@ def main():
     logger.info(f"⏱️ Estimated duration: {len(gamma_urls) * 3} minutes")
     
     try:
-        migrator = GammaMigrator()
+        migrator = GammaMigrator(
+            checkpoint_path=os.getenv('GAMMA_MIGRATION_CHECKPOINT', 'migration-checkpoint.jsonl'),
+            content_index_path=os.getenv('GAMMA_CONTENT_INDEX', 'content-index.jsonl')
+        )
         migrator.run_migration(gamma_urls)
         
         # Print final summary
@@ -548,6 +930,7 @@ def main():
         logger.info(f"📊 Final Results:")
         logger.info(f"   • Total URLs: {migrator.migration_log['total_urls']}")
         logger.info(f"   • Successful: {migrator.migration_log['successful']}")
+        logger.info(f"   • Resumed: {migrator.migration_log['resumed']}")
         logger.info(f"   • Failed: {migrator.migration_log['failed']}")
         logger.info(f"   • Warnings: {len(migrator.migration_log['warnings'])}")
         logger.info(f"   • Cost: ${migrator.migration_log['cost_estimate']:.2f}")
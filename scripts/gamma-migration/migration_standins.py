@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Gamma Migration Stand-ins
+Description: Offline Gamma generations API plus Supabase storage/table stand-ins for benchmarking GammaMigrator
+Author: omniumai357
+Date: 2025-10-09
+
+One local HTTP server answers everything the migrator talks to:
+  POST /v1/generations                 -> {"zip_download_url": ".../zips/<id>.zip"} (latency, 429 and 5xx injectable)
+  GET  /zips/<id>.zip                  -> synthetic ZIP of PNG cards
+  POST /storage/v1/object/<bucket>/... -> Supabase Storage upload
+  POST /rest/v1/gamma_gallery          -> PostgREST insert/upsert (kept in memory)
+  GET  /rest/v1/gamma_gallery          -> PostgREST select (content_hash index preload)
+  GET  /stats                          -> request and byte counters
+
+Point the migrator at it with GAMMA_API_URL=<url>/v1/generations and SUPABASE_URL=<url>.
+
+Run: python migration_standins.py --port 8787 --api-latency-ms 800 --rate-limit-rate 0.02
+"""
+
+import argparse
+import io
+import json
+import random
+import threading
+import time
+import uuid
+import zipfile
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from PIL import Image
+
+
+@dataclass
+class StandInConfig:
+    """Latency and failure knobs for the stand-in services"""
+    api_latency_ms: float = 500.0
+    api_jitter_ms: float = 100.0
+    rate_limit_rate: float = 0.0  # fraction of generations answered with 429
+    retry_after_seconds: int = 1
+    server_error_rate: float = 0.0  # fraction of generations answered with 503
+    download_latency_ms: float = 50.0
+    storage_latency_ms: float = 30.0
+    table_latency_ms: float = 20.0
+    cards_per_zip: int = 5
+    card_size: int = 1080  # square edge of generated cards; != 1080 exercises the resize path
+    distinct_cards: int = 40  # pool size; smaller pools produce more duplicate cards across URLs
+    seed: Optional[int] = None
+
+
+def render_card_pool(config: StandInConfig) -> List[bytes]:
+    """Pre-render the PNG cards that synthetic ZIPs are assembled from."""
+    rng = random.Random(config.seed)
+    cards = []
+    for _ in range(config.distinct_cards):
+        img = Image.new('RGB', (config.card_size, config.card_size), tuple(rng.randrange(256) for _ in range(3)))
+        # A few blocks of colour so cards are visually distinct
+        for _ in range(12):
+            x, y = rng.randrange(config.card_size), rng.randrange(config.card_size)
+            block = Image.new('RGB', (config.card_size // 6, config.card_size // 10), tuple(rng.randrange(256) for _ in range(3)))
+            img.paste(block, (x, y))
+        # Photo-like noise band keeps encoded sizes in the range of real cards instead of flat fills
+        band = (config.card_size, config.card_size // 4)
+        img.paste(Image.frombytes('RGB', band, rng.randbytes(band[0] * band[1] * 3)), (0, config.card_size - band[1]))
+        output = io.BytesIO()
+        img.save(output, format='PNG')
+        cards.append(output.getvalue())
+    return cards
+
+
+class StandInState:
+    """In-memory storage objects, gallery rows and counters shared by handler threads"""
+
+    def __init__(self, config: StandInConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.cards = render_card_pool(config)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget stored objects, rows and counters (the rendered card pool is kept)."""
+        with self.lock:
+            self.objects: Dict[str, int] = {}
+            self.rows: Dict[Tuple[str, str], Dict] = {}
+            self.stats = {
+                'generations': 0, 'rate_limited': 0, 'server_errors': 0,
+                'zips_served': 0, 'bytes_served': 0,
+                'uploads': 0, 'bytes_uploaded': 0,
+                'row_writes': 0, 'rows_stored': 0
+            }
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return {**self.stats, 'objects': len(self.objects)}
+
+    def count(self, key: str, amount: int = 1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def roll(self, rate: float) -> bool:
+        with self.lock:
+            return self.rng.random() < rate
+
+    def build_zip(self, zip_id: str) -> bytes:
+        # Deterministic per ZIP id, so retries download the same archive
+        rng = random.Random(zip_id)
+        output = io.BytesIO()
+        with zipfile.ZipFile(output, 'w', zipfile.ZIP_STORED) as archive:
+            for i in range(self.config.cards_per_zip):
+                archive.writestr(f"card-{i + 1}.png", rng.choice(self.cards))
+        return output.getvalue()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'GammaStandIn/1.0'
+
+    @property
+    def state(self) -> StandInState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self) -> bytes:
+        if 'chunked' in self.headers.get('Transfer-Encoding', '').lower():
+            # Large multipart uploads are streamed chunked by httpx
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0].strip(), 16)
+                if size == 0:
+                    while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                        pass
+                    return b''.join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _send(self, status: int, body: bytes, content_type: str = 'application/json', headers: Optional[Dict] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload, headers: Optional[Dict] = None):
+        self._send(status, json.dumps(payload).encode(), headers=headers)
+
+    def _sleep(self, latency_ms: float, jitter_ms: float = 0.0):
+        delay = latency_ms + (random.uniform(-jitter_ms, jitter_ms) if jitter_ms else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        body = self._read_body()
+        if path.endswith('/generations'):
+            self._generation()
+        elif path.startswith('/storage/v1/object/'):
+            self._upload(path[len('/storage/v1/object/'):], body)
+        elif path.startswith('/rest/v1/gamma_gallery'):
+            self._upsert_rows(body)
+        else:
+            self._send_json(404, {'error': {'message': f'Unknown endpoint {path}'}})
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path.startswith('/zips/'):
+            self._download(parsed.path[len('/zips/'):-len('.zip')])
+        elif parsed.path.startswith('/rest/v1/gamma_gallery'):
+            self._select_rows(parse_qs(parsed.query))
+        elif parsed.path == '/stats':
+            self._send_json(200, self.state.snapshot())
+        else:
+            self._send_json(404, {'error': {'message': f'Unknown endpoint {parsed.path}'}})
+
+    def _generation(self):
+        config = self.state.config
+        self._sleep(config.api_latency_ms, config.api_jitter_ms)
+        self.state.count('generations')
+
+        if self.state.roll(config.rate_limit_rate):
+            self.state.count('rate_limited')
+            self._send_json(429, {'error': {'message': 'Rate limit exceeded'}},
+                            headers={'Retry-After': str(config.retry_after_seconds)})
+            return
+        if self.state.roll(config.server_error_rate):
+            self.state.count('server_errors')
+            self._send_json(503, {'error': {'message': 'Service unavailable'}})
+            return
+
+        host = self.headers.get('Host')
+        self._send_json(200, {'zip_download_url': f"http://{host}/zips/{uuid.uuid4().hex}.zip", 'warnings': []})
+
+    def _download(self, zip_id: str):
+        self._sleep(self.state.config.download_latency_ms)
+        archive = self.state.build_zip(zip_id)
+        self.state.count('zips_served')
+        self.state.count('bytes_served', len(archive))
+        self._send(200, archive, content_type='application/zip')
+
+    def _upload(self, object_path: str, body: bytes):
+        self._sleep(self.state.config.storage_latency_ms)
+        with self.state.lock:
+            self.state.objects[object_path] = len(body)
+            self.state.stats['uploads'] += 1
+            self.state.stats['bytes_uploaded'] += len(body)
+        self._send_json(200, {'Key': object_path})
+
+    def _upsert_rows(self, body: bytes):
+        self._sleep(self.state.config.table_latency_ms)
+        payload = json.loads(body or b'[]')
+        rows = payload if isinstance(payload, list) else [payload]
+        with self.state.lock:
+            for row in rows:
+                self.state.rows[(row.get('original_gamma_url'), row.get('storage_path'))] = row
+            self.state.stats['row_writes'] += 1
+            self.state.stats['rows_stored'] = len(self.state.rows)
+        self._send_json(201, rows)
+
+    def _select_rows(self, query: Dict[str, List[str]]):
+        self._sleep(self.state.config.table_latency_ms)
+        columns = (query.get('select') or ['*'])[0].replace(' ', '').split(',')
+        offset = int((query.get('offset') or ['0'])[0])
+        limit = int((query.get('limit') or ['1000'])[0])
+        with self.state.lock:
+            rows = [row for row in self.state.rows.values() if row.get('content_hash')]
+        rows = rows[offset:offset + limit]
+        if columns != ['*']:
+            rows = [{column: row.get(column) for column in columns} for row in rows]
+        self._send_json(200, rows)
+
+
+class MigrationStandIns:
+    """Runs the stand-in HTTP server on a background thread"""
+
+    def __init__(self, config: Optional[StandInConfig] = None, host: str = '127.0.0.1', port: int = 0):
+        self.state = StandInState(config or StandInConfig())
+        self.server = ThreadingHTTPServer((host, port), StandInHandler)
+        self.server.daemon_threads = True
+        self.server.state = self.state
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MigrationStandIns':
+        self._thread = threading.Thread(target=self.server.serve_forever, name='gamma-standins', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def environment(self) -> Dict[str, str]:
+        """Environment variables that point GammaMigrator at these stand-ins"""
+        return {
+            'GAMMA_API_URL': f"{self.url}/v1/generations",
+            'GAMMA_API_KEY': 'standin-gamma-key',
+            'SUPABASE_URL': self.url,
+            # JWT-shaped so supabase-py accepts it
+            'SUPABASE_SERVICE_ROLE_KEY': 'standin.service.role'
+        }
+
+
+def add_standin_args(parser: argparse.ArgumentParser):
+    """Stand-in flags shared with the benchmark driver"""
+    parser.add_argument('--api-latency-ms', type=float, default=500.0)
+    parser.add_argument('--api-jitter-ms', type=float, default=100.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of generations answered 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds on 429')
+    parser.add_argument('--server-error-rate', type=float, default=0.0, help='Fraction of generations answered 503')
+    parser.add_argument('--download-latency-ms', type=float, default=50.0)
+    parser.add_argument('--storage-latency-ms', type=float, default=30.0)
+    parser.add_argument('--table-latency-ms', type=float, default=20.0)
+    parser.add_argument('--cards-per-zip', type=int, default=5)
+    parser.add_argument('--card-size', type=int, default=1080)
+    parser.add_argument('--distinct-cards', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=None)
+
+
+def config_from_args(args: argparse.Namespace) -> StandInConfig:
+    return StandInConfig(
+        api_latency_ms=args.api_latency_ms,
+        api_jitter_ms=args.api_jitter_ms,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after_seconds=args.retry_after,
+        server_error_rate=args.server_error_rate,
+        download_latency_ms=args.download_latency_ms,
+        storage_latency_ms=args.storage_latency_ms,
+        table_latency_ms=args.table_latency_ms,
+        cards_per_zip=args.cards_per_zip,
+        card_size=args.card_size,
+        distinct_cards=args.distinct_cards,
+        seed=args.seed
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline Gamma API and Supabase stand-ins')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787)
+    add_standin_args(parser)
+    args = parser.parse_args()
+
+    standins = MigrationStandIns(config_from_args(args), host=args.host, port=args.port)
+    print(f"🧪 Gamma/Supabase stand-ins listening on {standins.url}")
+    for name, value in standins.environment().items():
+        print(f"   export {name}={value}")
+    try:
+        standins.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Adaptive Token Bucket
+Description: Shared, thread-safe rate limiter for Gamma API calls that adapts to 429s (AIMD)
+Author: omniumai357
+Date: 2025-10-09
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+
+class AdaptiveTokenBucket:
+    """Token bucket whose refill rate grows additively on success and halves on throttling.
+
+    All workers share one bucket, so a 429 (and its Retry-After) pauses the whole
+    pool instead of only the thread that hit it.
+    """
+
+    def __init__(self, rate: float = 1.0, burst: int = 1, min_rate: float = 0.05,
+                 max_rate: float = 10.0, increase: float = 0.1, decrease: float = 0.5):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, rate)
+        self.increase = increase
+        self.decrease = decrease
+
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = float('-inf')
+        self._lock = threading.Lock()
+
+        self.acquired = 0
+        self.throttles = 0
+        self.wait_seconds = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self) -> float:
+        """Block until a token is available; returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    self.acquired += 1
+                    self.wait_seconds += waited
+                    return waited
+                else:
+                    delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def on_success(self):
+        """Additive increase after a call the API accepted."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        """Multiplicative decrease; honour Retry-After for every worker."""
+        with self._lock:
+            now = time.monotonic()
+            self.throttles += 1
+            # Workers already in flight report the same congestion; cut once per pause window
+            if now >= max(self._paused_until, self._last_decrease + 1 / self.rate):
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self._last_decrease = now
+            self._tokens = 0.0
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'rate_per_sec': round(self.rate, 3),
+                'acquired': self.acquired,
+                'throttles': self.throttles,
+                'wait_seconds': round(self.wait_seconds, 3)
+            }
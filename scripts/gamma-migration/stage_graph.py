@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Bounded Stage Graph
+Description: Linear producer/consumer pipeline with bounded queues and independently sized worker pools per stage
+Author: omniumai357
+Date: 2025-10-09
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+# Pseudo-stage name: items emitted here are yielded from StageGraph.run()
+OUTPUT = 'output'
+
+_CLOSE = object()
+
+
+@dataclass
+class _Stage:
+    name: str
+    handler: Callable[[Any, Callable], None]
+    workers: int
+    queue: 'queue.Queue'
+    threads: List[threading.Thread] = field(default_factory=list)
+    stats: Dict[str, float] = field(default_factory=lambda: {
+        'processed': 0, 'errors': 0, 'busy_seconds': 0.0, 'blocked_seconds': 0.0, 'max_queued': 0
+    })
+
+
+class StageGraph:
+    """Stages run in order, each with its own worker threads and a bounded input queue.
+
+    A handler receives (item, emit). emit(item) blocks while the next stage's queue is
+    full, so a slow stage holds back everything upstream of it instead of letting work
+    pile up in memory. emit(item, to=name) targets any later stage, and to=OUTPUT hands
+    the item back to the caller of run(). Stages shut down in order once the source is
+    exhausted and every upstream worker has exited.
+
+    When a handler raises, on_error(stage, item, error, emit) decides where the item goes,
+    using the failing stage's emit; it must route the item (or whatever owns it) to OUTPUT
+    eventually, or it never comes out of run(). Without on_error the item goes to OUTPUT as is.
+    """
+
+    def __init__(self, on_error: Optional[Callable[[str, Any, BaseException, Callable], None]] = None):
+        self._stages: List[_Stage] = []
+        self._by_name: Dict[str, _Stage] = {}
+        self._output: 'queue.Queue' = queue.Queue()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.on_error = on_error
+
+    def add_stage(self, name: str, handler: Callable[[Any, Callable], None], workers: int,
+                  capacity: Optional[int] = None) -> 'StageGraph':
+        workers = max(1, workers)
+        stage = _Stage(name, handler, workers, queue.Queue(maxsize=capacity or workers * 2))
+        self._stages.append(stage)
+        self._by_name[name] = stage
+        return self
+
+    def _put(self, stage: _Stage, item: Any, blocked_on: Optional[_Stage] = None):
+        start = time.perf_counter()
+        while not self._stopping.is_set():
+            try:
+                stage.queue.put(item, timeout=0.2)
+                break
+            except queue.Full:
+                continue
+        if blocked_on is not None:
+            waited = time.perf_counter() - start
+            with self._lock:
+                blocked_on.stats['blocked_seconds'] += waited
+                stage.stats['max_queued'] = max(stage.stats['max_queued'], stage.queue.qsize())
+
+    def _emitter(self, index: int) -> Callable:
+        current = self._stages[index]
+        default = self._stages[index + 1] if index + 1 < len(self._stages) else None
+
+        def emit(item: Any, to: Optional[str] = None):
+            if to == OUTPUT or (to is None and default is None):
+                self._output.put(item)
+                return
+            target = self._by_name[to] if to else default
+            if self._stages.index(target) <= index:
+                raise ValueError(f"Stage {current.name} can only emit to a later stage, not {target.name}")
+            self._put(target, item, blocked_on=current)
+
+        return emit
+
+    def _work(self, index: int):
+        stage = self._stages[index]
+        emit = self._emitter(index)
+        while True:
+            item = stage.queue.get()
+            if item is _CLOSE:
+                return
+            if self._stopping.is_set():
+                continue
+            start = time.perf_counter()
+            try:
+                stage.handler(item, emit)
+                failed = False
+            except BaseException as e:
+                failed = True
+                if self.on_error:
+                    self.on_error(stage.name, item, e, emit)
+                else:
+                    emit(item, to=OUTPUT)
+            with self._lock:
+                stage.stats['processed'] += 1
+                stage.stats['errors'] += 1 if failed else 0
+                stage.stats['busy_seconds'] += time.perf_counter() - start
+
+    def _feed(self, source: Iterable[Any]):
+        try:
+            for item in source:
+                if self._stopping.is_set():
+                    break
+                self._put(self._stages[0], item)
+        finally:
+            # Close each stage only after every worker upstream of it has exited
+            for stage in self._stages:
+                for _ in stage.threads:
+                    stage.queue.put(_CLOSE)
+                for thread in stage.threads:
+                    thread.join()
+            self._output.put(_CLOSE)
+
+    def run(self, source: Iterable[Any]) -> Iterator[Any]:
+        """Push source items through every stage, yielding items emitted to OUTPUT."""
+        if not self._stages:
+            raise ValueError("StageGraph has no stages")
+        for index, stage in enumerate(self._stages):
+            stage.threads = [
+                threading.Thread(target=self._work, args=(index,), name=f"stage-{stage.name}-{n}", daemon=True)
+                for n in range(stage.workers)
+            ]
+            for thread in stage.threads:
+                thread.start()
+        feeder = threading.Thread(target=self._feed, args=(source,), name='stage-feeder', daemon=True)
+        feeder.start()
+
+        try:
+            while True:
+                item = self._output.get()
+                if item is _CLOSE:
+                    break
+                yield item
+        finally:
+            if feeder.is_alive():
+                # Caller stopped early (error or Ctrl-C): drop queued work and let workers exit
+                self._stopping.set()
+                feeder.join()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                stage.name: {
+                    'workers': stage.workers,
+                    'capacity': stage.queue.maxsize,
+                    **{k: round(v, 3) if isinstance(v, float) else v for k, v in stage.stats.items()}
+                }
+                for stage in self._stages
+            }
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Gamma Migration Telemetry
+Description: Per-URL, per-stage timings, bytes, retries and peak RSS keyed by trace_id, with percentile summaries
+Author: omniumai357
+Date: 2025-10-09
+"""
+
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Pipeline order; 'total' is the wall time of the whole URL
+STAGES = ('api', 'download', 'extract', 'decode_resize', 'upload', 'metadata', 'total')
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far (image worker processes are not included)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def percentile_summary(samples: List[float]) -> Dict[str, float]:
+    """Nearest-rank p50/p90/p95/p99 plus mean and max."""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+
+    def rank(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 2)
+
+    return {
+        'count': len(ordered),
+        'mean': round(sum(ordered) / len(ordered), 2),
+        'p50': rank(0.50),
+        'p90': rank(0.90),
+        'p95': rank(0.95),
+        'p99': rank(0.99),
+        'max': round(ordered[-1], 2)
+    }
+
+
+class MigrationTelemetry:
+    """Thread-safe per-URL metrics shared by every migration worker.
+
+    Stage times are milliseconds of work attributed to the URL. Stages that run per card on
+    several threads or processes at once (extract, decode_resize, upload) are summed, so
+    they report the worker time a URL costs that stage rather than its wall time.
+    """
+
+    def __init__(self):
+        self.urls: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def start(self, trace_id: str, url: str):
+        with self._lock:
+            self.urls[trace_id] = {
+                'url': url,
+                'stages_ms': {},
+                'bytes': {'downloaded': 0, 'extracted': 0, 'uploaded': 0},
+                'retries': {'api': 0, 'upload': 0, 'metadata': 0},
+                'peak_rss_mb': None
+            }
+
+    def add_time(self, trace_id: str, stage: str, ms: float):
+        with self._lock:
+            record = self.urls.get(trace_id)
+            if record is not None:
+                record['stages_ms'][stage] = round(record['stages_ms'].get(stage, 0.0) + ms, 2)
+
+    def add_bytes(self, trace_id: str, kind: str, amount: int):
+        with self._lock:
+            record = self.urls.get(trace_id)
+            if record is not None:
+                record['bytes'][kind] += amount
+
+    def add_retries(self, trace_id: str, stage: str, count: int = 1):
+        if not count:
+            return
+        with self._lock:
+            record = self.urls.get(trace_id)
+            if record is not None:
+                record['retries'][stage] += count
+
+    @contextmanager
+    def stage(self, trace_id: str, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(trace_id, stage, (time.perf_counter() - start) * 1000)
+
+    def finish(self, trace_id: str, success: bool):
+        rss = peak_rss_mb()
+        with self._lock:
+            record = self.urls.get(trace_id)
+            if record is not None:
+                record['success'] = success
+                record['peak_rss_mb'] = rss
+
+    def summary(self) -> Dict:
+        """Percentiles per stage (ms), bytes and retries per URL, plus totals."""
+        with self._lock:
+            records = list(self.urls.values())
+
+        stages = {}
+        for stage in STAGES:
+            samples = [r['stages_ms'][stage] for r in records if stage in r['stages_ms']]
+            if samples:
+                stages[stage] = percentile_summary(samples)
+
+        return {
+            'urls': len(records),
+            'stages_ms': stages,
+            'bytes': {
+                kind: {**percentile_summary([r['bytes'][kind] for r in records]),
+                       'total': sum(r['bytes'][kind] for r in records)}
+                for kind in ('downloaded', 'extracted', 'uploaded')
+            },
+            'retries': {kind: sum(r['retries'][kind] for r in records) for kind in ('api', 'upload', 'metadata')},
+            'peak_rss_mb': peak_rss_mb()
+        }
@@ -1,14 +1,28 @@
 #!/usr/bin/env python3
 # SecretSweeper: Cursor Command for AdTopia - Hunts Hardcoded Tokens/APIs
-# Run: python secret_sweeper.py [path_to_scan] (default: .)
-# Outputs: Markdown report w/ flags & fixes. Ignores .env, node_modules, dist/.
+# Run: python secret_sweeper.py [path_to_scan] [--jobs N] [--mmap] [--no-cache] (default: ., one job per CPU)
+#      python secret_sweeper.py --history  (every blob in every commit, each scanned once)
+#      python secret_sweeper.py --staged   (added lines only; for .git/hooks/pre-commit)
+# Outputs: Markdown report w/ flags & fixes. Ignores .env, node_modules, dist/, binaries and files over 10 MB.
 
+import argparse
+import codecs
+import fnmatch
+import hashlib
+import heapq
+import json
+import mmap
 import os
 import re
 import sys
 import subprocess
+import threading
+import time
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import List, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 # OWASP-inspired patterns (2025 update: Covers OpenAI, Supabase, Vercel, AWS, etc.)
 SECRET_PATTERNS = {
@@ -23,6 +37,152 @@ SECRET_PATTERNS = {
     'Generic_API_KEY': r'(?i)(api[-_]?key|token|secret)[=:]\s*["\']?[a-zA-Z0-9]{20,}["\']?',  # Labeled keys
 }
 
+# Literals a match must contain (checked on the lowercased line when the pattern is case-insensitive).
+# Patterns without an entry (AWS_SECRET_KEY) have no fixed text and run on every candidate line.
+PATTERN_HINTS = {
+    'OpenAI_API_KEY': ('sk-',),
+    'Supabase_ANON_KEY': ('eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.',),
+    'Supabase_SERVICE_ROLE': ('eyJpc3N1ZXIiOmZhbHNlLCJyb2xlIjoiYXV0aC5hZG1pbiJ9.',),
+    'Vercel_TOKEN': ('vercel_',),
+    'AWS_ACCESS_KEY': ('AKIA',),
+    'Gamma_API_KEY': ('gamma_',),
+    'Generic_JWT': ('eyJ',),
+    'Generic_API_KEY': ('api', 'token', 'secret'),
+}
+
+# Whole-buffer scans read at most this much of a file into memory at a time
+WINDOW_BYTES = 1 << 20
+
+def single_line_pattern(pattern: str) -> str:
+    """Stop \\s and . (outside character classes) from matching line breaks in whole-buffer scans."""
+    out, i, in_class = [], 0, False
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\' and i + 1 < len(pattern):
+            escape = pattern[i:i + 2]
+            out.append(r'[^\S\r\n]' if escape == r'\s' and not in_class else escape)
+            i += 2
+            continue
+        if in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == '.':
+            char = r'[^\r\n]'
+        out.append(char)
+        i += 1
+    return ''.join(out)
+
+def _has_any(literals: Tuple[bytes, ...]) -> Callable[[bytes], bool]:
+    return lambda buf: any(buf.find(literal) != -1 for literal in literals)
+
+def _has_any_folded(literals: Tuple[bytes, ...]) -> Callable[[bytes], bool]:
+    """Case-insensitive _has_any: lowercases one window at a time (overlapping by a literal's length)."""
+    overlap = max(len(literal) for literal in literals) - 1
+
+    def present(buf) -> bool:
+        for lo in range(0, len(buf), WINDOW_BYTES):
+            window = buf[lo:lo + WINDOW_BYTES + overlap].lower()
+            if any(literal in window for literal in literals):
+                return True
+        return False
+
+    return present
+
+def count_line_breaks(buf, start: int, end: int) -> int:
+    """Line breaks in buf[start:end] as text-mode universal newlines sees them (\\n, \\r\\n or a lone \\r)."""
+    count = 0
+    for lo in range(start, end, WINDOW_BYTES):
+        window = buf[lo:min(end, lo + WINDOW_BYTES)]
+        count += window.count(b'\n') + window.count(b'\r') - window.count(b'\r\n')
+        # A \r\n split across two windows was counted once for each half
+        if window.endswith(b'\r') and lo + len(window) < end and buf[lo + len(window):lo + len(window) + 1] == b'\n':
+            count -= 1
+    return count
+
+class SecretMatcher:
+    """SECRET_PATTERNS compiled once, with a literal prefilter per file.
+
+    A pattern only runs on a file whose text contains one of its hint literals, so a
+    typical file runs AWS_SECRET_KEY plus whichever patterns it has candidates for
+    instead of all nine on every line. Each active pattern keeps its own finditer,
+    so overlapping matches from different patterns are reported exactly as before.
+    """
+
+    def __init__(self, patterns: Dict[str, str], hints: Optional[Dict[str, Tuple[str, ...]]] = None):
+        hints = PATTERN_HINTS if hints is None else hints
+        self.compiled = [(name, re.compile(pattern), hints.get(name)) for name, pattern in patterns.items()]
+        self.compiled_bytes = []
+        for name, pattern, hint in self.compiled:
+            compiled = re.compile(single_line_pattern(pattern.pattern).encode())
+            if not hint:
+                present = None
+            elif compiled.flags & re.IGNORECASE:
+                present = _has_any_folded(tuple(h.lower().encode() for h in hint))
+            else:
+                present = _has_any(tuple(h.encode() for h in hint))
+            self.compiled_bytes.append((name, compiled, present))
+
+    def active(self, text: str) -> List[Tuple[str, 're.Pattern']]:
+        """Patterns that can match somewhere in text, in SECRET_PATTERNS order."""
+        lowered = None
+        active = []
+        for name, pattern, hint in self.compiled:
+            if hint:
+                haystack = text
+                if pattern.flags & re.IGNORECASE:
+                    lowered = lowered if lowered is not None else text.lower()
+                    haystack = lowered
+                if not any(literal in haystack for literal in hint):
+                    continue
+            active.append((name, pattern))
+        return active
+
+    def scan_text(self, text: str) -> Iterator[Tuple[str, str, int]]:
+        """Yield (pattern_name, match, line_num) in line order, then SECRET_PATTERNS order."""
+        active = self.active(text)
+        if not active:
+            return
+        for line_num, line in enumerate(text.split('\n'), 1):
+            for name, pattern in active:
+                for match in pattern.finditer(line):
+                    yield name, match.group(0), line_num
+
+    def scan_lines(self, lines: List[Tuple[int, str]]) -> Iterator[Tuple[str, str, int]]:
+        """scan_text for (line_num, line) pairs that are not contiguous, such as diff hunks."""
+        active = self.active('\n'.join(line for _, line in lines))
+        for line_num, line in lines:
+            for name, pattern in active:
+                for match in pattern.finditer(line):
+                    yield name, match.group(0), line_num
+
+    def scan_buffer(self, buf) -> Iterator[Tuple[str, str, int]]:
+        """Same findings as scan_text over raw bytes (e.g. an mmap), without splitting lines.
+
+        Patterns run over the whole buffer. Line numbers are only worked out for matches,
+        by counting line breaks between consecutive match offsets.
+        """
+        hits = []
+        for index, (name, pattern, present) in enumerate(self.compiled_bytes):
+            if present is not None and not present(buf):
+                continue
+            hits.extend((m.start(), index, name, m.group(0)) for m in pattern.finditer(buf))
+        if not hits:
+            return
+
+        hits.sort()
+        located = []
+        line_num, offset = 1, 0
+        for start, index, name, match in hits:
+            line_num += count_line_breaks(buf, offset, start)
+            offset = start
+            located.append((line_num, index, start, name, match))
+        located.sort()
+        for line_num, _, _, name, match in located:
+            yield name, match.decode('utf-8', errors='ignore'), line_num
+
+SECRET_MATCHER = SecretMatcher(SECRET_PATTERNS)
+
 # Ignore paths (AdTopia-specific: Skip builds, envs, uploads, docs, outputs)
 IGNORE_PATHS = {
     '.env*', 'node_modules/', 'dist/', 'build/', '.git/', 'uploads/', '*.log', 'gamma-exports/',
@@ -30,18 +190,49 @@ IGNORE_PATHS = {
     '__pycache__/', '*.pyc', '*.json', '*.txt', '*.yml', '*.yaml', '.cursor/', 'supabase/migrations/'
 }
 
-def is_ignored(path: Path) -> bool:
+class IgnoreMatcher:
+    """IGNORE_PATHS compiled into one regex over root-relative, '/'-separated paths.
+
+    Each entry ignores paths that start with it, and entries containing '*' are also
+    fnmatch globs over the whole relative path (so '*.md' matches at any depth),
+    exactly as the old per-path loop treated them.
+    """
+
+    def __init__(self, patterns=IGNORE_PATHS):
+        alternatives = []
+        for pattern in sorted(patterns):
+            alternatives.append(re.escape(pattern))
+            if '*' in pattern:
+                alternatives.append(fnmatch.translate(pattern))
+        self.regex = re.compile('|'.join(f'(?:{alt})' for alt in alternatives))
+
+    def match(self, rel_path: str) -> bool:
+        return self.regex.match(rel_path) is not None
+
+    def filter(self, files: List[Path], root: Path) -> List[Path]:
+        """Drop ignored files from a list of paths under root, without touching the filesystem."""
+        prefix = len(str(root)) + 1
+        match = self.regex.match
+        if os.sep == '/':
+            return [path for path in files if not match(str(path)[prefix:])]
+        return [path for path in files if not match(str(path)[prefix:].replace(os.sep, '/'))]
+
+IGNORE_MATCHER = IgnoreMatcher()
+
+def is_ignored(path: Path, root: Optional[Path] = None) -> bool:
     """Check if file/path should be skipped."""
-    rel_path = path.relative_to(Path.cwd())
-    for ignore in IGNORE_PATHS:
-        if str(rel_path).startswith(ignore):
-            return True
-        # Handle glob patterns safely
-        if '*' in ignore:
-            import fnmatch
-            if fnmatch.fnmatch(str(rel_path), ignore):
-                return True
-    return False
+    rel_path = path.relative_to(root or Path.cwd()) if path.is_absolute() else path
+    return IGNORE_MATCHER.match(rel_path.as_posix())
+
+def walk_files(root: Path, matcher: IgnoreMatcher = IGNORE_MATCHER) -> List[Path]:
+    """Files under root minus ignored ones; ignored directories are pruned, not walked."""
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = Path(dirpath).relative_to(root).as_posix()
+        rel_dir = '' if rel_dir == '.' else rel_dir + '/'
+        dirnames[:] = [d for d in dirnames if not matcher.match(f"{rel_dir}{d}/")]
+        files.extend(Path(dirpath) / name for name in filenames if not matcher.match(rel_dir + name))
+    return files
 
 def get_git_tracked_files(root: Path = Path('.')) -> List[Path]:
     """Fetch only git-tracked files (faster, secure)."""
@@ -49,44 +240,412 @@ def get_git_tracked_files(root: Path = Path('.')) -> List[Path]:
         result = subprocess.run(['git', 'ls-files'], cwd=root, capture_output=True, text=True)
         if result.returncode != 0:
             print("Warning: Git not detected—falling back to full scan.")
-            return [p for p in root.rglob('*') if p.is_file() and not is_ignored(p)]
+            return walk_files(root)
         return [root / f for f in result.stdout.strip().split('\n') if f]
     except Exception:
-        return [p for p in root.rglob('*') if p.is_file() and not is_ignored(p)]
+        return walk_files(root)
+
+def get_git_blob_shas(root: Path = Path('.')) -> Dict[str, str]:
+    """Map path -> index blob SHA for tracked files whose working copy matches the index."""
+    def ls_files(*args: str) -> List[str]:
+        result = subprocess.run(['git', 'ls-files', '-z', *args], cwd=root, capture_output=True, text=True)
+        return [entry for entry in result.stdout.split('\0') if entry] if result.returncode == 0 else []
+
+    # Modified or deleted files have no blob for their current content; they are always rescanned
+    changed = set(ls_files('-m'))
+    blobs = {}
+    for entry in ls_files('-s'):
+        meta, _, path = entry.partition('\t')
+        _, sha, stage = meta.split()
+        if stage == '0' and path not in changed:
+            blobs[str(root / path)] = sha
+    return blobs
+
+# Bump when the matching engine changes what it reports, so cached findings are dropped
+# (3: cached matches are redacted)
+ENGINE_VERSION = 3
+
+# Leading characters of a match shown in reports and kept in the cache; the rest is never stored
+REDACT_PREFIX = 10
+
+def redact_match(match: str) -> str:
+    """Report prefix plus a SHA-256 of the full match: enough to tell keys apart, useless as a key."""
+    return f"{match[:REDACT_PREFIX]}…sha256:{hashlib.sha256(match.encode()).hexdigest()}"
+
+def patterns_version(patterns: Dict[str, str] = SECRET_PATTERNS) -> str:
+    payload = json.dumps({'engine': ENGINE_VERSION, 'patterns': patterns}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+class ScanCache:
+    """Findings per git blob SHA, valid for one pattern-set version.
+
+    A blob's content never changes, so its findings can be reused until
+    SECRET_PATTERNS (or the engine) changes, at which point the whole cache is dropped.
+    Matches are stored redacted (redact_match) and the file is private to the owner, so the
+    cache never becomes a second copy of the credentials it found.
+    """
+
+    def __init__(self, path: Path, version: str):
+        self.path = path
+        self.version = version
+        self.blobs: Dict[str, List[Tuple[str, str, int]]] = {}
+        self.hits = 0
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if data.get('version') == version:
+                self.blobs = {sha: [tuple(finding) for finding in findings] for sha, findings in data['blobs'].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            pass  # Missing or unreadable cache: start empty
+
+    def get(self, sha: str) -> Optional[List[Tuple[str, str, int]]]:
+        findings = self.blobs.get(sha)
+        if findings is not None:
+            self.hits += 1
+        return findings
+
+    def put(self, sha: str, findings: List[Tuple[str, str, int]]):
+        self.blobs[sha] = [(pattern_name, redact_match(match), line_num) for pattern_name, match, line_num in findings]
+
+    def save(self, keep: set):
+        """Write entries for blobs still in the tree (atomically, so a killed run cannot corrupt it)."""
+        blobs = {sha: findings for sha, findings in self.blobs.items() if sha in keep}
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        try:
+            if tmp_path.exists():
+                tmp_path.unlink()  # A leftover could carry looser permissions
+            with os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'w') as f:
+                json.dump({'version': self.version, 'blobs': blobs}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Warning: could not write scan cache {self.path}: {e}")
 
-def scan_file(file_path: Path, patterns: dict) -> List[Tuple[str, str, int]]:
+def default_cache_path(root: Path, mode: str = '') -> Path:
+    """Inside .git when available, so the cache is per clone and never committed."""
+    result = subprocess.run(['git', 'rev-parse', '--git-dir'], cwd=root, capture_output=True, text=True)
+    git_dir = (root / result.stdout.strip()) if result.returncode == 0 else root
+    # Working-tree and history scans prune to different blob sets, so each keeps its own file
+    return git_dir / (f'secret_sweeper_{mode}_cache.json' if mode else 'secret_sweeper_cache.json')
+
+# Files (and history blobs) larger than this are skipped: generated bundles, dumps, vendored binaries
+MAX_SCAN_BYTES = 10 << 20
+# Leading bytes sniffed for a NUL, the same binary test git diff uses
+SNIFF_BYTES = 8000
+
+def looks_binary(head: bytes) -> bool:
+    return b'\0' in head[:SNIFF_BYTES]
+
+def scan_file(file_path: Path, patterns: Union[dict, SecretMatcher] = SECRET_MATCHER,
+              use_mmap: bool = False) -> List[Tuple[str, str, int]]:
     """Scan single file for secrets, return (pattern_name, match, line_num)."""
-    findings = []
+    matcher = patterns if isinstance(patterns, SecretMatcher) else (
+        SECRET_MATCHER if patterns is SECRET_PATTERNS else SecretMatcher(patterns))
+    if use_mmap:
+        return scan_file_mmap(file_path, matcher)
+    try:
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size > MAX_SCAN_BYTES:
+                return []
+            head = f.read(SNIFF_BYTES)
+            if looks_binary(head):
+                return []
+            text = (head + f.read()).decode('utf-8', errors='ignore')
+    except Exception:
+        return []  # Unreadable
+    if '\r' in text:
+        # Universal newlines, as text-mode reading did, so line numbers are unchanged
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return list(matcher.scan_text(text))
+
+def scan_file_mmap(file_path: Path, matcher: SecretMatcher = SECRET_MATCHER) -> List[Tuple[str, str, int]]:
+    """Memory-map the file and run bytes patterns over it; no per-line strings are created."""
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            for line_num, line in enumerate(f, 1):
-                for name, pattern in patterns.items():
-                    matches = re.finditer(pattern, line)
-                    for match in matches:
-                        findings.append((name, match.group(0), line_num))
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0 or size > MAX_SCAN_BYTES:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                if looks_binary(buf[:SNIFF_BYTES]):
+                    return []
+                return list(matcher.scan_buffer(buf))
     except Exception:
-        pass  # Skip binary/non-text
+        return []  # Unreadable or unmappable (e.g. special files)
+
+# Below this many files a process pool costs more to start than it saves
+PARALLEL_MIN_FILES = 64
+
+Finding = Tuple[str, str, str, int]  # (file_path, pattern_name, match, line_num)
+
+def chunk_by_size(files: List[Path], chunks: int) -> List[List[Tuple[int, str]]]:
+    """Spread (index, path) pairs over `chunks` bins of roughly equal total bytes, largest files first."""
+    def size(path: Path) -> int:
+        try:
+            return path.stat().st_size
+        except OSError:
+            return 0
+
+    bins: List[List[Tuple[int, str]]] = [[] for _ in range(max(1, chunks))]
+    heap = [(0, n) for n in range(len(bins))]
+    for index, path, nbytes in sorted(((i, p, size(p)) for i, p in enumerate(files)), key=lambda item: -item[2]):
+        total, n = heapq.heappop(heap)
+        bins[n].append((index, str(path)))
+        heapq.heappush(heap, (total + nbytes, n))
+    return [chunk for chunk in bins if chunk]
+
+def _scan_chunk(chunk: List[Tuple[int, str]], use_mmap: bool = False) -> List[Tuple[int, List[Tuple[str, str, int]]]]:
+    return [(index, findings) for index, path in chunk
+            for findings in [scan_file(Path(path), use_mmap=use_mmap)] if findings]
+
+def scan_files(files: List[Path], jobs: Optional[int] = None, use_mmap: bool = False,
+               cache: Optional[ScanCache] = None, blobs: Optional[Dict[str, str]] = None) -> List[Finding]:
+    """Scan files across `jobs` processes; findings come back in file-list order whatever finishes first.
+
+    With a cache, files whose blob SHA is already cached are not opened at all.
+    """
+    results: List[Tuple[int, List[Tuple[str, str, int]]]] = []
+    pending = list(range(len(files)))
+    if cache is not None and blobs:
+        pending = []
+        for index, file_path in enumerate(files):
+            cached = cache.get(blobs[str(file_path)]) if str(file_path) in blobs else None
+            if cached is None:
+                pending.append(index)
+            elif cached:
+                results.append((index, cached))
+
+    scanned = _scan_indexed([files[index] for index in pending], jobs, use_mmap)
+    results.extend((pending[index], findings) for index, findings in scanned)
+
+    if cache is not None and blobs:
+        found = dict(scanned)
+        for index, original in enumerate(pending):
+            sha = blobs.get(str(files[original]))
+            if sha:
+                cache.put(sha, found.get(index, []))
+
+    results.sort(key=lambda item: item[0])
+    return [(str(files[index]), *finding) for index, findings in results for finding in findings]
+
+def _scan_indexed(files: List[Path], jobs: Optional[int] = None,
+                  use_mmap: bool = False) -> List[Tuple[int, List[Tuple[str, str, int]]]]:
+    """(index, findings) for every file in `files` that has findings."""
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(files) < PARALLEL_MIN_FILES:
+        results = _scan_chunk(list(enumerate(map(str, files))), use_mmap)
+    else:
+        # Several chunks per process so one huge file does not leave the other processes idle
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            scan = partial(_scan_chunk, use_mmap=use_mmap)
+            results = [item for chunk in pool.map(scan, chunk_by_size(files, jobs * 4)) for item in chunk]
+    return results
+
+# Blobs queued between the rev-list reader and the scanner; bounds memory however large the history is
+HISTORY_QUEUE_SIZE = 256
+PROGRESS_SECONDS = 2.0
+
+def iter_history_objects(root: Path, include: Callable[[str], bool],
+                         known: Callable[[str], bool]) -> Iterator[Tuple[str, str, Optional[bytes]]]:
+    """Yield (sha, path, content) for every blob reachable from any ref, each SHA once.
+
+    git rev-list already lists an object only the first time it is reached, so a blob shared by
+    thousands of commits comes through once, under the first path it was seen at. Contents are read
+    from one long-lived git cat-file --batch process; a feeder thread writes SHAs to it while this
+    generator reads the replies, with a bounded queue between them keeping the two in step.
+    Blobs whose path fails include(path) are dropped; blobs for which known(sha) is true (already
+    cached) are not fetched and come through with content None.
+    """
+    rev_list = subprocess.Popen(['git', 'rev-list', '--objects', '--all', '--filter=object:type=blob'],
+                                cwd=root, stdout=subprocess.PIPE, text=True)
+    cat_file = subprocess.Popen(['git', 'cat-file', '--batch'], cwd=root,
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    pending: 'queue.Queue' = queue.Queue(maxsize=HISTORY_QUEUE_SIZE)
+    stopping = threading.Event()
+
+    def feed():
+        try:
+            for line in rev_list.stdout:
+                if stopping.is_set():
+                    break
+                sha, _, path = line.rstrip('\n').partition(' ')
+                if not path:
+                    continue  # Commits are listed without a path
+                if not include(path):
+                    continue
+                fetch = not known(sha)
+                pending.put((sha, path, fetch))
+                if fetch:
+                    cat_file.stdin.write(sha.encode() + b'\n')
+                    cat_file.stdin.flush()
+        except (BrokenPipeError, ValueError):
+            pass  # cat-file went away because the consumer stopped early
+        finally:
+            pending.put(None)
+            try:
+                cat_file.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    feeder = threading.Thread(target=feed, name='history-feeder', daemon=True)
+    feeder.start()
+    try:
+        while True:
+            item = pending.get()
+            if item is None:
+                break
+            sha, path, fetch = item
+            if not fetch:
+                yield sha, path, None
+                continue
+            header = cat_file.stdout.readline().split()
+            if len(header) != 3:
+                continue  # '<sha> missing' (e.g. a shallow or partial clone)
+            _, kind, size = header[0], header[1].decode(), int(header[2])
+            if kind != 'blob' or size > MAX_SCAN_BYTES:
+                # Drain the body in slices so an oversized blob is never held whole
+                remaining = size + 1
+                while remaining:
+                    remaining -= len(cat_file.stdout.read(min(remaining, WINDOW_BYTES)))
+                continue
+            content = cat_file.stdout.read(size)
+            cat_file.stdout.read(1)  # Trailing newline after each object
+            yield sha, path, content
+    finally:
+        stopping.set()
+        finished = rev_list.poll() is not None
+        # Stop git first (a feeder blocked writing to cat-file then gets a broken pipe),
+        # then drain the queue in case the feeder is waiting on a full one
+        for process in (rev_list, cat_file):
+            if process.poll() is None:
+                process.terminate()
+        while feeder.is_alive():
+            try:
+                pending.get_nowait()
+            except queue.Empty:
+                feeder.join(timeout=0.1)
+        for process in (rev_list, cat_file):
+            process.wait()
+        if finished and rev_list.returncode != 0:
+            print(f"Warning: git rev-list exited with {rev_list.returncode}; history scan may be incomplete.")
+
+def scan_history(root: Path, cache: Optional[ScanCache] = None) -> List[Finding]:
+    """Scan every unique blob in the repository history; findings are reported as path@blob."""
+    include = lambda path: not IGNORE_MATCHER.match(path)
+    known = lambda sha: cache is not None and sha in cache.blobs
+
+    findings: List[Finding] = []
+    seen = scanned = nbytes = 0
+    last_progress = time.monotonic()
+    for sha, path, content in iter_history_objects(root, include, known):
+        seen += 1
+        if content is None:
+            blob_findings = cache.get(sha)
+        else:
+            blob_findings = [] if looks_binary(content) else list(SECRET_MATCHER.scan_buffer(content))
+            scanned += 1
+            nbytes += len(content)
+            if cache is not None:
+                cache.put(sha, blob_findings)
+        findings.extend((f"{path}@{sha[:12]}", *finding) for finding in blob_findings)
+
+        if time.monotonic() - last_progress >= PROGRESS_SECONDS:
+            last_progress = time.monotonic()
+            print(f"  … {seen} blobs seen, {scanned} scanned ({nbytes / 1e6:.1f} MB), {len(findings)} findings so far")
+
+    print(f"Scanned {scanned} of {seen} unique history blobs ({nbytes / 1e6:.1f} MB).")
+    return findings
+
+_HUNK_HEADER = re.compile(rb'^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@')
+
+def _diff_path(raw: bytes) -> str:
+    """Path from a '+++ b/<path>' header; git C-quotes paths with unusual characters."""
+    path = raw.rstrip(b'\r\n')
+    if path.endswith(b'\t'):
+        path = path[:-1]  # Appended after names containing spaces
+    if path.startswith(b'"') and path.endswith(b'"'):
+        path = codecs.escape_decode(path[1:-1])[0]
+    return path.decode('utf-8', errors='replace')[2:]
+
+def iter_staged_additions(root: Path) -> Iterator[Tuple[str, List[Tuple[int, str]]]]:
+    """Yield (path, [(line_num, line), ...]) of added lines per staged file, read from the diff as it streams.
+
+    -U0 leaves only changed lines in each hunk, and the +N in the hunk header numbers them in
+    the staged version of the file. Deleted files and binary diffs carry no added lines.
+    --relative limits the diff to root and makes paths relative to it, as in the other modes.
+    """
+    diff = subprocess.Popen(['git', '-c', 'core.quotepath=off', 'diff', '--cached', '--relative', '-U0',
+                             '--no-color', '--no-ext-diff', '--no-textconv', '--diff-filter=d'],
+                            cwd=root, stdout=subprocess.PIPE)
+    path, added, line_num, in_hunk = None, [], 0, False
+    try:
+        for raw in diff.stdout:
+            if raw.startswith(b'diff --git '):
+                if path and added:
+                    yield path, added
+                path, added, in_hunk = None, [], False
+            elif not in_hunk and raw.startswith(b'+++ '):
+                path = None if raw.startswith(b'+++ /dev/null') else _diff_path(raw[4:])
+            elif raw.startswith(b'@@'):
+                header = _HUNK_HEADER.match(raw)
+                line_num, in_hunk = (int(header.group(1)), True) if header else (0, False)
+            elif in_hunk and raw.startswith(b'+'):
+                # '+++foo' inside a hunk is an added line starting with '++', not a header
+                added.append((line_num, raw[1:].rstrip(b'\r\n').decode('utf-8', errors='ignore')))
+                line_num += 1
+        if path and added:
+            yield path, added
+    finally:
+        if diff.poll() is None:
+            diff.terminate()
+        diff.wait()
+
+def scan_staged(root: Path) -> List[Finding]:
+    """Findings in lines added by the staged changes, reported against the working-tree path."""
+    findings: List[Finding] = []
+    for path, added in iter_staged_additions(root):
+        if IGNORE_MATCHER.match(path):
+            continue
+        findings.extend((str(root / path), *finding) for finding in SECRET_MATCHER.scan_lines(added))
     return findings
 
-def main(scan_path: str = '.'):
+def main(scan_path: str = '.', jobs: Optional[int] = None, use_mmap: bool = False, use_cache: bool = True,
+         history: bool = False, staged: bool = False):
     root = Path(scan_path).resolve()
     if not root.exists():
         print(f"Error: Path {scan_path} not found.")
         sys.exit(1)
 
+    if staged:
+        print("🔍 SecretSweeper: Checking staged changes for hardcoded tokens...")
+        report(scan_staged(root))
+        return
+
+    if history:
+        print("🔍 SecretSweeper: Auditing every commit of AdTopia history for hardcoded tokens...")
+        cache = ScanCache(default_cache_path(root, 'history'), patterns_version()) if use_cache else None
+        all_findings = scan_history(root, cache)
+        if cache is not None:
+            print(f"♻️  {cache.hits} history blobs served from cache ({cache.path})")
+            cache.save(set(cache.blobs))
+        report(all_findings, history=True)
+        return
+
     print("🔍 SecretSweeper: Auditing AdTopia codebase for hardcoded tokens...")
     files = get_git_tracked_files(root)
     print(f"Scanning {len(files)} git-tracked files...")
 
-    all_findings = []
-    for file_path in files:
-        if is_ignored(file_path):
-            continue
-        findings = scan_file(file_path, SECRET_PATTERNS)
-        if findings:
-            all_findings.extend([(str(file_path), *finding) for finding in findings])
+    files = IGNORE_MATCHER.filter(files, root)
+    cache, blobs = None, None
+    if use_cache:
+        blobs = get_git_blob_shas(root)
+        if blobs:
+            cache = ScanCache(default_cache_path(root), patterns_version())
+    all_findings = scan_files(files, jobs, use_mmap, cache, blobs)
+    if cache is not None:
+        print(f"♻️  {cache.hits}/{len(files)} unchanged files served from cache ({cache.path})")
+        cache.save(set(blobs.values()))
+    report(all_findings)
 
-    # Report
+def report(all_findings: List[Finding], history: bool = False):
     print("\n--- AUDIT REPORT ---")
     if not all_findings:
         print("✅ EMPIRE SECURE: No hardcoded secrets detected! $600K ARR vault locked.")
@@ -94,12 +653,18 @@ def main(scan_path: str = '.'):
 
     print(f"⚠️  {len(all_findings)} POTENTIAL LEAKS FOUND:")
     for file_path, pattern_name, match, line_num in all_findings:
-        print(f"  - File: {file_path} (Line {line_num})\n    Pattern: {pattern_name}\n    Match: {match[:20]}... [REDACTED]\n    Fix: Migrate to .env (e.g., process.env.OPENAI_API_KEY) & git rm --cached {file_path}")
+        if history:
+            # Already committed: the key has to be rotated, removing the file is not enough
+            blob = file_path.rpartition('@')[2]
+            fix = f"Rotate the key; commits containing it: git log --all --find-object={blob}"
+        else:
+            fix = f"Migrate to .env (e.g., process.env.OPENAI_API_KEY) & git rm --cached {file_path}"
+        print(f"  - File: {file_path} (Line {line_num})\n    Pattern: {pattern_name}\n    Match: {match[:REDACT_PREFIX]}... [REDACTED]\n    Fix: {fix}")
 
     # Markdown export for Cursor notes
     report_md = "# AdTopia Secret Audit Report\n\n## Findings\n"
     for file_path, pattern_name, match, line_num in all_findings:
-        report_md += f"- **{file_path}:{line_num}** ({pattern_name}): `{match[:10]}...` → [.env migrate]\n"
+        report_md += f"- **{file_path}:{line_num}** ({pattern_name}): `{match[:REDACT_PREFIX]}...` → [.env migrate]\n"
     report_md += "\n## Next: Run `git add .env.example` & commit fixes."
     with open('secret_audit.md', 'w') as f:
         f.write(report_md)
@@ -108,4 +673,12 @@ def main(scan_path: str = '.'):
     sys.exit(1 if all_findings else 0)
 
 if __name__ == '__main__':
-    main(sys.argv[1] if len(sys.argv) > 1 else '.')
+    parser = argparse.ArgumentParser(description='SecretSweeper: hunt hardcoded tokens/APIs')
+    parser.add_argument('path', nargs='?', default='.', help='Path to scan (default: .)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Scanner processes (default: CPU count; 1 = serial)')
+    parser.add_argument('--mmap', action='store_true', help='Memory-map files and scan whole buffers (fast on large generated files)')
+    parser.add_argument('--no-cache', action='store_true', help='Rescan every file instead of reusing findings for unchanged git blobs')
+    parser.add_argument('--history', action='store_true', help='Scan every blob reachable from any ref instead of the working tree')
+    parser.add_argument('--staged', action='store_true', help='Scan only lines added in the staged diff (pre-commit hook)')
+    args = parser.parse_args()
+    main(args.path, args.jobs, args.mmap, not args.no_cache, args.history, args.staged)
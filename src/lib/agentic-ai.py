@@ -2,10 +2,17 @@
 
 import requests
 import os
+import sys
 import json
+from pathlib import Path
 from typing import Dict, List, Optional
 from dataclasses import dataclass, asdict
 
+# scripts/_repo_path puts the shared agent helpers at the repo root on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'scripts'))
+import _repo_path  # noqa: F401
+from agent_telemetry import telemetry
+
 @dataclass
 class LeadOptimization:
     lead_id: str
@@ -27,6 +34,22 @@ class AdTopiaAgent:
         if not all([self.openai_api_key, self.supabase_url, self.supabase_key]):
             raise ValueError("Missing required environment variables")
     
+    def _openai_chat(self, endpoint: str, payload: Dict) -> requests.Response:
+        """POST a chat completion with latency/token telemetry"""
+        with telemetry.track('openai', endpoint) as call:
+            response = requests.post(
+                'https://api.openai.com/v1/chat/completions',
+                headers={
+                    'Authorization': f'Bearer {self.openai_api_key}',
+                    'Content-Type': 'application/json'
+                },
+                json=payload
+            )
+            call.error = response.status_code != 200
+            if not call.error:
+                call.add_usage(response.json().get('usage'), payload.get('model'))
+        return response
+    
     def analyze_lead_for_optimization(self, lead_data: Dict) -> LeadOptimization:
         """AI analyzes lead and determines optimal strategy (like R Movers $99 success)"""
         
@@ -56,19 +79,12 @@ class AdTopiaAgent:
         }}
         """
         
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {self.openai_api_key}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': 'gpt-4o',
-                'messages': [{'role': 'user', 'content': optimization_prompt}],
-                'temperature': 0.7,
-                'max_tokens': 500
-            }
-        )
+        response = self._openai_chat('chat.completions:optimize_lead', {
+            'model': 'gpt-4o',
+            'messages': [{'role': 'user', 'content': optimization_prompt}],
+            'temperature': 0.7,
+            'max_tokens': 500
+        })
         
         if response.status_code != 200:
             raise Exception(f"OpenAI API error: {response.status_code}")
@@ -107,19 +123,12 @@ class AdTopiaAgent:
         }}
         """
         
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {self.openai_api_key}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': 'gpt-4o',
-                'messages': [{'role': 'user', 'content': generation_prompt}],
-                'temperature': 0.8,
-                'max_tokens': 300
-            }
-        )
+        response = self._openai_chat('chat.completions:gamma_generation', {
+            'model': 'gpt-4o',
+            'messages': [{'role': 'user', 'content': generation_prompt}],
+            'temperature': 0.8,
+            'max_tokens': 300
+        })
         
         return json.loads(response.json()['choices'][0]['message']['content'])
     
@@ -138,15 +147,17 @@ class AdTopiaAgent:
             'agent_version': '1.0.0'
         }
         
-        response = requests.post(
-            f'{self.supabase_url}/rest/v1/ai_optimizations',
-            headers={
-                'Authorization': f'Bearer {self.supabase_key}',
-                'Content-Type': 'application/json',
-                'apikey': self.supabase_key
-            },
-            json=tracking_data
-        )
+        with telemetry.track('supabase', 'ai_optimizations.insert') as call:
+            response = requests.post(
+                f'{self.supabase_url}/rest/v1/ai_optimizations',
+                headers={
+                    'Authorization': f'Bearer {self.supabase_key}',
+                    'Content-Type': 'application/json',
+                    'apikey': self.supabase_key
+                },
+                json=tracking_data
+            )
+            call.error = response.status_code != 201
         
         return response.status_code == 201
 
@@ -186,5 +197,8 @@ def replicate_r_movers_success():
     return False
 
 if __name__ == "__main__":
+    telemetry_path = telemetry.start_from_env()
     success = replicate_r_movers_success()
+    if telemetry_path:
+        telemetry.stop_periodic_dump(telemetry_path)
     print(f"✅ R Movers replication: {'SUCCESS' if success else 'NEEDS_REVIEW'}")
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+AdTopia Staged Executor
+Pipelined async execution with per-stage worker pools and bounded queues
+
+Instead of running every stage for item N before starting item N+1, each
+stage gets its own workers and a bounded input queue. Item N+1 can be in
+stage 1 while item N is in stage 3, so throughput is bounded by the slowest
+stage rather than the sum of all stages.
+
+Core Flow:
+1. Producer feeds items into the first stage queue (blocks when it is full)
+2. Each stage's workers pull, run the handler, push to the next queue
+3. A full downstream queue blocks upstream workers (backpressure)
+4. Failed items skip the remaining stages and are returned with their error
+5. Outcomes stream out as they complete (`stream`) or in input order (`run`)
+
+Author: AdTopia AI
+Version: 1.0
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+StageHandler = Callable[[Any], Awaitable[Any]]
+
+# Queue sentinel telling a worker its upstream is drained
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """One pipeline stage: an async handler plus its worker pool size"""
+    name: str
+    handler: StageHandler
+    workers: int = 1
+
+
+@dataclass
+class StageMetrics:
+    """Throughput and backpressure counters for one stage"""
+    name: str
+    workers: int
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    blocked_seconds: float = 0.0
+    max_queue_depth: int = 0
+    first_start: Optional[float] = None
+    last_finish: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        active = (self.last_finish - self.first_start) if self.first_start is not None and self.last_finish is not None else 0.0
+        return {
+            'stage': self.name,
+            'workers': self.workers,
+            'processed': self.processed,
+            'failed': self.failed,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'blocked_seconds': round(self.blocked_seconds, 3),
+            'max_queue_depth': self.max_queue_depth,
+            'throughput_per_sec': round(self.processed / active, 3) if active > 0 else 0.0,
+            'utilization': round(self.busy_seconds / (active * self.workers), 3) if active > 0 else 0.0
+        }
+
+
+@dataclass
+class StageOutcome:
+    """Final state of one item after it leaves the pipeline"""
+    index: int
+    value: Any
+    error: Optional[BaseException] = None
+    failed_stage: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
+class StagedExecutor:
+    """Run items through a chain of stages with bounded queues between them"""
+
+    def __init__(self, stages: List[Stage], queue_size: int = 10):
+        if not stages:
+            raise ValueError("StagedExecutor needs at least one stage")
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.metrics = {stage.name: StageMetrics(stage.name, stage.workers) for stage in stages}
+
+    async def stream(self, items: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[StageOutcome]:
+        """Push every item through all stages, yielding outcomes as they complete"""
+        # One input queue per stage plus a final output queue
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+
+        tasks = [asyncio.create_task(self._produce(items, queues[0]))]
+        for position, stage in enumerate(self.stages):
+            remaining = {'workers': stage.workers}
+            for _ in range(stage.workers):
+                tasks.append(asyncio.create_task(
+                    self._worker(position, queues[position], queues[position + 1], remaining)
+                ))
+
+        try:
+            while True:
+                outcome = await queues[-1].get()
+                if outcome is _DONE:
+                    break
+                yield outcome
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def run(self, items: Union[Iterable[Any], AsyncIterable[Any]]) -> List[StageOutcome]:
+        """Push every item through all stages; outcomes are returned in input order"""
+        outcomes = [outcome async for outcome in self.stream(items)]
+        outcomes.sort(key=lambda outcome: outcome.index)
+        return outcomes
+
+    async def _produce(self, items: Union[Iterable[Any], AsyncIterable[Any]], queue: asyncio.Queue):
+        try:
+            if hasattr(items, '__aiter__'):
+                index = 0
+                async for item in items:
+                    await queue.put(StageOutcome(index, item))
+                    index += 1
+            else:
+                for index, item in enumerate(items):
+                    await queue.put(StageOutcome(index, item))
+        finally:
+            for _ in range(self.stages[0].workers):
+                await queue.put(_DONE)
+
+    async def _worker(self, position: int, in_queue: asyncio.Queue, out_queue: asyncio.Queue,
+                      remaining: Dict[str, int]):
+        stage = self.stages[position]
+        metrics = self.metrics[stage.name]
+
+        while True:
+            metrics.max_queue_depth = max(metrics.max_queue_depth, in_queue.qsize())
+            outcome = await in_queue.get()
+            if outcome is _DONE:
+                break
+
+            if outcome.error is None:
+                start = time.perf_counter()
+                if metrics.first_start is None:
+                    metrics.first_start = start
+                try:
+                    outcome.value = await stage.handler(outcome.value)
+                    metrics.processed += 1
+                except Exception as error:
+                    outcome.error = error
+                    outcome.failed_stage = stage.name
+                    metrics.failed += 1
+                finish = time.perf_counter()
+                outcome.timings[stage.name] = finish - start
+                metrics.busy_seconds += finish - start
+                metrics.last_finish = finish
+
+            # A full downstream queue parks this worker: that is the backpressure
+            blocked_from = time.perf_counter()
+            await out_queue.put(outcome)
+            metrics.blocked_seconds += time.perf_counter() - blocked_from
+
+        # Last worker out tells every downstream consumer the stream has ended
+        remaining['workers'] -= 1
+        if remaining['workers'] == 0:
+            is_last = position + 1 == len(self.stages)
+            for _ in range(1 if is_last else self.stages[position + 1].workers):
+                await out_queue.put(_DONE)
+
+    def metrics_summary(self) -> List[Dict[str, Any]]:
+        """Per-stage metrics in pipeline order"""
+        return [self.metrics[stage.name].as_dict() for stage in self.stages]
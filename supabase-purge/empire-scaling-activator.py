@@ -5,14 +5,18 @@ Activate 10K+ user capacity and $600K ARR optimizations
 '''
 
 import os
-import requests
+import sys
 from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from sql_statements import plan_sql
+from sql_executor import SqlExecutor
 
 class EmpireScalingActivator:
     def __init__(self):
         self.project_ref = "auyjsmtnfnnapjdrzhea"
         self.api_url = "https://auyjsmtnfnnapjdrzhea.supabase.co"
         self.service_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+        self.executor = SqlExecutor(self.api_url, self.service_key)
         
     def activate_scaling_optimizations(self):
         '''Activate all empire scaling optimizations'''
@@ -37,6 +41,7 @@ class EmpireScalingActivator:
         print("🎉 EMPIRE SCALING ACTIVATED!")
         print("📈 Capacity: 10K+ users")
         print("💰 ARR Potential: $600K+")
+        self.executor.print_summary()
         
     def create_hvac_indexes(self):
         '''Create HVAC seasonal surge indexes'''
@@ -86,25 +91,21 @@ class EmpireScalingActivator:
         
     def execute_sql(self, sql: str):
         '''Execute SQL via REST API'''
-        try:
-            response = requests.post(
-                f"{self.api_url}/rest/v1/rpc/exec_sql",
-                headers={
-                    "Authorization": f"Bearer {self.service_key}",
-                    "Content-Type": "application/json",
-                    "apikey": self.service_key
-                },
-                json={"sql": sql}
-            )
+        # Each CREATE INDEX CONCURRENTLY gets its own round trip, but exec_sql still runs every call
+        # inside a transaction (a function), so PostgreSQL rejects it there too: run those from psql
+        for batch in plan_sql(sql):
+            result = self.executor.execute(batch)
             
-            if response.status_code == 200:
-                print("   ✅ SQL executed successfully")
+            if result.ok:
+                print(f"   ✅ SQL executed successfully ({len(batch)} statements, {result.latency_ms:.0f} ms)")
+            elif result.status_code is None:
+                print(f"   ❌ SQL execution error: {result.text}")
             else:
-                print(f"   ❌ SQL execution failed: {response.status_code}")
-                
-        except Exception as e:
-            print(f"   ❌ SQL execution error: {str(e)}")
+                print(f"   ❌ SQL execution failed: {result.status_code}")
 
 if __name__ == "__main__":
     activator = EmpireScalingActivator()
-    activator.activate_scaling_optimizations()
+    try:
+        activator.activate_scaling_optimizations()
+    finally:
+        activator.executor.close()
@@ -151,14 +151,17 @@ Automated execution of 70-issue purge system
 import os
 import sys
 import json
-import requests
 from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from sql_statements import plan_sql
+from sql_executor import SqlExecutor
 
 class PurgeAutomation:
     def __init__(self):
         self.project_ref = "{self.project_ref}"
         self.api_url = "{self.api_url}"
         self.service_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+        self.executor = SqlExecutor(self.api_url, self.service_key)
         
     def execute_sql_block(self, sql_file: str) -> bool:
         '''Execute SQL block via REST API'''
@@ -166,29 +169,22 @@ class PurgeAutomation:
             with open(sql_file, 'r') as f:
                 sql_content = f.read()
             
-            # Split into individual statements
-            statements = [stmt.strip() for stmt in sql_content.split(';') if stmt.strip()]
+            # Split on real statement boundaries ($$ bodies, literals and comments stay intact)
+            # and pack them into as few round trips as is safe
+            batches = plan_sql(sql_content)
+            statement_count = sum(len(batch) for batch in batches)
+            print(f"📦 {{sql_file}}: {{statement_count}} statements in {{len(batches)}} round trips")
             
-            for i, statement in enumerate(statements, 1):
-                if not statement or statement.startswith('--'):
-                    continue
-                
-                print(f"📝 Executing statement {{i}}/{{len(statements)}} from {{sql_file}}...")
+            for i, batch in enumerate(batches, 1):
+                label = "isolated" if batch.isolated else f"{{len(batch)}} statements"
+                print(f"📝 Executing batch {{i}}/{{len(batches)}} ({{label}}) from {{sql_file}}...")
                 
-                response = requests.post(
-                    f"{{self.api_url}}/rest/v1/rpc/exec_sql",
-                    headers={{
-                        "Authorization": f"Bearer {{self.service_key}}",
-                        "Content-Type": "application/json",
-                        "apikey": self.service_key
-                    }},
-                    json={{"sql": statement}}
-                )
+                result = self.executor.execute(batch)
                 
-                if response.status_code == 200:
-                    print(f"✅ Statement {{i}} executed successfully")
+                if result.ok:
+                    print(f"✅ Batch {{i}} executed successfully ({{result.latency_ms:.0f}} ms)")
                 else:
-                    print(f"❌ Statement {{i}} failed: {{response.status_code}} - {{response.text}}")
+                    print(f"❌ Batch {{i}} failed: {{result.status_code}} - {{result.text}}")
                     return False
             
             return True
@@ -221,6 +217,7 @@ class PurgeAutomation:
                 print(f"❌ {{sql_file}} not found")
         
         print(f"📊 AUTOMATION COMPLETE: {{success_count}}/{{len(sql_blocks)}} blocks executed successfully")
+        self.executor.print_summary()
         
         if success_count == len(sql_blocks):
             print("🎉 ALL 70 ISSUES RESOLVED AUTOMATICALLY!")
@@ -230,7 +227,10 @@ class PurgeAutomation:
 
 if __name__ == "__main__":
     automation = PurgeAutomation()
-    automation.run_automated_purge()
+    try:
+        automation.run_automated_purge()
+    finally:
+        automation.executor.close()
 """
             
             with open("purge-automation.py", "w") as f:
@@ -367,14 +367,18 @@ Activate 10K+ user capacity and $600K ARR optimizations
 '''
 
 import os
-import requests
+import sys
 from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from sql_statements import plan_sql
+from sql_executor import SqlExecutor
 
 class EmpireScalingActivator:
     def __init__(self):
         self.project_ref = "{self.project_ref}"
         self.api_url = "{self.api_url}"
         self.service_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+        self.executor = SqlExecutor(self.api_url, self.service_key)
         
     def activate_scaling_optimizations(self):
         '''Activate all empire scaling optimizations'''
@@ -399,6 +403,7 @@ class EmpireScalingActivator:
         print("🎉 EMPIRE SCALING ACTIVATED!")
         print("📈 Capacity: 10K+ users")
         print("💰 ARR Potential: $600K+")
+        self.executor.print_summary()
         
     def create_hvac_indexes(self):
         '''Create HVAC seasonal surge indexes'''
@@ -448,28 +453,24 @@ class EmpireScalingActivator:
         
     def execute_sql(self, sql: str):
         '''Execute SQL via REST API'''
-        try:
-            response = requests.post(
-                f"{{self.api_url}}/rest/v1/rpc/exec_sql",
-                headers={{
-                    "Authorization": f"Bearer {{self.service_key}}",
-                    "Content-Type": "application/json",
-                    "apikey": self.service_key
-                }},
-                json={{"sql": sql}}
-            )
+        # Each CREATE INDEX CONCURRENTLY gets its own round trip, but exec_sql still runs every call
+        # inside a transaction (a function), so PostgreSQL rejects it there too: run those from psql
+        for batch in plan_sql(sql):
+            result = self.executor.execute(batch)
             
-            if response.status_code == 200:
-                print("   ✅ SQL executed successfully")
+            if result.ok:
+                print(f"   ✅ SQL executed successfully ({{len(batch)}} statements, {{result.latency_ms:.0f}} ms)")
+            elif result.status_code is None:
+                print(f"   ❌ SQL execution error: {{result.text}}")
             else:
-                print(f"   ❌ SQL execution failed: {{response.status_code}}")
-                
-        except Exception as e:
-            print(f"   ❌ SQL execution error: {{str(e)}}")
+                print(f"   ❌ SQL execution failed: {{result.status_code}}")
 
 if __name__ == "__main__":
     activator = EmpireScalingActivator()
-    activator.activate_scaling_optimizations()
+    try:
+        activator.activate_scaling_optimizations()
+    finally:
+        activator.executor.close()
 """
             
             with open("empire-scaling-activator.py", "w") as f:
@@ -7,14 +7,17 @@ Automated execution of 70-issue purge system
 import os
 import sys
 import json
-import requests
 from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from sql_statements import plan_sql
+from sql_executor import SqlExecutor
 
 class PurgeAutomation:
     def __init__(self):
         self.project_ref = "auyjsmtnfnnapjdrzhea"
         self.api_url = "https://auyjsmtnfnnapjdrzhea.supabase.co"
         self.service_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+        self.executor = SqlExecutor(self.api_url, self.service_key)
         
     def execute_sql_block(self, sql_file: str) -> bool:
         '''Execute SQL block via REST API'''
@@ -22,29 +25,22 @@ class PurgeAutomation:
             with open(sql_file, 'r') as f:
                 sql_content = f.read()
             
-            # Split into individual statements
-            statements = [stmt.strip() for stmt in sql_content.split(';') if stmt.strip()]
+            # Split on real statement boundaries ($$ bodies, literals and comments stay intact)
+            # and pack them into as few round trips as is safe
+            batches = plan_sql(sql_content)
+            statement_count = sum(len(batch) for batch in batches)
+            print(f"📦 {sql_file}: {statement_count} statements in {len(batches)} round trips")
             
-            for i, statement in enumerate(statements, 1):
-                if not statement or statement.startswith('--'):
-                    continue
+            for i, batch in enumerate(batches, 1):
+                label = "isolated" if batch.isolated else f"{len(batch)} statements"
+                print(f"📝 Executing batch {i}/{len(batches)} ({label}) from {sql_file}...")
                 
-                print(f"📝 Executing statement {i}/{len(statements)} from {sql_file}...")
+                result = self.executor.execute(batch)
                 
-                response = requests.post(
-                    f"{self.api_url}/rest/v1/rpc/exec_sql",
-                    headers={
-                        "Authorization": f"Bearer {self.service_key}",
-                        "Content-Type": "application/json",
-                        "apikey": self.service_key
-                    },
-                    json={"sql": statement}
-                )
-                
-                if response.status_code == 200:
-                    print(f"✅ Statement {i} executed successfully")
+                if result.ok:
+                    print(f"✅ Batch {i} executed successfully ({result.latency_ms:.0f} ms)")
                 else:
-                    print(f"❌ Statement {i} failed: {response.status_code} - {response.text}")
+                    print(f"❌ Batch {i} failed: {result.status_code} - {result.text}")
                     return False
             
             return True
@@ -77,6 +73,7 @@ class PurgeAutomation:
                 print(f"❌ {sql_file} not found")
         
         print(f"📊 AUTOMATION COMPLETE: {success_count}/{len(sql_blocks)} blocks executed successfully")
+        self.executor.print_summary()
         
         if success_count == len(sql_blocks):
             print("🎉 ALL 70 ISSUES RESOLVED AUTOMATICALLY!")
@@ -86,4 +83,7 @@ class PurgeAutomation:
 
 if __name__ == "__main__":
     automation = PurgeAutomation()
-    automation.run_automated_purge()
+    try:
+        automation.run_automated_purge()
+    finally:
+        automation.executor.close()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+⚡ SHARED EXEC_SQL CLIENT
+One pooled keep-alive session for every rpc/exec_sql call, with per-statement timeouts,
+idempotency-aware retries and latency tracking
+"""
+
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from sql_statements import SqlBatch, split_statements
+
+# Seconds allowed per statement in a batch; CONCURRENTLY/VACUUM-style statements get the isolated budget
+DEFAULT_STATEMENT_TIMEOUT = float(os.getenv('SQL_EXEC_STATEMENT_TIMEOUT', '30'))
+DEFAULT_ISOLATED_TIMEOUT = float(os.getenv('SQL_EXEC_ISOLATED_TIMEOUT', '600'))
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_RETRIES = int(os.getenv('SQL_EXEC_RETRIES', '3'))
+
+# Responses that mean the request was turned away before any SQL ran: always safe to resend
+_NOT_PROCESSED = {429, 503}
+# Responses (and transport errors) after which the SQL may or may not have committed
+_AMBIGUOUS = {500, 502, 504}
+
+
+def _never_sent(error: requests.exceptions.RequestException) -> bool:
+    """True when the request failed before reaching the server (connect timeout, refused, DNS)."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+@dataclass
+class SqlResult:
+    ok: bool
+    status_code: Optional[int]
+    text: str
+    latency_ms: float
+    attempts: int
+
+
+class SqlExecutor:
+    """POST SQL to /rest/v1/rpc/exec_sql over one pooled session.
+
+    Connections are kept alive across calls, so a run of many batches pays for one TLS
+    handshake instead of one per statement. Failures are retried with jittered backoff:
+    rate limiting (429/503) and connection failures before the request was sent are always
+    retried, while timeouts, dropped connections and 500/502/504 are retried only when every
+    statement in the batch is idempotent, since the first attempt may already have committed.
+    """
+
+    def __init__(self, api_url: str, service_key: Optional[str],
+                 statement_timeout: float = DEFAULT_STATEMENT_TIMEOUT,
+                 isolated_timeout: float = DEFAULT_ISOLATED_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES, backoff: float = 0.5, pool_size: int = 4):
+        self.endpoint = f"{api_url.rstrip('/')}/rest/v1/rpc/exec_sql"
+        self.statement_timeout = statement_timeout
+        self.isolated_timeout = isolated_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.latencies_ms: List[float] = []
+        self.retry_count = 0
+
+        self.session = requests.Session()
+        # Retries are decided here per batch, so the adapter itself never resends
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {service_key}",
+            "Content-Type": "application/json",
+            "apikey": service_key or ""
+        })
+
+    def timeout_for(self, batch: SqlBatch):
+        if batch.isolated:
+            return (DEFAULT_CONNECT_TIMEOUT, self.isolated_timeout)
+        return (DEFAULT_CONNECT_TIMEOUT, self.statement_timeout * max(1, len(batch)))
+
+    def _sleep(self, attempt: int, response: Optional[requests.Response] = None):
+        delay = self.backoff * (2 ** (attempt - 1)) * (0.5 + random.random())
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        time.sleep(delay)
+
+    def execute(self, sql: Union[str, SqlBatch]) -> SqlResult:
+        """Run one batch (or raw SQL text, sent as a single round trip) and report how it went."""
+        batch = sql if isinstance(sql, SqlBatch) else SqlBatch(split_statements(sql))
+        can_resend_ambiguous = batch.idempotent
+        timeout = self.timeout_for(batch)
+        started = time.perf_counter()
+
+        attempt = 0
+        while True:
+            attempt += 1
+            response, error, retryable = None, None, False
+            try:
+                response = self.session.post(self.endpoint, json={"sql": batch.sql}, timeout=timeout)
+                if response.status_code == 200:
+                    return self._result(True, response.status_code, response.text, started, attempt)
+                retryable = response.status_code in _NOT_PROCESSED or (
+                    response.status_code in _AMBIGUOUS and can_resend_ambiguous)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                # Read timeouts and resets after the body was sent are ambiguous
+                error, retryable = e, _never_sent(e) or can_resend_ambiguous
+            except requests.exceptions.RequestException as e:
+                error = e
+
+            if not retryable or attempt > self.retries:
+                if response is not None:
+                    return self._result(False, response.status_code, response.text, started, attempt)
+                return self._result(False, None, str(error), started, attempt)
+
+            self.retry_count += 1
+            reason = response.status_code if response is not None else type(error).__name__
+            print(f"   🔁 exec_sql retry {attempt}/{self.retries} after {reason}")
+            self._sleep(attempt, response)
+
+    def _result(self, ok: bool, status_code: Optional[int], text: str, started: float, attempts: int) -> SqlResult:
+        latency_ms = (time.perf_counter() - started) * 1000
+        self.latencies_ms.append(latency_ms)
+        return SqlResult(ok, status_code, text, latency_ms, attempts)
+
+    def summary(self) -> Dict[str, float]:
+        ordered = sorted(self.latencies_ms)
+        if not ordered:
+            return {'round_trips': 0, 'retries': self.retry_count}
+
+        def rank(p: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 1)
+
+        return {
+            'round_trips': len(ordered),
+            'retries': self.retry_count,
+            'p50_ms': rank(0.50),
+            'p95_ms': rank(0.95),
+            'max_ms': round(ordered[-1], 1),
+            'total_seconds': round(sum(ordered) / 1000, 2)
+        }
+
+    def print_summary(self):
+        s = self.summary()
+        if not s['round_trips']:
+            return
+        print(f"⏱️ exec_sql: {s['round_trips']} round trips, {s['retries']} retries | "
+              f"p50 {s['p50_ms']} ms | p95 {s['p95_ms']} ms | max {s['max_ms']} ms | {s['total_seconds']}s total")
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self) -> 'SqlExecutor':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+🧩 SQL STATEMENT SPLITTER & BATCHER
+Split SQL files into statements (dollar quotes, comments and string literals aware)
+and pack them into as few rpc/exec_sql round trips as is safe
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+
+# Statements per round trip and bytes per round trip outside explicit BEGIN ... COMMIT blocks
+DEFAULT_BATCH_STATEMENTS = 25
+DEFAULT_BATCH_BYTES = 64 * 1024
+
+_SPECIAL = re.compile(r"--|/\*|[;'\"$]")
+_DOLLAR_TAG = re.compile(r"\$(?:[^\W\d]\w*)?\$")
+_STRING = re.compile(r"'[^']*(?:''[^']*)*'?")
+_ESCAPE_STRING = re.compile(r"'[^'\\]*(?:(?:\\.|'')[^'\\]*)*'?", re.S)
+_IDENTIFIER = re.compile(r'"[^"]*(?:""[^"]*)*"?')
+_COMMENT_EDGE = re.compile(r"/\*|\*/")
+
+# Statements PostgreSQL refuses to run inside a transaction block (every exec_sql call is one),
+# plus ALTER TYPE ... ADD VALUE, whose new value cannot be used later in the same transaction
+_ISOLATED = re.compile(
+    r"(?:CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY"
+    r"|DROP\s+INDEX\s+CONCURRENTLY"
+    r"|REINDEX\b[^;]*?\bCONCURRENTLY\b"
+    r"|VACUUM\b"
+    r"|(?:CREATE|DROP)\s+(?:DATABASE|TABLESPACE)\b"
+    r"|ALTER\s+SYSTEM\b"
+    r"|ALTER\s+TYPE\b[^;]*?\bADD\s+VALUE\b)",
+    re.I
+)
+# Statements that leave the database in the same state when run twice, so a batch made only of
+# these can be resent after an ambiguous failure (timeout, dropped connection, 5xx). ANALYZE only
+# refreshes planner statistics. Read queries are handled separately (_READ_QUERY); anything not
+# listed here (INSERT, UPDATE, DO blocks, GRANT, VACUUM, ...) is not retried.
+_IDEMPOTENT = re.compile(
+    r"(?:SHOW|ANALYZE|COMMENT\s+ON|SET|RESET)\b"
+    r"|REFRESH\s+MATERIALIZED\s+VIEW\b"
+    r"|CREATE\s+OR\s+REPLACE\b"
+    r"|CREATE\b[^;(]*?\bIF\s+NOT\s+EXISTS\b"
+    r"|DROP\b[^;(]*?\bIF\s+EXISTS\b"
+    r"|ALTER\s+TABLE\b[^;]*?\b(?:(?:ENABLE|DISABLE|(?:NO\s+)?FORCE)\s+ROW\s+LEVEL\s+SECURITY|ADD\s+COLUMN\s+IF\s+NOT\s+EXISTS)\b"
+    r"|INSERT\b[^;]*?\bON\s+CONFLICT\b[^;]*?\bDO\s+NOTHING\b",
+    re.I
+)
+# A read query is retry-safe only if it writes nothing and calls no function outside _PURE_FUNCTIONS:
+# SELECT cron.schedule(...) or SELECT public.purge_old_records() change state like any INSERT
+_READ_QUERY = re.compile(r"(?:SELECT|WITH|EXPLAIN)\b", re.I)
+_WRITES = re.compile(r"\b(?:INSERT|UPDATE|DELETE|MERGE|TRUNCATE|COPY|INTO|CALL)\b", re.I)
+_CALL = re.compile(r'("[^"]*(?:""[^"]*)*"|[^\W\d][\w$]*)(?:\s*\.\s*("[^"]*(?:""[^"]*)*"|[^\W\d][\w$]*))?\s*\(')
+# Words that can precede "(" without being a function call: keywords and sized type names
+_PAREN_KEYWORDS = frozenset("""
+    select with explain analyze verbose from where and or not in exists any some all values as on using
+    join lateral over filter within group by order partition having case when then else between like
+    ilike is distinct union intersect except limit offset array row cast materialized recursive
+    numeric decimal varchar char character timestamp time interval bit float
+""".split())
+# Built-ins with no side effects
+_PURE_FUNCTIONS = frozenset("""
+    count sum avg min max coalesce nullif greatest least round trunc abs ceil ceiling floor mod power
+    sqrt sign now length char_length octet_length lower upper trim btrim ltrim rtrim substring substr
+    replace split_part concat concat_ws format position left right lpad rpad regexp_replace
+    regexp_match md5 to_char to_date to_timestamp to_number date_trunc date_part extract age
+    jsonb_build_object json_build_object jsonb_build_array json_build_array jsonb_agg json_agg
+    jsonb_object_agg json_object_agg to_jsonb to_json row_to_json jsonb_array_length jsonb_typeof
+    jsonb_array_elements jsonb_each array_agg string_agg array_length unnest generate_series bool_and
+    bool_or row_number rank dense_rank lag lead first_value last_value percentile_cont
+    percentile_disc stddev variance pg_size_pretty pg_total_relation_size pg_relation_size
+    pg_table_size pg_indexes_size pg_database_size current_setting format_type
+""".split())
+_TRANSACTION_OPEN = re.compile(r"(?:BEGIN|START\s+TRANSACTION)\s*(?:TRANSACTION|WORK|ISOLATION\b.*)?$", re.I | re.S)
+_TRANSACTION_CLOSE = re.compile(r"(?:COMMIT|END)(?:\s+(?:TRANSACTION|WORK))?$", re.I)
+_TRANSACTION_ABORT = re.compile(r"(?:ROLLBACK|ABORT)(?:\s+(?:TRANSACTION|WORK))?$", re.I)
+
+
+def _is_identifier_char(char: str) -> bool:
+    return char.isalnum() or char in '_$'
+
+
+def _skip_block_comment(sql: str, start: int) -> int:
+    """Index just past the /* ... */ comment opening at start (PostgreSQL comments nest)."""
+    depth, pos = 0, start
+    while True:
+        edge = _COMMENT_EDGE.search(sql, pos)
+        if edge is None:
+            return len(sql)
+        depth += 1 if edge.group() == '/*' else -1
+        pos = edge.end()
+        if depth == 0:
+            return pos
+
+
+def _segments(sql: str) -> Iterator[Tuple[str, int, int]]:
+    """Yield (kind, start, end) spans of SQL text, kind being 'code', ';', 'comment',
+    'string', 'identifier' or 'dollar' ($tag$ ... $tag$ body).
+    """
+    pos, size = 0, len(sql)
+    while True:
+        match = _SPECIAL.search(sql, pos)
+        if match is None:
+            if pos < size:
+                yield 'code', pos, size
+            return
+        index, token = match.start(), match.group()
+        if index > pos:
+            yield 'code', pos, index
+
+        if token == ';':
+            yield ';', index, index + 1
+            pos = index + 1
+            continue
+        if token == '--':
+            newline = sql.find('\n', index)
+            pos = size if newline == -1 else newline + 1
+            yield 'comment', index, pos
+            continue
+        if token == '/*':
+            pos = _skip_block_comment(sql, index)
+            yield 'comment', index, pos
+            continue
+
+        if token == "'":
+            escapes = index > 0 and sql[index - 1] in 'eE' and (index < 2 or not _is_identifier_char(sql[index - 2]))
+            kind, close = 'string', (_ESCAPE_STRING if escapes else _STRING).match(sql, index).end()
+        elif token == '"':
+            kind, close = 'identifier', _IDENTIFIER.match(sql, index).end()
+        else:
+            tag = _DOLLAR_TAG.match(sql, index)
+            if tag is None or (index > 0 and _is_identifier_char(sql[index - 1])):
+                kind, close = 'code', index + 1  # $1 parameter or a $ inside an identifier
+            else:
+                found = sql.find(tag.group(), tag.end())
+                kind, close = 'dollar', size if found == -1 else found + len(tag.group())
+        yield kind, index, close
+        pos = close
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split SQL text on top-level semicolons.
+
+    Semicolons inside '...' and E'...' literals, "quoted" identifiers, $tag$ ... $tag$ bodies,
+    -- line comments and nested /* */ comments do not end a statement. Comments before and
+    after a statement are dropped; comment-only chunks produce no statement.
+    """
+    statements: List[str] = []
+    start: Optional[int] = None
+    end = 0
+
+    for kind, lo, hi in _segments(sql):
+        if kind == ';':
+            if start is not None:
+                statements.append(sql[start:end])
+            start = None
+        elif kind != 'comment':
+            segment = sql[lo:hi]
+            if segment.strip():
+                if start is None:
+                    start = lo + len(segment) - len(segment.lstrip())
+                end = lo + len(segment.rstrip())
+
+    if start is not None:
+        statements.append(sql[start:end])
+    return statements
+
+
+def requires_isolation(statement: str) -> bool:
+    """True for statements that must be sent on their own, outside any multi-statement batch."""
+    return _ISOLATED.match(statement) is not None
+
+
+def _is_pure_call(call: 're.Match') -> bool:
+    schema, name = (call.group(1), call.group(2)) if call.group(2) else (None, call.group(1))
+    if name.startswith('"'):
+        return False
+    name = name.lower()
+    if schema is None and name in _PAREN_KEYWORDS:
+        return True
+    return (schema is None or schema.lower() == 'pg_catalog') and name in _PURE_FUNCTIONS
+
+
+def is_idempotent(statement: str) -> bool:
+    """True when running the statement a second time cannot change the outcome."""
+    # Literals, comments and function bodies are blanked so their contents cannot look like calls
+    code = ''.join(statement[lo:hi] if kind in ('code', 'identifier') else ' '
+                   for kind, lo, hi in _segments(statement)).strip()
+    if _READ_QUERY.match(code):
+        return _WRITES.search(code) is None and all(_is_pure_call(call) for call in _CALL.finditer(code))
+    return _IDEMPOTENT.match(code) is not None
+
+
+@dataclass
+class SqlBatch:
+    """Statements sent in one exec_sql round trip (and so run in one transaction)."""
+    statements: List[str] = field(default_factory=list)
+    isolated: bool = False
+
+    @property
+    def sql(self) -> str:
+        return ';\n'.join(self.statements) + ';'
+
+    @property
+    def idempotent(self) -> bool:
+        return all(is_idempotent(statement) for statement in self.statements)
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+
+def batch_statements(statements: List[str], max_statements: int = DEFAULT_BATCH_STATEMENTS,
+                     max_bytes: int = DEFAULT_BATCH_BYTES) -> List[SqlBatch]:
+    """Pack consecutive statements into batches for exec_sql.
+
+    exec_sql cannot run BEGIN/COMMIT itself, but each call is already a transaction, so
+    transaction-control statements become batch boundaries instead of being sent: a
+    BEGIN ... COMMIT block goes out as one batch regardless of size, keeping it atomic.
+    Statements that cannot run inside a transaction (requires_isolation) always get a
+    round trip of their own; inside a block they are held back and sent one by one right
+    after the block's batch commits, with a warning, since PostgreSQL would have rejected
+    them there anyway.
+
+    A block ending in ROLLBACK is dropped, isolated statements included. So is a BEGIN
+    that is never closed: psql rolls an open transaction back when the script ends, so
+    nothing after it is sent.
+    """
+    batches: List[SqlBatch] = []
+    current = SqlBatch()
+    current_bytes = 0
+    in_block = False
+    deferred: List[SqlBatch] = []
+
+    def flush():
+        nonlocal current, current_bytes
+        if current.statements:
+            batches.append(current)
+        current, current_bytes = SqlBatch(), 0
+
+    def close_block():
+        nonlocal in_block
+        flush()
+        if deferred:
+            print(f"⚠️ {len(deferred)} statement(s) inside BEGIN ... COMMIT cannot run in a transaction; "
+                  f"sending them separately after the block commits")
+            batches.extend(deferred)
+            deferred.clear()
+        in_block = False
+
+    for statement in statements:
+        if _TRANSACTION_OPEN.match(statement):
+            if in_block:
+                # PostgreSQL ignores a nested BEGIN (with a warning); the block carries on
+                continue
+            flush()
+            in_block = True
+        elif _TRANSACTION_CLOSE.match(statement):
+            close_block()
+        elif _TRANSACTION_ABORT.match(statement):
+            current, current_bytes = SqlBatch(), 0
+            deferred.clear()
+            in_block = False
+        elif requires_isolation(statement):
+            if in_block:
+                deferred.append(SqlBatch([statement], isolated=True))
+            else:
+                flush()
+                batches.append(SqlBatch([statement], isolated=True))
+        else:
+            if not in_block and current.statements and (
+                    len(current) >= max_statements or current_bytes + len(statement) > max_bytes):
+                flush()
+            current.statements.append(statement)
+            current_bytes += len(statement)
+    if in_block:
+        dropped = len(current) + len(deferred)
+        print(f"⚠️ BEGIN without COMMIT: dropping the {dropped} statement(s) after it, "
+              f"as psql would roll the open transaction back")
+        return batches
+    flush()
+    return batches
+
+
+def plan_sql(sql: str, max_statements: int = DEFAULT_BATCH_STATEMENTS,
+             max_bytes: int = DEFAULT_BATCH_BYTES) -> List[SqlBatch]:
+    """split_statements + batch_statements."""
+    return batch_statements(split_statements(sql), max_statements, max_bytes)
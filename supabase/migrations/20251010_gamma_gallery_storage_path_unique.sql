@@ -0,0 +1,29 @@
+-- Gamma Gallery Bulk Upsert Support
+-- Migration: 20251010_gamma_gallery_storage_path_unique.sql
+-- Description: Unique storage_path so the migrator can bulk upsert gamma_gallery rows (ON CONFLICT (storage_path))
+
+BEGIN;
+
+-- Earlier per-card inserts could write the same storage_path twice; keep the oldest row
+CREATE TEMP TABLE gamma_gallery_duplicates ON COMMIT DROP AS
+SELECT id, keep_id
+FROM (
+    SELECT id, FIRST_VALUE(id) OVER (PARTITION BY storage_path ORDER BY created_at, id) AS keep_id
+    FROM public.gamma_gallery
+) ranked
+WHERE id <> keep_id;
+
+-- Point A/B tests at the surviving row before removing duplicates
+UPDATE public.ab_tests t
+SET gamma_gallery_id = d.keep_id
+FROM gamma_gallery_duplicates d
+WHERE t.gamma_gallery_id = d.id;
+
+DELETE FROM public.gamma_gallery g
+USING gamma_gallery_duplicates d
+WHERE g.id = d.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_gamma_storage_path_unique
+    ON public.gamma_gallery(storage_path);
+
+COMMIT;
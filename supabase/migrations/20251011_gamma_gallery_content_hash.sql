@@ -0,0 +1,17 @@
+-- Gamma Gallery Content-Addressed Cards
+-- Migration: 20251011_gamma_gallery_content_hash.sql
+-- Description: Track each card's SHA-256 so identical cards share one storage object across URLs
+
+BEGIN;
+
+ALTER TABLE public.gamma_gallery
+ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_gamma_content_hash ON public.gamma_gallery(content_hash);
+
+-- Several URLs may now point at the same object, so uniqueness moves to (URL, object)
+DROP INDEX IF EXISTS public.idx_gamma_storage_path_unique;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_gamma_url_storage_path_unique
+    ON public.gamma_gallery(original_gamma_url, storage_path);
+
+COMMIT;
@@ -0,0 +1,11 @@
+-- Gamma Gallery Card Derivatives
+-- Migration: 20251012_gamma_gallery_derivatives.sql
+-- Description: Record thumbnail / 540px / WebP renditions of each card so grid views skip the full-size PNG
+
+BEGIN;
+
+-- e.g. {"thumb": "movers/en/r-movers-1-ab12cd34-thumb.webp", "540": "...", "webp": "..."}
+ALTER TABLE public.gamma_gallery
+ADD COLUMN IF NOT EXISTS derivative_paths JSONB NOT NULL DEFAULT '{}'::jsonb;
+
+COMMIT;
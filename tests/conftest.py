@@ -0,0 +1,10 @@
+"""Make the script directories under test importable (they are not packages)."""
+
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+for directory in (REPO_ROOT / 'supabase-purge',):
+    if str(directory) not in sys.path:
+        sys.path.insert(0, str(directory))
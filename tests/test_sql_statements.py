@@ -0,0 +1,131 @@
+"""Tests for supabase-purge/sql_statements.py"""
+
+import pytest
+
+from sql_statements import SqlBatch, batch_statements, is_idempotent, plan_sql, split_statements
+
+
+def test_dollar_quoted_body_keeps_its_semicolons():
+    sql = """
+    CREATE FUNCTION f() RETURNS void AS $body$
+    BEGIN
+      DELETE FROM logs; -- not a boundary
+    END;
+    $body$ LANGUAGE plpgsql;
+    SELECT $$a;b$$;
+    """
+    statements = split_statements(sql)
+    assert len(statements) == 2
+    assert statements[0].startswith('CREATE FUNCTION') and statements[0].endswith('LANGUAGE plpgsql')
+    assert statements[1] == 'SELECT $$a;b$$'
+
+
+def test_nested_block_comments_are_skipped():
+    sql = "/* outer /* inner; */ still comment; */ SELECT 1; /* trailing */"
+    assert split_statements(sql) == ['SELECT 1']
+
+
+def test_comment_only_chunks_produce_no_statement():
+    sql = "-- header only;\n;\n/* nothing here */;\nSELECT 1;\n-- footer;"
+    assert split_statements(sql) == ['SELECT 1']
+
+
+def test_literals_and_quoted_identifiers_keep_their_semicolons():
+    sql = """SELECT 'a;b', E'it\\'s;', "odd;name" FROM t; SELECT 2"""
+    assert split_statements(sql) == ["""SELECT 'a;b', E'it\\'s;', "odd;name" FROM t""", 'SELECT 2']
+
+
+def test_statements_outside_blocks_are_packed_up_to_the_limit():
+    batches = batch_statements([f'SELECT {i}' for i in range(5)], max_statements=2)
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+
+def test_explicit_block_is_one_batch_regardless_of_limit():
+    batches = plan_sql('BEGIN; SELECT 1; SELECT 2; SELECT 3; COMMIT; SELECT 4;', max_statements=2)
+    assert [batch.statements for batch in batches] == [['SELECT 1', 'SELECT 2', 'SELECT 3'], ['SELECT 4']]
+
+
+def test_isolated_statements_in_a_block_run_after_it(capsys):
+    sql = """
+    BEGIN;
+    CREATE TABLE t (id int);
+    CREATE INDEX CONCURRENTLY idx_t ON t (id);
+    ALTER TABLE t ENABLE ROW LEVEL SECURITY;
+    COMMIT;
+    """
+    batches = plan_sql(sql)
+    assert [(batch.statements, batch.isolated) for batch in batches] == [
+        (['CREATE TABLE t (id int)', 'ALTER TABLE t ENABLE ROW LEVEL SECURITY'], False),
+        (['CREATE INDEX CONCURRENTLY idx_t ON t (id)'], True),
+    ]
+    assert 'cannot run in a transaction' in capsys.readouterr().out
+
+
+def test_isolated_statement_outside_a_block_splits_the_batch():
+    batches = plan_sql('SELECT 1; VACUUM t; SELECT 2;')
+    assert [(batch.statements, batch.isolated) for batch in batches] == [
+        (['SELECT 1'], False), (['VACUUM t'], True), (['SELECT 2'], False)
+    ]
+
+
+def test_rolled_back_block_is_dropped_with_its_isolated_statements():
+    sql = 'BEGIN; DELETE FROM t; CREATE INDEX CONCURRENTLY i ON t (id); ROLLBACK; SELECT 1;'
+    assert [batch.statements for batch in plan_sql(sql)] == [['SELECT 1']]
+
+
+def test_unclosed_begin_drops_the_rest_of_the_file(capsys):
+    batches = plan_sql('SELECT 1; BEGIN; DELETE FROM t; SELECT 2;')
+    assert [batch.statements for batch in batches] == [['SELECT 1']]
+    assert 'BEGIN without COMMIT' in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('statement', [
+    'SELECT 1',
+    'select count(*) from public.leads where status in (\'new\', \'hot\')',
+    "SELECT jsonb_build_object('total', COUNT(*), 'avg', ROUND(AVG(amount)::numeric(10, 2), 2)) FROM orders",
+    'WITH recent AS (SELECT id FROM leads ORDER BY created_at DESC LIMIT 10) SELECT * FROM recent',
+    "SELECT 'purge_old_records()' AS label",
+    'SELECT pg_catalog.count(*) FROM leads',
+    'EXPLAIN SELECT * FROM leads',
+    'SHOW statement_timeout',
+    'ANALYZE public.leads',
+    'CREATE OR REPLACE VIEW v AS SELECT 1',
+    'CREATE TABLE IF NOT EXISTS t (id int)',
+    'DROP INDEX IF EXISTS idx_t',
+    'ALTER TABLE t ENABLE ROW LEVEL SECURITY',
+    'INSERT INTO t (id) VALUES (1) ON CONFLICT DO NOTHING',
+])
+def test_retry_safe_statements(statement):
+    assert is_idempotent(statement)
+
+
+@pytest.mark.parametrize('statement', [
+    # Functions can change anything; only known pure built-ins are retry-safe
+    'SELECT public.purge_old_records()',
+    "SELECT cron.schedule('nightly', '0 3 * * *', $$DELETE FROM logs$$)",
+    "SELECT net.http_post(url := 'https://example.com')",
+    'SELECT purge_old_records()',
+    'SELECT "purge_old_records"()',
+    "SELECT nextval('orders_id_seq')",
+    "SELECT count(*), refresh_stats() FROM leads",
+    "SELECT E'it\\'s', purge_old_records()",
+    # Writes behind a read-looking prefix
+    'WITH gone AS (DELETE FROM logs RETURNING id) SELECT count(*) FROM gone',
+    'SELECT * INTO leads_backup FROM leads',
+    'EXPLAIN ANALYZE DELETE FROM logs',
+    # Not treated as retry-safe
+    'GRANT SELECT ON leads TO authenticated',
+    'REVOKE INSERT ON leads FROM anon',
+    'VACUUM ANALYZE leads',
+    'REINDEX TABLE leads',
+    'INSERT INTO t (id) VALUES (1)',
+    'UPDATE t SET id = 2',
+    "DO $$ BEGIN PERFORM 1; END $$",
+])
+def test_statements_that_may_change_state(statement):
+    assert not is_idempotent(statement)
+
+
+def test_batch_is_idempotent_only_if_every_statement_is():
+    assert SqlBatch(['SELECT 1', 'SHOW search_path']).idempotent
+    assert not SqlBatch(['SELECT 1', 'SELECT public.purge_old_records()']).idempotent